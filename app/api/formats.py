@@ -0,0 +1,134 @@
+import io
+import json
+from typing import Iterator, Optional, Sequence
+from fastapi import HTTPException, Request
+from app.services.coingecko import OHLC_COLUMNS
+
+MEDIA_TYPES = {
+    "json": "application/json",
+    "arrow": "application/vnd.apache.arrow.stream",
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+}
+
+# Rows per chunk when streaming CSV
+CSV_CHUNK_ROWS = 500
+
+
+def negotiate_format(request: Request, format: Optional[str]) -> str:
+    """Pick an output format from ``?format=``, falling back to the Accept header."""
+    if format:
+        if format not in MEDIA_TYPES:
+            raise HTTPException(status_code=400, detail=f"Unsupported format '{format}'")
+        return format
+    accept = request.headers.get("accept", "")
+    for name, media_type in MEDIA_TYPES.items():
+        if name != "json" and media_type in accept:
+            return name
+    return "json"
+
+
+def parse_fields(fields: Optional[str], available: Sequence[str]) -> Optional[list[str]]:
+    """
+    Parse a ``fields=`` projection such as "symbol,price_usd".
+
+    Returns the requested names in the resource's own order, or None when
+    every field is wanted.
+    """
+    wanted = {name.strip() for name in (fields or "").split(",") if name.strip()}
+    if not wanted:
+        return None
+    unknown = wanted.difference(available)
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown fields: {', '.join(sorted(unknown))} (available: {', '.join(available)})",
+        )
+    return [name for name in available if name in wanted]
+
+
+def project(item: dict, fields: Optional[list[str]]) -> dict:
+    return item if fields is None else {name: item[name] for name in fields}
+
+
+def _csv_value(value) -> str:
+    return "" if value is None else str(value)
+
+
+def csv_header(with_symbol: bool = False, names: Sequence[str] = OHLC_COLUMNS) -> str:
+    return ",".join((["symbol"] if with_symbol else []) + list(names)) + "\n"
+
+
+def csv_lines(
+    columns: dict,
+    symbol: Optional[str] = None,
+    header: bool = True,
+    names: Sequence[str] = OHLC_COLUMNS,
+) -> Iterator[str]:
+    """Yield CSV text in chunks, optionally with a leading symbol column."""
+    if header:
+        yield csv_header(with_symbol=symbol is not None, names=names)
+    prefix = f"{symbol}," if symbol else ""
+    rows = zip(*(columns[name] for name in names))
+    chunk = []
+    for row in rows:
+        chunk.append(prefix + ",".join(_csv_value(v) for v in row))
+        if len(chunk) == CSV_CHUNK_ROWS:
+            yield "\n".join(chunk) + "\n"
+            chunk = []
+    if chunk:
+        yield "\n".join(chunk) + "\n"
+
+
+def ndjson_rows(columns: dict, names: Sequence[str] = OHLC_COLUMNS) -> Iterator[str]:
+    """Yield one JSON object per row."""
+    for row in zip(*(columns[name] for name in names)):
+        yield json.dumps(dict(zip(names, row)), separators=(",", ":")) + "\n"
+
+
+class ArrowStreamEncoder:
+    """
+    Encode OHLC columns as an Arrow IPC stream, one record batch per symbol.
+
+    ``pyarrow`` is imported on first use so workers that never serve Arrow
+    don't pay for it.
+    """
+
+    def __init__(self):
+        import pyarrow as pa
+
+        self.pa = pa
+        self.schema = pa.schema([
+            ("symbol", pa.string()),
+            ("date", pa.date32()),
+            ("open", pa.float64()),
+            ("high", pa.float64()),
+            ("low", pa.float64()),
+            ("close", pa.float64()),
+            ("volume", pa.float64()),
+            ("market_cap", pa.float64()),
+        ])
+        self.sink = io.BytesIO()
+        self.writer = pa.ipc.new_stream(self.sink, self.schema)
+
+    def _drain(self) -> bytes:
+        data = self.sink.getvalue()
+        self.sink.seek(0)
+        self.sink.truncate()
+        return data
+
+    def begin(self) -> bytes:
+        """The stream header (schema message)."""
+        return self._drain()
+
+    def batch(self, symbol: str, columns: dict) -> bytes:
+        pa = self.pa
+        arrays = [pa.array([symbol] * len(columns["date"]), pa.string())]
+        arrays.append(pa.array(columns["date"], pa.string()).cast(pa.date32()))
+        arrays += [pa.array(columns[name], pa.float64()) for name in OHLC_COLUMNS[1:]]
+        self.writer.write_batch(pa.RecordBatch.from_arrays(arrays, schema=self.schema))
+        return self._drain()
+
+    def end(self) -> bytes:
+        self.writer.close()
+        return self._drain()
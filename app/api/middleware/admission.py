@@ -0,0 +1,195 @@
+import asyncio
+import hmac
+import json
+import math
+import time
+from collections import OrderedDict
+from typing import Optional
+from app import metrics
+from app.config import get_settings
+from app.metrics import ADMISSION_REJECTIONS
+
+# Route classes by path prefix (longest first): (prefix, class, cost)
+ROUTE_CLASSES = [
+    ("/history/bulk", "heavy", 20),
+    ("/chart", "heavy", 20),
+    ("/fear-greed/correlation", "medium", 5),
+    ("/history", "medium", 5),
+    ("/compare", "medium", 5),
+    ("/prices/top100", "medium", 2),
+    ("/exchanges", "medium", 3),
+    ("/whales", "medium", 3),
+    ("/news", "medium", 3),
+]
+DEFAULT_CLASS = ("light", 1)
+
+# Never limited or shed
+EXEMPT_PATHS = {"/", "/health", "/metrics", "/docs", "/redoc", "/openapi.json"}
+
+# Seconds a client is told to wait when requests are shed for load
+SHED_RETRY_AFTER = 5
+
+
+def route_class(path: str) -> tuple[str, int]:
+    for prefix, name, cost in ROUTE_CLASSES:
+        if path.startswith(prefix):
+            return name, cost
+    return DEFAULT_CLASS
+
+
+def client_id(scope) -> str:
+    """
+    Who a request comes from: the RapidAPI user when the request carries the
+    RapidAPI proxy secret, else the proxy's ``X-Real-IP``, else the peer.
+    """
+    headers = dict(scope["headers"])
+    secret = get_settings().rapidapi_proxy_secret
+    user = headers.get(b"x-rapidapi-user")
+    if secret and user and hmac.compare_digest(headers.get(b"x-rapidapi-proxy-secret", b""), secret.encode()):
+        return f"rapidapi:{user.decode('latin-1')}"
+    if b"x-real-ip" in headers:
+        return f"ip:{headers[b'x-real-ip'].decode('latin-1')}"
+    client = scope.get("client")
+    return f"ip:{client[0]}" if client else "unknown"
+
+
+class SlidingWindow:
+    """
+    Sliding-window counter: the previous fixed window's total, weighted by
+    how much of it still overlaps the sliding window, plus the current one.
+    """
+
+    __slots__ = ("start", "current", "previous")
+
+    def __init__(self, start: float):
+        self.start = start
+        self.current = 0.0
+        self.previous = 0.0
+
+    def used(self, now: float, window: float) -> float:
+        elapsed = now - self.start
+        if elapsed >= window:
+            # Roll forward; more than one idle window clears the history
+            self.previous = self.current if elapsed < 2 * window else 0.0
+            self.current = 0.0
+            self.start = now - elapsed % window
+            elapsed = now - self.start
+        return self.previous * (1 - elapsed / window) + self.current
+
+
+class RateLimiter:
+    """Per-client cost budgets with a bounded LRU of client windows."""
+
+    def __init__(self, limit: float, window: float, max_clients: int):
+        self.limit = limit
+        self.window = window
+        self.max_clients = max_clients
+        self.clients: OrderedDict[str, SlidingWindow] = OrderedDict()
+
+    def admit(self, client: str, cost: float, now: float) -> tuple[bool, float, float]:
+        """Charge ``cost`` if within budget: (admitted, remaining, retry after seconds)."""
+        state = self.clients.get(client)
+        if state is None:
+            if len(self.clients) >= self.max_clients:
+                self.clients.popitem(last=False)
+            state = self.clients[client] = SlidingWindow(now)
+        else:
+            self.clients.move_to_end(client)
+
+        used = state.used(now, self.window)
+        if used + cost <= self.limit:
+            state.current += cost
+            return True, self.limit - used - cost, 0.0
+
+        # The previous window's weight drains linearly over the current one
+        excess = used + cost - self.limit
+        if state.previous > 0:
+            retry_after = excess / state.previous * self.window
+        else:
+            retry_after = self.window - (now - state.start)
+        return False, max(self.limit - used, 0.0), min(retry_after, self.window)
+
+
+class AdmissionMiddleware:
+    """
+    Admission control in front of every route.
+
+    - Per-client rate limit in cost units per minute, where a route's cost
+      reflects how heavy it is. Clients are keyed by the proxy's
+      ``X-Real-IP``; ``X-RapidAPI-User`` is only trusted on requests that
+      carry the configured RapidAPI proxy secret.
+    - A concurrency cap per route class; requests wait up to
+      ``admission_queue_timeout`` for a slot, then get 503.
+    - Load shedding by event-loop lag: above ``shed_lag_threshold`` heavy and
+      medium requests are refused, above twice that everything is.
+
+    Rejections carry ``Retry-After``.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.settings = get_settings()
+        self.limiter = RateLimiter(
+            self.settings.rate_limit_per_minute,
+            60.0,
+            self.settings.rate_limit_max_clients,
+        )
+        self.slots = {
+            name: asyncio.Semaphore(limit)
+            for name, limit in self.settings.admission_concurrency.items()
+        }
+
+    async def _reject(self, send, status: int, detail: str, retry_after: float, extra: Optional[list] = None) -> None:
+        body = json.dumps({"detail": detail}).encode()
+        headers = [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+            (b"retry-after", str(max(1, math.ceil(retry_after))).encode()),
+        ] + (extra or [])
+        await send({"type": "http.response.start", "status": status, "headers": headers})
+        await send({"type": "http.response.body", "body": body})
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in EXEMPT_PATHS or scope["path"].startswith("/admin/"):
+            await self.app(scope, receive, send)
+            return
+
+        name, cost = route_class(scope["path"])
+        lag = metrics.loop_lag
+        threshold = self.settings.shed_lag_threshold
+        if threshold and (lag > 2 * threshold or (lag > threshold and name != "light")):
+            ADMISSION_REJECTIONS.labels("overload", name).inc()
+            await self._reject(send, 503, "Server overloaded, retry later", SHED_RETRY_AFTER)
+            return
+
+        limit_headers = []
+        if self.limiter.limit:
+            admitted, remaining, retry_after = self.limiter.admit(client_id(scope), cost, time.time())
+            limit_headers = [
+                (b"x-ratelimit-limit", str(int(self.limiter.limit)).encode()),
+                (b"x-ratelimit-remaining", str(int(remaining)).encode()),
+            ]
+            if not admitted:
+                ADMISSION_REJECTIONS.labels("rate_limit", name).inc()
+                await self._reject(send, 429, "Rate limit exceeded", retry_after, limit_headers)
+                return
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start" and limit_headers:
+                message["headers"] = list(message.get("headers", [])) + limit_headers
+            await send(message)
+
+        slots = self.slots.get(name)
+        if slots is None:
+            await self.app(scope, receive, send_wrapper)
+            return
+        try:
+            await asyncio.wait_for(slots.acquire(), self.settings.admission_queue_timeout)
+        except asyncio.TimeoutError:
+            ADMISSION_REJECTIONS.labels("concurrency", name).inc()
+            await self._reject(send, 503, f"Too many concurrent {name} requests, retry later", 1, limit_headers)
+            return
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            slots.release()
@@ -0,0 +1,207 @@
+import hashlib
+import zlib
+from collections import OrderedDict
+from typing import Optional
+from app.config import get_settings
+from app.metrics import CACHE_EVENTS
+
+try:
+    import brotli
+except ImportError:  # in requirements.txt; gzip still works without it
+    brotli = None
+
+try:
+    import zstandard
+except ImportError:  # in requirements.txt; gzip still works without it
+    zstandard = None
+
+COMPRESSIBLE_TYPES = (
+    "text/",
+    "application/json",
+    "application/x-ndjson",
+    "application/vnd.apache.arrow.stream",
+    "image/svg+xml",
+)
+
+
+class GzipEncoder:
+    name = "gzip"
+
+    def __init__(self):
+        self._z = zlib.compressobj(6, zlib.DEFLATED, 31)
+
+    def chunk(self, data: bytes) -> bytes:
+        return self._z.compress(data) + self._z.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self, data: bytes = b"") -> bytes:
+        return self._z.compress(data) + self._z.flush()
+
+
+class BrotliEncoder:
+    name = "br"
+
+    def __init__(self):
+        self._c = brotli.Compressor(quality=5)
+
+    def chunk(self, data: bytes) -> bytes:
+        return self._c.process(data) + self._c.flush()
+
+    def finish(self, data: bytes = b"") -> bytes:
+        return self._c.process(data) + self._c.finish()
+
+
+class ZstdEncoder:
+    name = "zstd"
+
+    def __init__(self):
+        self._c = zstandard.ZstdCompressor(level=3).compressobj()
+
+    def chunk(self, data: bytes) -> bytes:
+        return self._c.compress(data) + self._c.flush(zstandard.COMPRESSOBJ_FLUSH_BLOCK)
+
+    def finish(self, data: bytes = b"") -> bytes:
+        return self._c.compress(data) + self._c.flush()
+
+
+# Available encoders, most preferred first when the client rates them equally
+ENCODERS = {
+    encoder.name: encoder
+    for encoder, available in (
+        (ZstdEncoder, zstandard is not None),
+        (BrotliEncoder, brotli is not None),
+        (GzipEncoder, True),
+    )
+    if available
+}
+
+
+def negotiate_encoding(accept_encoding: str) -> Optional[str]:
+    """Pick the best available encoding for an Accept-Encoding header."""
+    weights = {}
+    for part in accept_encoding.split(","):
+        name, _, params = part.partition(";")
+        q = 1.0
+        for param in params.split(";"):
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        weights[name.strip().lower()] = q
+
+    best, best_q = None, 0.0
+    for name in ENCODERS:
+        q = weights.get(name, weights.get("*", 0.0))
+        if q > best_q:
+            best, best_q = name, q
+    return best
+
+
+class CompressedBodyCache:
+    """LRU of compressed bodies keyed by encoding and a hash of the original body."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._size = 0
+        self._data: OrderedDict[tuple[str, bytes], bytes] = OrderedDict()
+
+    def compress(self, encoding: str, body: bytes) -> bytes:
+        key = (encoding, hashlib.blake2b(body, digest_size=16).digest())
+        compressed = self._data.get(key)
+        if compressed is not None:
+            self._data.move_to_end(key)
+            CACHE_EVENTS.labels("compressed_body", "hit").inc()
+            return compressed
+
+        CACHE_EVENTS.labels("compressed_body", "miss").inc()
+        compressed = ENCODERS[encoding]().finish(body)
+        if len(compressed) <= self.max_bytes:
+            self._data[key] = compressed
+            self._size += len(compressed)
+            while self._size > self.max_bytes:
+                _, evicted = self._data.popitem(last=False)
+                self._size -= len(evicted)
+        return compressed
+
+
+class CompressionMiddleware:
+    """
+    Compress responses with the best encoding the client accepts.
+
+    zstd and brotli are used when their packages are installed, gzip
+    always. Complete bodies under ``compression_min_size`` bytes are sent
+    as is, and compressed bodies are kept in an LRU keyed by a hash of the
+    original, so responses served from cache are only compressed once.
+    Streamed responses are compressed chunk by chunk.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.settings = get_settings()
+        self.cache = CompressedBodyCache(self.settings.compression_cache_bytes)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        accept = ""
+        for name, value in scope["headers"]:
+            if name == b"accept-encoding":
+                accept = value.decode("latin-1")
+        encoding = negotiate_encoding(accept) if accept else None
+
+        held: Optional[dict] = None
+        encoder = None
+
+        async def send_wrapper(message):
+            nonlocal held, encoder
+            if message["type"] == "http.response.start":
+                headers = dict(message.get("headers", []))
+                content_type = headers.get(b"content-type", b"").decode("latin-1")
+                if (
+                    b"content-encoding" not in headers
+                    and message["status"] not in (204, 304)
+                    and content_type.startswith(COMPRESSIBLE_TYPES)
+                ):
+                    # Hold the start until the first body chunk shows the response size
+                    held = message
+                    return
+                await send(message)
+                return
+
+            if message["type"] != "http.response.body":
+                await send(message)
+                return
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+            if encoder is not None:
+                data = encoder.chunk(body) if more_body else encoder.finish(body)
+                await send({"type": "http.response.body", "body": data, "more_body": more_body})
+                return
+            if held is None:
+                await send(message)
+                return
+
+            start, held = held, None
+            if encoding is None or (not more_body and len(body) < self.settings.compression_min_size):
+                await send({**start, "headers": list(start.get("headers", [])) + [(b"vary", b"Accept-Encoding")]})
+                await send(message)
+                return
+
+            headers = [(k, v) for k, v in start.get("headers", []) if k != b"content-length"]
+            headers.append((b"vary", b"Accept-Encoding"))
+            if not more_body:
+                compressed = self.cache.compress(encoding, body)
+                headers += [(b"content-encoding", encoding.encode()), (b"content-length", str(len(compressed)).encode())]
+                await send({**start, "headers": headers})
+                await send({"type": "http.response.body", "body": compressed})
+            else:
+                encoder = ENCODERS[encoding]()
+                headers.append((b"content-encoding", encoding.encode()))
+                await send({**start, "headers": headers})
+                await send({"type": "http.response.body", "body": encoder.chunk(body), "more_body": True})
+
+        await self.app(scope, receive, send_wrapper)
@@ -0,0 +1,50 @@
+import time
+from app.metrics import REQUEST_LATENCY
+
+
+def route_template(scope) -> str:
+    """Route template (``/price/{symbol}``) of a matched request."""
+    route = scope.get("route")
+    if route is None:
+        return "unmatched"
+    # Newer FastAPI keeps included routes unprefixed and records the full
+    # path on the effective route context instead
+    context = scope.get("fastapi", {}).get("effective_route_context")
+    return getattr(context, "path", None) or route.path
+
+
+class MetricsMiddleware:
+    """
+    Record per-route latency histograms.
+
+    Plain ASGI middleware (no BaseHTTPMiddleware) so the cost per request is
+    two clock reads and one histogram observation. Requests are labelled by
+    route template (``/price/{symbol}``), not raw path, to keep cardinality
+    bounded.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+        start = time.perf_counter()
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            REQUEST_LATENCY.labels(
+                scope["method"],
+                route_template(scope),
+                status,
+            ).observe(time.perf_counter() - start)
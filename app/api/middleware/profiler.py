@@ -0,0 +1,57 @@
+import random
+from app.config import get_settings
+from app.services.http import add_upstream_hook
+from app.services.profiler import current_profile, profiler_service, record_upstream, verify_token
+from app.api.middleware.metrics import route_template
+
+PROFILE_HEADER = b"x-profile"
+
+
+class ProfilerMiddleware:
+    """
+    Profile requests that carry a valid signed ``X-Profile`` token, plus a
+    random ``profiler_sample_rate`` fraction of all requests.
+
+    Only installed when profiling is configured, so it costs nothing
+    otherwise. Profiled responses carry an ``X-Profile-Id`` header naming
+    the profile to download from ``/admin/profiles``.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.sample_rate = get_settings().profiler_sample_rate
+        add_upstream_hook(record_upstream)
+
+    def _trigger(self, scope) -> str:
+        for name, value in scope["headers"]:
+            if name == PROFILE_HEADER:
+                return "header" if verify_token(value.decode("latin-1")) else ""
+        if self.sample_rate and random.random() < self.sample_rate:
+            return "sampled"
+        return ""
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"].startswith("/admin/"):
+            await self.app(scope, receive, send)
+            return
+        trigger = self._trigger(scope)
+        if not trigger:
+            await self.app(scope, receive, send)
+            return
+
+        profile = profiler_service.start(scope["method"], scope["path"], trigger)
+        token = current_profile.set(profile)
+        status = None
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                message["headers"] = list(message.get("headers", [])) + [(b"x-profile-id", profile.id.encode())]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            current_profile.reset(token)
+            profiler_service.stop(profile, status, route_template(scope))
@@ -0,0 +1,43 @@
+from fastapi import APIRouter, Depends, Header, HTTPException, Query
+from fastapi.responses import JSONResponse, PlainTextResponse
+from typing import Literal, Optional
+from app.services.profiler import profiler_service, verify_token
+
+router = APIRouter()
+
+
+def require_token(x_profile: Optional[str] = Header(default=None)) -> None:
+    if not verify_token(x_profile):
+        raise HTTPException(status_code=403, detail="Valid X-Profile token required")
+
+
+@router.get("/profiles", dependencies=[Depends(require_token)])
+async def list_profiles():
+    """List captured request profiles, newest first."""
+    return {"profiles": [profile.summary() for profile in reversed(profiler_service.profiles)]}
+
+
+@router.get("/profiles/{profile_id}", dependencies=[Depends(require_token)])
+async def get_profile(
+    profile_id: str,
+    format: Literal["json", "speedscope", "collapsed"] = Query(default="json"),
+):
+    """
+    Download one profile.
+
+    - **format**: `json` (summary and upstream call timings), `speedscope`
+      (open at https://www.speedscope.app) or `collapsed` (stack counts for
+      flamegraph.pl)
+    """
+    profile = profiler_service.get(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail=f"Profile '{profile_id}' not found")
+
+    if format == "collapsed":
+        return PlainTextResponse(profile.collapsed())
+    if format == "speedscope":
+        return JSONResponse(
+            profile.speedscope(),
+            headers={"Content-Disposition": f'attachment; filename="{profile_id}.speedscope.json"'},
+        )
+    return profile.summary()
@@ -0,0 +1,121 @@
+import secrets
+from fastapi import APIRouter, Depends, Header, HTTPException, Query, Request
+from datetime import datetime, timezone
+from typing import Optional
+from app.api.middleware.admission import client_id
+from app.models.schemas import AlertCreate, AlertListResponse, AlertResponse
+from app.services.alerts import AlertLimitReached, AlertRule, alert_engine, owner_id, webhook_allowed
+from app.services.timeseries import WINDOW_UNITS, window_seconds
+
+router = APIRouter()
+
+MAX_ALERT_WINDOW = 86400
+
+
+def format_window(seconds: int) -> Optional[str]:
+    for unit, size in sorted(WINDOW_UNITS.items(), key=lambda item: -item[1]):
+        if seconds and seconds % size == 0:
+            return f"{seconds // size}{unit}"
+    return None
+
+
+def require_key(x_alert_key: Optional[str] = Header(default=None)) -> str:
+    if not x_alert_key:
+        raise HTTPException(status_code=401, detail="X-Alert-Key header required")
+    return owner_id(x_alert_key)
+
+
+def alert_response(rule: AlertRule, alert_key: Optional[str] = None) -> AlertResponse:
+    return AlertResponse(
+        id=rule.id,
+        symbol=rule.symbol,
+        condition=rule.condition,
+        threshold=rule.threshold,
+        window=format_window(rule.window),
+        webhook_url=rule.webhook_url,
+        repeat=rule.repeat,
+        created_at=datetime.fromtimestamp(rule.created_at, timezone.utc),
+        fired_at=datetime.fromtimestamp(rule.fired_at, timezone.utc) if rule.fired_at else None,
+        alert_key=alert_key,
+    )
+
+
+@router.post("", response_model=AlertResponse, status_code=201)
+async def create_alert(request: Request, alert: AlertCreate, x_alert_key: Optional[str] = Header(default=None)):
+    """
+    Register a price alert delivered to a webhook.
+
+    Alerts belong to the `X-Alert-Key` they were created with, and only that
+    key can list, read or delete them. Without the header a new key is
+    generated and returned once as `alert_key`.
+
+    - **symbol**: Coin symbol (e.g., "btc")
+    - **condition**: `above` / `below` (price crosses `threshold` USD) or
+      `change` (price moves `threshold` percent either way within `window`)
+    - **window**: For `change` rules, e.g. "5m", "1h", "24h"
+    - **webhook_url**: Receives a POST of `{"alerts": [...]}`; events for the
+      same URL may be batched
+    - **repeat**: Fire on every crossing (with a cooldown) instead of once
+
+    Rules are checked against every Binance all-market ticker refresh. Each
+    client may hold a limited number of alerts, whatever keys it uses.
+    """
+    if not await webhook_allowed(alert.webhook_url):
+        raise HTTPException(status_code=400, detail="webhook_url must be an http(s) URL on a public host")
+    if alert.threshold <= 0:
+        raise HTTPException(status_code=400, detail="threshold must be positive")
+
+    window = 0
+    if alert.condition == "change":
+        try:
+            window = window_seconds(alert.window or "")
+        except ValueError:
+            raise HTTPException(status_code=400, detail="change alerts need a window such as 5m, 1h or 24h")
+        if not 0 < window <= MAX_ALERT_WINDOW:
+            raise HTTPException(status_code=400, detail="window must be between 1m and 24h")
+
+    alert_key = x_alert_key or secrets.token_urlsafe(24)
+    try:
+        rule = await alert_engine.add(
+            owner_id(alert_key),
+            owner_id(client_id(request.scope)),
+            alert.symbol,
+            alert.condition,
+            alert.threshold,
+            alert.webhook_url,
+            window=window,
+            repeat=alert.repeat,
+        )
+    except AlertLimitReached as e:
+        raise HTTPException(status_code=429 if e.per_client else 503, detail=str(e))
+    return alert_response(rule, None if x_alert_key else alert_key)
+
+
+@router.get("", response_model=AlertListResponse)
+async def list_alerts(
+    symbol: Optional[str] = Query(default=None, description="Only alerts for this symbol"),
+    owner: str = Depends(require_key),
+):
+    """
+    List the alerts registered with your `X-Alert-Key`.
+
+    - **symbol**: Optional symbol filter
+    """
+    rules = await alert_engine.list_rules(owner, symbol)
+    return AlertListResponse(count=len(rules), alerts=[alert_response(rule) for rule in rules])
+
+
+@router.get("/{alert_id}", response_model=AlertResponse)
+async def get_alert(alert_id: str, owner: str = Depends(require_key)):
+    """Get one of your alerts by ID."""
+    rule = await alert_engine.get(owner, alert_id)
+    if rule is None:
+        raise HTTPException(status_code=404, detail=f"Alert '{alert_id}' not found")
+    return alert_response(rule)
+
+
+@router.delete("/{alert_id}", status_code=204)
+async def delete_alert(alert_id: str, owner: str = Depends(require_key)):
+    """Delete one of your alerts."""
+    if not await alert_engine.remove(owner, alert_id):
+        raise HTTPException(status_code=404, detail=f"Alert '{alert_id}' not found")
@@ -1,13 +1,174 @@
 from fastapi import APIRouter, HTTPException, Query
-from fastapi.responses import StreamingResponse
-from typing import Optional
+from fastapi.responses import Response
+from starlette.concurrency import run_in_threadpool
+from typing import Literal, Optional
+from PIL import Image, ImageDraw
+import matplotlib
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt
 import mplfinance as mpf
+import numpy as np
 import pandas as pd
+import asyncio
 import io
-from app.services.coingecko import coingecko_service
-from app.services.coinmarketcap import coinmarketcap_service
+import json
+import threading
+import time
+from app.config import get_settings
+from app.services.ohlc import ohlc_service
+from app.services.trending import trending_service
+from app.metrics import CHART_RENDER
+from app.cache import get_cache
 
 router = APIRouter()
+settings = get_settings()
+
+# Rendered charts are shared between workers for this long (seconds)
+CHART_TTL = 300
+
+MAX_SPARKLINES = 100
+SPARKLINE_UP = (22, 199, 132)
+SPARKLINE_DOWN = (234, 57, 67)
+# PNG sparklines are drawn at this scale and downsampled for anti-aliasing,
+# for sprites up to SUPERSAMPLE_MAX_PIXELS; larger ones are drawn at 1x
+SUPERSAMPLE = 3
+SUPERSAMPLE_MAX_PIXELS = 500_000
+# Largest sprite (width x height x symbols) a request may ask for
+MAX_SPRITE_PIXELS = 2_000_000
+
+# Candlesticks render in the thread pool; pyplot's figure registry is not
+# thread-safe, so renders take turns
+RENDER_LOCK = threading.Lock()
+
+
+def sparkline_points(closes: list[float], x: float, y: float, width: float, height: float, pad: float) -> list[tuple[float, float]]:
+    """Scale closes into a width x height cell at (x, y), highest price at the top."""
+    values = np.asarray(closes, dtype=np.float64)
+    low, high = values.min(), values.max()
+    scale = (height - 2 * pad) / (high - low) if high > low else 0.0
+    xs = x + np.linspace(0, width, len(values)) if len(values) > 1 else np.full(1, x + width / 2)
+    ys = y + height - pad - (values - low) * scale if scale else np.full(len(values), y + height / 2)
+    return list(zip(xs.tolist(), ys.tolist()))
+
+
+def render_candlestick_png(df: pd.DataFrame, chart_style, title: str, width: int, height: int) -> bytes:
+    buf = io.BytesIO()
+    with RENDER_LOCK:
+        fig, axes = mpf.plot(
+            df,
+            type='candle',
+            style=chart_style,
+            title=title,
+            ylabel='Price (USD)',
+            figsize=(width/100, height/100),
+            returnfig=True,
+        )
+        try:
+            fig.savefig(buf, format='png', dpi=100, bbox_inches='tight', facecolor=fig.get_facecolor())
+        finally:
+            plt.close(fig)
+    return buf.getvalue()
+
+
+def closes_by_date(columns: dict) -> list[float]:
+    """Closes oldest first; cryptoCMD history arrives newest first."""
+    order = np.argsort(pd.to_datetime(columns["date"]).values, kind="stable")
+    closes = columns["close"]
+    return [closes[i] for i in order if closes[i] is not None]
+
+
+def render_sprite_png(series: list[tuple[str, list[float]]], width: int, height: int) -> bytes:
+    scale = SUPERSAMPLE if width * height * len(series) <= SUPERSAMPLE_MAX_PIXELS else 1
+    image = Image.new("RGBA", (width * scale, height * scale * len(series)), (0, 0, 0, 0))
+    draw = ImageDraw.Draw(image)
+    for i, (_, closes) in enumerate(series):
+        color = SPARKLINE_UP if closes[-1] >= closes[0] else SPARKLINE_DOWN
+        points = sparkline_points(closes, 0, i * height * scale, width * scale, height * scale, 2 * scale)
+        draw.line(points, fill=color, width=max(scale * 3 // 2, 1), joint="curve")
+    if scale > 1:
+        image = image.reduce(scale)
+    buf = io.BytesIO()
+    image.save(buf, format="png")
+    return buf.getvalue()
+
+
+def render_sprite_svg(series: list[tuple[str, list[float]]], width: int, height: int) -> bytes:
+    total = height * len(series)
+    parts = [f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{total}" viewBox="0 0 {width} {total}">']
+    for i, (symbol, closes) in enumerate(series):
+        color = "#%02x%02x%02x" % (SPARKLINE_UP if closes[-1] >= closes[0] else SPARKLINE_DOWN)
+        points = sparkline_points(closes, 0, i * height, width, height, 2)
+        path = "M" + "L".join(f"{px:.1f},{py:.1f}" for px, py in points)
+        parts.append(f'<path id="spark-{symbol.lower()}" d="{path}" fill="none" stroke="{color}" stroke-width="1.5"/>')
+    parts.append("</svg>")
+    return "".join(parts).encode()
+
+
+@router.get("/sparklines")
+async def get_sparklines(
+    symbols: str = Query(..., description="Comma-separated coin symbols or IDs (max 100)"),
+    days: int = Query(default=7, ge=1, le=365, description="Number of days of history"),
+    format: Literal["png", "svg"] = Query(default="png", description="png sprite or svg"),
+    width: int = Query(default=120, ge=40, le=400, description="Width of each sparkline in pixels"),
+    height: int = Query(default=40, ge=16, le=200, description="Height of each sparkline in pixels"),
+):
+    """
+    Render many small price charts in one image.
+
+    - **symbols**: Comma-separated list, e.g. "btc,eth,sol"
+    - **days**: Number of days of closes per chart (default: 7)
+    - **format**: `png` (one sprite, charts stacked vertically) or `svg`
+      (one path per coin, with id `spark-{symbol}`)
+    - **width** / **height**: Size of each chart; the whole sprite is
+      limited to 2 million pixels
+
+    The `X-Sprite-Map` response header maps each symbol to its
+    `[x, y, width, height]` in the image; symbols without data, or whose
+    history could not be fetched, are left out and listed in `X-Sprite-Missing`.
+    """
+    names = list(dict.fromkeys(s.strip().lower() for s in symbols.split(",") if s.strip()))
+    if not names:
+        raise HTTPException(status_code=400, detail="No symbols given")
+    if len(names) > MAX_SPARKLINES:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_SPARKLINES} symbols per request")
+    if width * height * len(names) > MAX_SPRITE_PIXELS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Sprite too large: width x height x symbols must be at most {MAX_SPRITE_PIXELS}",
+        )
+
+    semaphore = asyncio.Semaphore(settings.bulk_history_concurrency)
+
+    async def fetch(symbol: str) -> Optional[dict]:
+        async with semaphore:
+            return await ohlc_service.get_columns(symbol, days, route="chart")
+
+    results = await asyncio.gather(*(fetch(symbol) for symbol in names), return_exceptions=True)
+    series, missing = [], []
+    for symbol, columns in zip(names, results):
+        if isinstance(columns, Exception):
+            print(f"Sparkline history for '{symbol}' failed: {columns}")
+            columns = None
+        closes = closes_by_date(columns) if columns else []
+        if closes:
+            series.append((symbol.upper(), closes))
+        else:
+            missing.append(symbol.upper())
+    if not series:
+        raise HTTPException(status_code=404, detail="No historical data for any of the requested symbols")
+
+    render_start = time.perf_counter()
+    if format == "svg":
+        image, media_type = await run_in_threadpool(render_sprite_svg, series, width, height), "image/svg+xml"
+    else:
+        image, media_type = await run_in_threadpool(render_sprite_png, series, width, height), "image/png"
+    CHART_RENDER.labels(f"sparklines_{format}").observe(time.perf_counter() - render_start)
+
+    sprite_map = {symbol: [0, i * height, width, height] for i, (symbol, _) in enumerate(series)}
+    headers = {"X-Sprite-Map": json.dumps(sprite_map, separators=(",", ":"))}
+    if missing:
+        headers["X-Sprite-Missing"] = ",".join(missing)
+    return Response(image, media_type=media_type, headers=headers)
 
 
 @router.get("/{symbol}")
@@ -29,42 +190,34 @@ async def get_candlestick_chart(
 
     Returns a PNG image of the candlestick chart.
     """
-    # Get coin ID
-    coin_id = symbol.lower()
-    if len(symbol) <= 5:
-        found_id = await coingecko_service.search_coin(symbol)
-        if found_id:
-            coin_id = found_id
-
-    # Fetch historical data
-    data = await coingecko_service.get_historical_data(coin_id=coin_id, days=days)
-
-    if not data:
-        data = coinmarketcap_service.get_historical_data(
-            coin_code=symbol,
-            days=days,
-        )
+    headers = {
+        "Content-Disposition": f"inline; filename={symbol.lower()}_chart.png"
+    }
+    cache = get_cache()
+    cache_key = f"chart:{symbol.lower()}:{days}:{style}:{width}x{height}"
+    cached = await cache.get_bytes(cache_key, "chart")
+    if cached is not None:
+        trending_service.record(symbol)
+        return Response(cached, media_type="image/png", headers=headers)
+
+    # Fetch historical data (CoinGecko, cryptoCMD fallback)
+    columns = await ohlc_service.get_columns(symbol, days, route="chart")
 
-    if not data:
+    if not columns:
         raise HTTPException(
             status_code=404,
             detail=f"Historical data for '{symbol}' not found",
         )
+    trending_service.record(symbol)
 
     # Convert to DataFrame for mplfinance
-    df = pd.DataFrame(data)
-    df['date'] = pd.to_datetime(df['date'])
-    df.set_index('date', inplace=True)
-    df = df.rename(columns={
-        'open': 'Open',
-        'high': 'High',
-        'low': 'Low',
-        'close': 'Close',
-        'volume': 'Volume'
-    })
-
-    # Select only required columns
-    df = df[['Open', 'High', 'Low', 'Close']]
+    df = pd.DataFrame({
+        'Open': columns['open'],
+        'High': columns['high'],
+        'Low': columns['low'],
+        'Close': columns['close'],
+    }, index=pd.to_datetime(columns['date']))
+
     df = df.sort_index()
 
     # Define custom styles
@@ -93,26 +246,18 @@ async def get_candlestick_chart(
 
     chart_style = styles.get(style, styles['nightclouds'])
 
-    # Generate chart to bytes buffer
-    buf = io.BytesIO()
-
-    fig, axes = mpf.plot(
+    # Render off the event loop so a slow chart does not hold up other requests
+    render_start = time.perf_counter()
+    image = await run_in_threadpool(
+        render_candlestick_png,
         df,
-        type='candle',
-        style=chart_style,
-        title=f'{symbol.upper()} - {days} Day Candlestick Chart',
-        ylabel='Price (USD)',
-        figsize=(width/100, height/100),
-        returnfig=True,
+        chart_style,
+        f'{symbol.upper()} - {days} Day Candlestick Chart',
+        width,
+        height,
     )
+    CHART_RENDER.labels("candlestick").observe(time.perf_counter() - render_start)
 
-    fig.savefig(buf, format='png', dpi=100, bbox_inches='tight', facecolor=fig.get_facecolor())
-    buf.seek(0)
+    await cache.set(cache_key, image, ttl=CHART_TTL)
 
-    return StreamingResponse(
-        buf,
-        media_type="image/png",
-        headers={
-            "Content-Disposition": f"inline; filename={symbol.lower()}_chart.png"
-        }
-    )
+    return Response(image, media_type="image/png", headers=headers)
@@ -0,0 +1,49 @@
+from fastapi import APIRouter, HTTPException, Query
+from typing import Optional
+from app.config import get_settings
+from app.models.schemas import CompareResponse
+from app.services.compare import compare_service
+
+router = APIRouter()
+settings = get_settings()
+
+MAX_EXCHANGES = 20
+
+
+@router.get("/{symbol}", response_model=CompareResponse)
+async def compare_exchanges(
+    symbol: str,
+    exchanges: Optional[str] = Query(default=None, description="Comma-separated exchange IDs (default: configured set)"),
+):
+    """
+    Compare one coin's price across exchanges.
+
+    - **symbol**: Coin symbol or CoinGecko ID (e.g., "btc", "ethereum")
+    - **exchanges**: Exchange IDs to query, e.g. "binance,gdax,kraken"
+      (CoinGecko IDs: Coinbase is "gdax", OKX "okex", Bybit "bybit_spot")
+
+    Binance is read from the all-market ticker snapshot; other exchanges are
+    queried concurrently and those that do not answer within the deadline are
+    listed in `timed_out`. Returns each venue's most liquid USD pair, the
+    best bid and ask across venues, the spread between them (`crossed` when
+    the best bid is above the best ask) and the volume-weighted average price.
+    """
+    if exchanges:
+        requested = list(dict.fromkeys(e.strip().lower() for e in exchanges.split(",") if e.strip()))
+    else:
+        requested = settings.compare_exchanges
+    if not requested or len(requested) > MAX_EXCHANGES:
+        raise HTTPException(status_code=400, detail=f"Provide between 1 and {MAX_EXCHANGES} exchanges")
+
+    try:
+        resolved = await compare_service.resolve(symbol)
+    except Exception as e:
+        raise HTTPException(status_code=503, detail="Unable to resolve symbol")
+    if resolved is None:
+        raise HTTPException(status_code=404, detail=f"Coin '{symbol}' not found")
+
+    coin_id, ticker_symbol = resolved
+    result = await compare_service.compare(ticker_symbol, coin_id, requested)
+    if not result["venues"]:
+        raise HTTPException(status_code=503, detail=f"No exchange prices available for '{symbol}'")
+    return CompareResponse(**result)
@@ -1,8 +1,43 @@
 from fastapi import APIRouter, Query, HTTPException
 from typing import Optional
-import httpx
+from app.config import get_settings
+from app.services.http import upstream_client
+from app.services.coingecko import coingecko_service
+from app.api.formats import parse_fields
 
 router = APIRouter()
+settings = get_settings()
+
+# Response field -> how it is read from the upstream payload; only the
+# fields a request selects are built
+EXCHANGE_FIELDS = {
+    "id": lambda ex: ex.get("id"),
+    "name": lambda ex: ex.get("name"),
+    "country": lambda ex: ex.get("country"),
+    "description": lambda ex: ex.get("description"),
+    "trust_score": lambda ex: ex.get("trust_score"),
+    "trust_rank": lambda ex: ex.get("trust_score_rank"),
+    "volume_24h_btc": lambda ex: ex.get("trade_volume_24h_btc"),
+    "year_established": lambda ex: ex.get("year_established"),
+    "url": lambda ex: ex.get("url"),
+    "image": lambda ex: ex.get("image"),
+    "facebook_url": lambda ex: ex.get("facebook_url"),
+    "twitter_handle": lambda ex: ex.get("twitter_handle"),
+    "telegram_url": lambda ex: ex.get("telegram_url"),
+    "slack_url": lambda ex: ex.get("slack_url"),
+    "has_trading_incentive": lambda ex: ex.get("has_trading_incentive"),
+    "tickers_count": lambda ex: len(ex.get("tickers", [])),
+}
+# Response field -> key in the cached ticker rows
+TICKER_FIELDS = {
+    "base": "base",
+    "target": "target",
+    "last_price": "last",
+    "volume": "volume",
+    "spread": "spread",
+    "trade_url": "trade_url",
+    "trust_score": "trust_score",
+}
 
 
 @router.get("/list")
@@ -15,10 +50,11 @@ async def get_exchanges(
     - **limit**: Number of exchanges to return (1-100)
     """
     try:
-        async with httpx.AsyncClient(timeout=15.0) as client:
+        async with upstream_client() as client:
             response = await client.get(
-                "https://api.coingecko.com/api/v3/exchanges",
-                params={"per_page": limit}
+                f"{settings.coingecko_base_url}/exchanges",
+                params={"per_page": limit},
+                timeout=15.0,
             )
 
             if response.status_code == 200:
@@ -47,38 +83,27 @@ async def get_exchanges(
 
 
 @router.get("/{exchange_id}")
-async def get_exchange_details(exchange_id: str):
+async def get_exchange_details(
+    exchange_id: str,
+    fields: Optional[str] = Query(default=None, description="Comma-separated fields to return, e.g. name,trust_score"),
+):
     """
     Get detailed information about a specific exchange.
 
     - **exchange_id**: Exchange ID (e.g., "binance", "coinbase")
+    - **fields**: Only return these fields
     """
+    selected = parse_fields(fields, EXCHANGE_FIELDS)
     try:
-        async with httpx.AsyncClient(timeout=15.0) as client:
+        async with upstream_client() as client:
             response = await client.get(
-                f"https://api.coingecko.com/api/v3/exchanges/{exchange_id}"
+                f"{settings.coingecko_base_url}/exchanges/{exchange_id}",
+                timeout=15.0,
             )
 
             if response.status_code == 200:
                 ex = response.json()
-                return {
-                    "id": ex.get("id"),
-                    "name": ex.get("name"),
-                    "country": ex.get("country"),
-                    "description": ex.get("description"),
-                    "trust_score": ex.get("trust_score"),
-                    "trust_rank": ex.get("trust_score_rank"),
-                    "volume_24h_btc": ex.get("trade_volume_24h_btc"),
-                    "year_established": ex.get("year_established"),
-                    "url": ex.get("url"),
-                    "image": ex.get("image"),
-                    "facebook_url": ex.get("facebook_url"),
-                    "twitter_handle": ex.get("twitter_handle"),
-                    "telegram_url": ex.get("telegram_url"),
-                    "slack_url": ex.get("slack_url"),
-                    "has_trading_incentive": ex.get("has_trading_incentive"),
-                    "tickers_count": len(ex.get("tickers", [])),
-                }
+                return {name: EXCHANGE_FIELDS[name](ex) for name in selected or EXCHANGE_FIELDS}
             elif response.status_code == 404:
                 raise HTTPException(status_code=404, detail=f"Exchange '{exchange_id}' not found")
     except HTTPException:
@@ -91,42 +116,33 @@ async def get_exchange_details(exchange_id: str):
 async def get_exchange_tickers(
     exchange_id: str,
     limit: int = Query(default=50, ge=1, le=100, description="Number of trading pairs"),
+    fields: Optional[str] = Query(default=None, description="Comma-separated ticker fields to return, e.g. base,target,last_price"),
 ):
     """
     Get trading pairs (tickers) for a specific exchange.
 
     - **exchange_id**: Exchange ID (e.g., "binance")
     - **limit**: Number of trading pairs to return
+    - **fields**: Only return these ticker fields
+
+    Cached for a minute; frequently requested exchanges are refreshed in the
+    background.
     """
+    selected = parse_fields(fields, TICKER_FIELDS)
     try:
-        async with httpx.AsyncClient(timeout=15.0) as client:
-            response = await client.get(
-                f"https://api.coingecko.com/api/v3/exchanges/{exchange_id}/tickers",
-                params={"page": 1}
-            )
-
-            if response.status_code == 200:
-                data = response.json()
-                tickers = data.get("tickers", [])[:limit]
-                return {
-                    "exchange": exchange_id,
-                    "count": len(tickers),
-                    "tickers": [
-                        {
-                            "base": t.get("base"),
-                            "target": t.get("target"),
-                            "last_price": t.get("last"),
-                            "volume": t.get("volume"),
-                            "spread": t.get("bid_ask_spread_percentage"),
-                            "trade_url": t.get("trade_url"),
-                            "trust_score": t.get("trust_score"),
-                        }
-                        for t in tickers
-                    ]
-                }
-            elif response.status_code == 404:
-                raise HTTPException(status_code=404, detail=f"Exchange '{exchange_id}' not found")
-    except HTTPException:
-        raise
+        tickers = await coingecko_service.get_exchange_tickers(exchange_id)
     except Exception as e:
         raise HTTPException(status_code=503, detail="Unable to fetch tickers")
+
+    if tickers is None:
+        raise HTTPException(status_code=404, detail=f"Exchange '{exchange_id}' not found")
+    tickers = tickers[:limit]
+    wanted = selected or TICKER_FIELDS
+    return {
+        "exchange": exchange_id,
+        "count": len(tickers),
+        "tickers": [
+            {name: t[TICKER_FIELDS[name]] for name in wanted}
+            for t in tickers
+        ]
+    }
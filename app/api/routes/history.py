@@ -1,17 +1,103 @@
-from fastapi import APIRouter, HTTPException, Query
-from typing import Optional
+import asyncio
+import json
+from fastapi import APIRouter, HTTPException, Query, Request
+from fastapi.responses import JSONResponse, Response, StreamingResponse
+from typing import Literal, Optional
+from app.config import get_settings
 from app.models.schemas import HistoryResponse, HistoricalDataPoint
-from app.services.coingecko import coingecko_service
-from app.services.coinmarketcap import coinmarketcap_service
+from app.services.coingecko import OHLC_COLUMNS
+from app.services.ohlc import columns_to_rows, ohlc_service
+from app.services.trending import trending_service
+from app.api.formats import MEDIA_TYPES, ArrowStreamEncoder, csv_header, csv_lines, ndjson_rows, negotiate_format, parse_fields
 
 router = APIRouter()
+settings = get_settings()
+
+MAX_BULK_SYMBOLS = 200
+
+FormatParam = Optional[Literal["json", "arrow", "csv", "ndjson"]]
+
+
+@router.get("/bulk")
+async def get_history_bulk(
+    symbols: str = Query(..., description="Comma-separated coin symbols or IDs (max 200)"),
+    days: int = Query(default=30, ge=1, le=365, description="Number of days of history"),
+    format: FormatParam = Query(default=None, description="ndjson (default), csv or arrow"),
+):
+    """
+    Get historical OHLC data for many coins in one streamed response.
+
+    - **symbols**: Comma-separated list, e.g. "btc,eth,sol"
+    - **days**: Number of days of history (1-365, default: 30)
+    - **format**: `ndjson` (one line per symbol with columnar data), `csv`
+      (rows with a leading symbol column) or `arrow` (IPC stream, one record
+      batch per symbol)
+
+    Symbols are fetched with bounded concurrency and written out in the order
+    they complete. Symbols with no data ("not found") or whose fetch failed
+    ("unavailable") are reported as an error line in NDJSON and skipped in
+    the other formats.
+    """
+    names = list(dict.fromkeys(s.strip() for s in symbols.split(",") if s.strip()))
+    if not names:
+        raise HTTPException(status_code=400, detail="No symbols given")
+    if len(names) > MAX_BULK_SYMBOLS:
+        raise HTTPException(status_code=400, detail=f"At most {MAX_BULK_SYMBOLS} symbols per request")
+
+    format = format or "ndjson"
+    if format == "json":
+        raise HTTPException(status_code=400, detail="Bulk history supports ndjson, csv or arrow")
+    semaphore = asyncio.Semaphore(settings.bulk_history_concurrency)
+
+    async def fetch(symbol: str):
+        try:
+            async with semaphore:
+                columns = await ohlc_service.get_columns(symbol, days)
+        except Exception as e:
+            # One failing symbol must not end the stream for the others
+            print(f"Bulk history for '{symbol}' failed: {e}")
+            return symbol, None, "unavailable"
+        return symbol, columns, None if columns else "not found"
+
+    async def stream():
+        encoder = ArrowStreamEncoder() if format == "arrow" else None
+        if encoder:
+            yield encoder.begin()
+        elif format == "csv":
+            yield csv_header(with_symbol=True)
+
+        tasks = [asyncio.create_task(fetch(symbol)) for symbol in names]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                symbol, columns, error = await next_done
+                symbol = symbol.upper()
+                if format == "ndjson":
+                    line = {"symbol": symbol, "days": days, "data": columns} if columns else {"symbol": symbol, "error": error}
+                    yield json.dumps(line, separators=(",", ":")) + "\n"
+                elif columns is None:
+                    continue
+                elif encoder:
+                    yield encoder.batch(symbol, columns)
+                else:
+                    for chunk in csv_lines(columns, symbol=symbol, header=False):
+                        yield chunk
+            if encoder:
+                yield encoder.end()
+        finally:
+            for task in tasks:
+                task.cancel()
+
+    return StreamingResponse(stream(), media_type=MEDIA_TYPES[format])
 
 
 @router.get("/{symbol}", response_model=HistoryResponse)
 async def get_history(
+    request: Request,
     symbol: str,
     days: int = Query(default=30, ge=1, le=365, description="Number of days of history"),
     coin_name: Optional[str] = Query(default=None, description="Coin name for disambiguation"),
+    format: FormatParam = Query(default=None, description="json, arrow, csv or ndjson (overrides Accept)"),
+    fields: Optional[str] = Query(default=None, description="Comma-separated columns to return, e.g. date,close"),
 ):
     """
     Get historical OHLC data for a cryptocurrency.
@@ -19,34 +105,39 @@ async def get_history(
     - **symbol**: Coin symbol or ID (e.g., "bitcoin", "ethereum", "btc")
     - **days**: Number of days of history (1-365, default: 30)
     - **coin_name**: Optional coin name for disambiguation (e.g., "solana" for SOL)
+    - **format**: Output format. Also negotiable with the Accept header:
+      `application/vnd.apache.arrow.stream`, `text/csv`, `application/x-ndjson`
+    - **fields**: Only return these columns (json, csv and ndjson; Arrow
+      always carries every column)
     """
-    # Try CoinGecko first (more reliable API)
-    coin_id = symbol.lower()
-
-    # If symbol is short (like BTC), search for the full ID
-    if len(symbol) <= 5:
-        found_id = await coingecko_service.search_coin(symbol)
-        if found_id:
-            coin_id = found_id
-
-    data = await coingecko_service.get_historical_data(coin_id=coin_id, days=days)
-
-    # Fallback to cryptoCMD if CoinGecko fails
-    if not data:
-        data = coinmarketcap_service.get_historical_data(
-            coin_code=symbol,
-            days=days,
-            coin_name=coin_name,
-        )
+    output = negotiate_format(request, format)
+    selected = parse_fields(fields, OHLC_COLUMNS)
+    names = selected or OHLC_COLUMNS
 
-    if not data:
+    # CoinGecko first (more reliable API), cryptoCMD as fallback
+    columns = await ohlc_service.get_columns(symbol, days, coin_name=coin_name)
+
+    if not columns:
         raise HTTPException(
             status_code=404,
             detail=f"Historical data for '{symbol}' not found or unavailable",
         )
+    trending_service.record(symbol)
+
+    if output == "arrow":
+        encoder = ArrowStreamEncoder()
+        body = encoder.begin() + encoder.batch(symbol.upper(), columns) + encoder.end()
+        return Response(body, media_type=MEDIA_TYPES["arrow"])
+    if output == "csv":
+        return StreamingResponse(csv_lines(columns, names=names), media_type=MEDIA_TYPES["csv"])
+    if output == "ndjson":
+        return StreamingResponse(ndjson_rows(columns, names=names), media_type=MEDIA_TYPES["ndjson"])
 
+    if selected:
+        # Projected rows bypass the response model so omitted fields stay absent
+        return JSONResponse({"symbol": symbol.upper(), "days": days, "data": columns_to_rows(columns, selected)})
     return HistoryResponse(
         symbol=symbol.upper(),
         days=days,
-        data=[HistoricalDataPoint(**point) for point in data],
+        data=[HistoricalDataPoint(**point) for point in columns_to_rows(columns)],
     )
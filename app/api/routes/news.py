@@ -1,10 +1,16 @@
 from fastapi import APIRouter, Query
 from typing import Optional
-import httpx
 import xml.etree.ElementTree as ET
 from datetime import datetime
+from app.config import get_settings
+from app.services.http import upstream_client
+from app.services.last_known_good import last_known_good
+from app.api.formats import parse_fields, project
 
 router = APIRouter()
+settings = get_settings()
+
+ARTICLE_FIELDS = ("title", "url", "published", "description", "source")
 
 # Free RSS feeds for crypto news
 RSS_FEEDS = {
@@ -15,12 +21,19 @@ RSS_FEEDS = {
 }
 
 
+def feed_url(source: str) -> str:
+    """Resolve the RSS URL for a source, honouring the feed base URL override."""
+    if settings.news_feed_base_url:
+        return f"{settings.news_feed_base_url.rstrip('/')}/{source}"
+    return RSS_FEEDS[source]
+
+
 async def fetch_rss_feed(url: str, source: str, limit: int = 10):
     """Fetch and parse RSS feed."""
     articles = []
     try:
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            response = await client.get(url, follow_redirects=True)
+        async with upstream_client() as client:
+            response = await client.get(url, follow_redirects=True, timeout=10.0)
             if response.status_code == 200:
                 root = ET.fromstring(response.content)
 
@@ -60,24 +73,39 @@ async def fetch_rss_feed(url: str, source: str, limit: int = 10):
 async def get_crypto_news(
     limit: int = Query(default=20, ge=1, le=50, description="Number of articles per source"),
     source: Optional[str] = Query(default=None, description="Filter by source: coindesk, cointelegraph, bitcoinmagazine, decrypt"),
+    fields: Optional[str] = Query(default=None, description="Comma-separated article fields to return, e.g. title,url"),
 ):
     """
     Get latest cryptocurrency news from multiple free sources.
 
     - **limit**: Number of articles to return per source (1-50)
     - **source**: Optional filter for specific news source
+    - **fields**: Only return these article fields
+
+    Sources whose feed cannot be fetched are served from their last good
+    articles and listed in `stale_sources`.
     """
+    selected = parse_fields(fields, ARTICLE_FIELDS)
     all_articles = []
 
     if source and source.lower() in RSS_FEEDS:
         # Fetch from specific source
-        feeds_to_fetch = {source.lower(): RSS_FEEDS[source.lower()]}
+        feeds_to_fetch = {source.lower(): feed_url(source.lower())}
     else:
         # Fetch from all sources
-        feeds_to_fetch = RSS_FEEDS
+        feeds_to_fetch = {name: feed_url(name) for name in RSS_FEEDS}
 
+    stale_sources = []
     for src_name, url in feeds_to_fetch.items():
         articles = await fetch_rss_feed(url, src_name, limit)
+        if articles:
+            last_known_good.record("news", src_name, articles)
+        else:
+            # Feed unavailable: fall back to its last good articles
+            known = last_known_good.lookup("news", src_name)
+            if known is not None:
+                articles = known[0][:limit]
+                stale_sources.append(src_name)
         all_articles.extend(articles)
 
     # Sort by published date if available
@@ -86,10 +114,13 @@ async def get_crypto_news(
         reverse=True
     )
 
+    articles = all_articles[:limit * len(feeds_to_fetch)] if not source else all_articles
     return {
-        "count": len(all_articles),
+        "count": len(articles),
         "sources": list(feeds_to_fetch.keys()),
-        "articles": all_articles[:limit * len(feeds_to_fetch)] if not source else all_articles,
+        "articles": [project(article, selected) for article in articles],
+        "stale": bool(stale_sources),
+        "stale_sources": stale_sources,
     }
 
 
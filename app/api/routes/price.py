@@ -1,44 +1,217 @@
-from fastapi import APIRouter, HTTPException
-from app.models.schemas import PriceResponse
+import time
+import httpx
+from fastapi import APIRouter, HTTPException, Query
+from datetime import datetime, timezone
+from typing import Optional
+from app.models.schemas import PriceResponse, PriceStatsResponse, SparklineResponse
 from app.services.binance import binance_service
 from app.services.coingecko import coingecko_service
+from app.services.rates import rate_service
+from app.services.timeseries import timeseries_service, window_seconds
+from app.services.trending import trending_service
+from app.services.last_known_good import last_known_good
+from app.metrics import FALLBACKS
 
 router = APIRouter()
 
+MAX_WINDOW = 30 * 86400
+
+
+def triangulated_price(symbol: str) -> Optional[dict]:
+    """Price a coin with no USDT market through the in-memory rate graph, while it is fresh."""
+    conversion = rate_service.convert(symbol, "USDT")
+    if conversion is None or conversion.stale or len(conversion.path) < 2:
+        return None
+    updated = datetime.fromtimestamp(binance_service.tickers.updated_at, timezone.utc)
+    return {
+        "symbol": symbol.upper(),
+        "name": None,
+        "price_usd": conversion.rate,
+        "price_change_24h": conversion.change_24h,
+        "volume_24h": None,
+        "last_updated": updated.isoformat(),
+        "source": "binance",
+        "conversion_path": conversion.path,
+    }
+
+
+def last_known_price(symbol: str) -> Optional[dict]:
+    """The last price served for a symbol, or its pair in an out-of-date ticker snapshot."""
+    known = last_known_good.lookup("prices", symbol.upper())
+    if known is not None:
+        return dict(known[0], stale=True)
+
+    ticker = (binance_service.tickers.value or {}).get(f"{symbol.upper()}USDT")
+    if ticker is None:
+        return None
+    updated = datetime.fromtimestamp(binance_service.tickers.updated_at, timezone.utc)
+    return {
+        "symbol": symbol.upper(),
+        "name": None,
+        "price_usd": ticker[0],
+        "price_change_24h": ticker[1],
+        "volume_24h": ticker[2],
+        "last_updated": updated.isoformat(),
+        "source": "binance",
+        "stale": True,
+    }
+
+
+def served(symbol: str, price_data: dict, vs: str) -> PriceResponse:
+    """Record a freshly sourced price and build the response."""
+    timeseries_service.record_price(price_data)
+    trending_service.record(symbol)
+    last_known_good.record("prices", symbol.upper(), dict(price_data))
+    return PriceResponse(**apply_quote(price_data, vs))
+
+
+def apply_quote(price_data: dict, vs: str) -> dict:
+    """Add the price in the requested quote currency; an out-of-date rate marks it stale."""
+    vs = vs.lower()
+    price_data["vs_currency"] = vs
+    if vs == "usd":
+        price_data["price"] = price_data["price_usd"]
+        return price_data
+
+    conversion = rate_service.convert(price_data["symbol"], vs)
+    if conversion is not None:
+        price_data["price"] = conversion.rate
+        price_data["conversion_path"] = conversion.path
+        price_data["stale"] = price_data.get("stale", False) or conversion.stale
+        return price_data
+
+    # Coin not on Binance: convert its USD price instead
+    conversion = rate_service.convert("USDT", vs)
+    if conversion is None:
+        raise HTTPException(status_code=400, detail=f"Unsupported quote currency '{vs}'")
+    price_data["price"] = price_data["price_usd"] * conversion.rate
+    price_data["conversion_path"] = [price_data["symbol"], "USD"] + conversion.path[1:]
+    price_data["stale"] = price_data.get("stale", False) or conversion.stale
+    return price_data
+
+
+def parse_window(window: str) -> int:
+    """Parse a window like "15m", "24h" or "7d" into seconds."""
+    try:
+        seconds = window_seconds(window)
+    except ValueError:
+        raise HTTPException(status_code=400, detail=f"Invalid window '{window}', use e.g. 15m, 24h or 7d")
+    if not 0 < seconds <= MAX_WINDOW:
+        raise HTTPException(status_code=400, detail="Window must be between 1m and 30d")
+    return seconds
+
+
+@router.get("/{symbol}/sparkline", response_model=SparklineResponse)
+async def get_sparkline(
+    symbol: str,
+    window: str = Query(default="24h", description="Time window, e.g. 15m, 1h, 24h, 7d (max 30d)"),
+    points: int = Query(default=100, ge=2, le=1000, description="Maximum number of points"),
+):
+    """
+    Get recent prices for a sparkline, served from memory.
+
+    - **symbol**: Coin symbol (e.g., "btc", "eth")
+    - **window**: Time window (default: 24h)
+    - **points**: Maximum points returned (default: 100)
+
+    Built from prices this server has observed: raw ticks for short windows,
+    1-minute rollups up to 24h and 1-hour rollups up to 30 days. Recently
+    started servers return only the history they have seen so far.
+    """
+    seconds = parse_window(window)
+    sparkline = timeseries_service.sparkline(symbol, seconds, points)
+    if sparkline is None:
+        raise HTTPException(status_code=404, detail=f"No recorded prices for '{symbol}'")
+
+    timestamps, prices, resolution = sparkline
+    return SparklineResponse(
+        symbol=symbol.upper(),
+        window=window,
+        resolution=resolution,
+        timestamps=timestamps.tolist(),
+        prices=prices.tolist(),
+    )
+
+
+@router.get("/{symbol}/stats", response_model=PriceStatsResponse)
+async def get_price_stats(symbol: str):
+    """
+    Get short-window price changes, served from memory.
+
+    - **symbol**: Coin symbol (e.g., "btc", "eth")
+
+    Returns % change over 1m, 5m, 15m, 1h and 24h (null where this server has
+    no price that far back) and the 24h high and low.
+    """
+    series = timeseries_service.get(symbol)
+    if series is None:
+        raise HTTPException(status_code=404, detail=f"No recorded prices for '{symbol}'")
+
+    updated, _ = series.last
+    return PriceStatsResponse(
+        symbol=symbol.upper(),
+        last_updated=datetime.fromtimestamp(updated, timezone.utc),
+        **series.stats(time.time()),
+    )
+
 
 @router.get("/{symbol}", response_model=PriceResponse)
-async def get_price(symbol: str):
+async def get_price(
+    symbol: str,
+    vs: str = Query(default="usd", description="Quote currency (e.g. usd, eur, gbp, zar, btc, eth)"),
+):
     """
     Get current price for a cryptocurrency.
 
     - **symbol**: Coin symbol (e.g., "btc", "eth", "sol", "bitcoin")
+    - **vs**: Quote currency for the `price` field (default: usd)
 
     Uses Binance as primary source (faster, real-time), falls back to CoinGecko.
+    Coins listed on Binance only against BTC, ETH or other hubs are priced by
+    triangulating through the all-market ticker, without extra upstream calls.
+    If every source fails, the last good price is returned with `stale: true`.
     """
     # Try Binance first (primary source - faster, real-time)
-    price_data = await binance_service.get_price(symbol)
+    try:
+        price_data = await binance_service.get_price(symbol) or triangulated_price(symbol)
+    except httpx.HTTPError as e:
+        print(f"Binance price for '{symbol}' failed: {e}")
+        price_data = None
 
     if price_data:
         # Binance doesn't provide coin name, try to get it from CoinGecko
         if not price_data.get("name"):
-            coin_id = await coingecko_service.search_coin(symbol)
-            if coin_id:
-                cg_data = await coingecko_service.get_price(coin_id)
-                if cg_data:
-                    price_data["name"] = cg_data.get("name")
-        return PriceResponse(**price_data)
+            try:
+                coin_id = await coingecko_service.search_coin(symbol)
+                if coin_id:
+                    cg_data = await coingecko_service.get_price(coin_id)
+                    if cg_data:
+                        price_data["name"] = cg_data.get("name")
+            except httpx.HTTPError as e:
+                print(f"CoinGecko name for '{symbol}' failed: {e}")
+        return served(symbol, price_data, vs)
 
     # Fallback to CoinGecko
-    price_data = await coingecko_service.get_price(symbol.lower())
+    FALLBACKS.labels("price", "binance", "coingecko").inc()
+    try:
+        price_data = await coingecko_service.get_price(symbol.lower())
 
-    if not price_data:
-        # Try searching by symbol
-        coin_id = await coingecko_service.search_coin(symbol)
-        if coin_id:
-            price_data = await coingecko_service.get_price(coin_id)
+        if not price_data:
+            # Try searching by symbol
+            coin_id = await coingecko_service.search_coin(symbol)
+            if coin_id:
+                price_data = await coingecko_service.get_price(coin_id)
+    except httpx.HTTPError as e:
+        print(f"CoinGecko price for '{symbol}' failed: {e}")
+        price_data = None
+
+    if price_data:
+        price_data["source"] = "coingecko"
+        return served(symbol, price_data, vs)
 
+    # Every source failed: serve the last good price, marked stale
+    price_data = last_known_price(symbol)
     if not price_data:
         raise HTTPException(status_code=404, detail=f"Coin '{symbol}' not found")
-
-    price_data["source"] = "coingecko"
-    return PriceResponse(**price_data)
+    FALLBACKS.labels("price", "coingecko", "last_known_good").inc()
+    return PriceResponse(**apply_quote(price_data, vs))
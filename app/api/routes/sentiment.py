@@ -1,6 +1,9 @@
-from fastapi import APIRouter, HTTPException
-from app.models.schemas import FearGreedResponse
+from fastapi import APIRouter, HTTPException, Query
+from datetime import date, datetime, time, timezone
+from typing import Optional
+from app.models.schemas import FearGreedResponse, FearGreedHistoryResponse, FearGreedCorrelationResponse
 from app.services.fear_greed import fear_greed_service
+from app.services.ohlc import ohlc_service
 
 router = APIRouter()
 
@@ -25,3 +28,57 @@ async def get_fear_greed():
         )
 
     return FearGreedResponse(**data)
+
+
+def _timestamp(day: Optional[date]) -> Optional[int]:
+    if day is None:
+        return None
+    return int(datetime.combine(day, time(), tzinfo=timezone.utc).timestamp())
+
+
+@router.get("/history", response_model=FearGreedHistoryResponse)
+async def get_fear_greed_history(
+    from_date: Optional[date] = Query(default=None, alias="from", description="First day (YYYY-MM-DD)"),
+    to_date: Optional[date] = Query(default=None, alias="to", description="Last day (YYYY-MM-DD)"),
+):
+    """
+    Get daily Fear & Greed Index values for a date range.
+
+    - **from**: First day, inclusive (default: start of the series, Feb 2018)
+    - **to**: Last day, inclusive (default: today)
+
+    Served from the locally stored series, never from the upstream API.
+    """
+    if not len(fear_greed_service.history.records):
+        raise HTTPException(status_code=503, detail="Fear & Greed history is still loading")
+
+    data = fear_greed_service.get_history(_timestamp(from_date), _timestamp(to_date))
+    return FearGreedHistoryResponse(count=len(data), data=[FearGreedResponse(**point) for point in data])
+
+
+@router.get("/correlation/{symbol}", response_model=FearGreedCorrelationResponse)
+async def get_fear_greed_correlation(
+    symbol: str,
+    days: int = Query(default=365, ge=7, le=365, description="Number of days to correlate"),
+):
+    """
+    Correlate the Fear & Greed Index with a coin's daily closes.
+
+    - **symbol**: Coin symbol or ID (e.g., "btc", "ethereum")
+    - **days**: Number of days of history (7-365, default: 365)
+
+    Reports Pearson correlations with the close price, the same-day return and
+    the next day's return, over the days where both series have a value.
+    """
+    if not len(fear_greed_service.history.records):
+        raise HTTPException(status_code=503, detail="Fear & Greed history is still loading")
+
+    columns = await ohlc_service.get_columns(symbol, days)
+    if not columns:
+        raise HTTPException(status_code=404, detail=f"Historical data for '{symbol}' not found")
+
+    return FearGreedCorrelationResponse(
+        symbol=symbol.upper(),
+        days=days,
+        **fear_greed_service.correlate(columns["date"], columns["close"]),
+    )
@@ -1,21 +1,88 @@
-from fastapi import APIRouter, Query
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import JSONResponse
+from typing import Literal, Optional
 from app.models.schemas import TopCoinsResponse, TopCoin
 from app.services.coingecko import coingecko_service
+from app.services.market import NUMERIC_COLUMNS, TEXT_COLUMNS, MarketTable, market_service
+from app.services.rates import rate_service
+from app.services.timeseries import timeseries_service
+from app.api.formats import parse_fields
 
 router = APIRouter()
 
+TOP_COIN_FIELDS = tuple(TopCoin.model_fields)
+
 
 @router.get("", response_model=TopCoinsResponse)
 async def get_top_coins(
-    limit: int = Query(default=100, ge=1, le=250, description="Number of coins to return"),
+    limit: int = Query(default=100, ge=1, le=1000, description="Number of coins to return"),
+    offset: int = Query(default=0, ge=0, description="Number of coins to skip"),
+    sort: Literal["market_cap", "volume", "change_24h"] = Query(default="market_cap", description="Sort column (descending)"),
+    min_market_cap: Optional[float] = Query(default=None, ge=0, description="Only coins with at least this market cap (USD)"),
+    movers: Optional[Literal["gainers", "losers"]] = Query(default=None, description="Top gainers or losers by 24h change"),
+    vs: str = Query(default="usd", description="Quote currency for the price field (e.g. usd, eur, btc)"),
+    sparkline: bool = Query(default=False, description="Include 7-day hourly prices recorded by this server"),
+    fields: Optional[str] = Query(default=None, description="Comma-separated coin fields to return, e.g. symbol,price_usd"),
 ):
     """
-    Get top cryptocurrencies by market cap.
+    Get top cryptocurrencies by market cap, or screen the whole market.
+
+    - **limit**: Number of coins to return (1-1000, default: 100)
+    - **offset**: Number of coins to skip, for pagination
+    - **sort**: market_cap, volume or change_24h (descending)
+    - **min_market_cap**: Minimum market cap in USD
+    - **movers**: gainers or losers (overrides sort)
+    - **vs**: Quote currency for `price` (default: usd)
+    - **sparkline**: Include 7-day hourly prices from the in-memory recorder
+    - **fields**: Only return these coin fields; the others are never built
 
-    - **limit**: Number of coins to return (1-250, default: 100)
+    Served from an in-memory snapshot of the whole market when available;
+    `stale` is true while that snapshot, or the rate used for `vs`, cannot be
+    refreshed.
     """
-    coins = await coingecko_service.get_top_coins(limit=limit)
+    selected = parse_fields(fields, TOP_COIN_FIELDS)
+    wanted = selected or TOP_COIN_FIELDS
+    vs = vs.lower()
+    rate, stale_rate = 1.0, False
+    if vs != "usd":
+        conversion = rate_service.convert("USDT", vs)
+        if conversion is None:
+            raise HTTPException(status_code=400, detail=f"Unsupported quote currency '{vs}'")
+        rate, stale_rate = conversion.rate, conversion.stale
+
+    table = market_service.table()
+    stale = stale_rate or (table is not None and not market_service.snapshot.is_fresh())
+    if table is None:
+        # Snapshot not loaded yet: screen the first page from CoinGecko
+        table = MarketTable.from_rows(await coingecko_service.get_top_coins(limit=250))
 
-    return TopCoinsResponse(
-        coins=[TopCoin(**coin) for coin in coins]
+    indices, total = table.query(
+        sort="change_24h" if movers else sort,
+        descending=movers != "losers",
+        min_market_cap=min_market_cap,
+        offset=offset,
+        limit=limit,
     )
+
+    columns = {name for name in wanted if name in TEXT_COLUMNS + NUMERIC_COLUMNS}
+    if "price" in wanted:
+        columns.add("price_usd")
+    if sparkline and "sparkline" in wanted:
+        columns.add("symbol")
+
+    coins = []
+    for coin in table.rows(indices, columns):
+        if "sparkline" in wanted:
+            line = None
+            if sparkline:
+                recorded = timeseries_service.sparkline(coin["symbol"], 7 * 86400, 168)
+                line = (recorded[1] * rate).tolist() if recorded is not None else []
+            coin["sparkline"] = line
+        if "price" in wanted:
+            coin["price"] = coin["price_usd"] * rate if coin["price_usd"] is not None else None
+        coins.append({name: coin[name] for name in selected} if selected else TopCoin(**coin))
+
+    if selected:
+        # Projected rows bypass the response model so omitted fields stay absent
+        return JSONResponse({"vs_currency": vs, "total": total, "stale": stale, "coins": coins})
+    return TopCoinsResponse(vs_currency=vs, total=total, stale=stale, coins=coins)
@@ -1,17 +1,31 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Query
+from typing import Literal
 from app.models.schemas import TrendingResponse, TrendingCoin
 from app.services.coingecko import coingecko_service
+from app.services.trending import trending_service
 
 router = APIRouter()
 
 
 @router.get("", response_model=TrendingResponse)
-async def get_trending():
+async def get_trending(
+    source: Literal["coingecko", "local"] = Query(default="coingecko", description="Ranking source"),
+    limit: int = Query(default=15, ge=1, le=50, description="Number of coins (source=local)"),
+):
     """
     Get trending cryptocurrencies.
 
-    Returns the top trending coins based on CoinGecko search data.
+    - **source**: `coingecko` (CoinGecko search trends) or `local` (this
+      API's own /price, /history and /chart traffic, weighted by 24h price
+      change and volume, recent requests counting most)
+    - **limit**: Number of coins for `local` (1-50, default: 15)
     """
+    if source == "local":
+        return TrendingResponse(
+            source="local",
+            coins=[TrendingCoin(**coin) for coin in trending_service.top(limit)],
+        )
+
     coins = await coingecko_service.get_trending()
 
     return TrendingResponse(
@@ -1,8 +1,10 @@
 from fastapi import APIRouter, Query, HTTPException
 from typing import Optional
-import httpx
+from app.config import get_settings
+from app.services.http import upstream_client
 
 router = APIRouter()
+settings = get_settings()
 
 # Using blockchain.info and other free APIs for whale data
 WHALE_THRESHOLD_BTC = 100  # BTC
@@ -26,15 +28,16 @@ async def get_whale_transactions(
 
     try:
         # Fetch latest BTC blocks and large transactions
-        async with httpx.AsyncClient(timeout=15.0) as client:
+        async with upstream_client() as client:
             # Get current BTC price
-            price_resp = await client.get("https://api.coingecko.com/api/v3/simple/price?ids=bitcoin&vs_currencies=usd")
+            price_resp = await client.get(f"{settings.coingecko_base_url}/simple/price?ids=bitcoin&vs_currencies=usd", timeout=15.0)
             btc_price = price_resp.json().get("bitcoin", {}).get("usd", 50000)
 
             # Get latest unconfirmed transactions from blockchain.info
             response = await client.get(
-                "https://blockchain.info/unconfirmed-transactions?format=json",
-                headers={"User-Agent": "CryptoPriceAPI/1.0"}
+                f"{settings.blockchain_info_url}/unconfirmed-transactions?format=json",
+                headers={"User-Agent": "CryptoPriceAPI/1.0"},
+                timeout=15.0,
             )
 
             if response.status_code == 200:
@@ -80,9 +83,9 @@ async def get_whale_stats():
     Get whale activity statistics for the last 24 hours.
     """
     try:
-        async with httpx.AsyncClient(timeout=10.0) as client:
+        async with upstream_client() as client:
             # Get BTC stats
-            response = await client.get("https://api.blockchain.info/stats")
+            response = await client.get(f"{settings.blockchain_api_url}/stats", timeout=10.0)
 
             if response.status_code == 200:
                 data = response.json()
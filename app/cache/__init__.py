@@ -0,0 +1,15 @@
+from functools import lru_cache
+from app.cache.base import CacheBackend
+from app.config import get_settings
+
+
+@lru_cache
+def get_cache() -> CacheBackend:
+    """Return the cache backend selected by ``CACHE_URL``."""
+    url = get_settings().cache_url
+    if url.startswith("memory://"):
+        from app.cache.memory import MemoryCache
+        return MemoryCache()
+
+    from app.cache.resp import RespCache
+    return RespCache(url)
@@ -0,0 +1,72 @@
+import json
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Optional
+from app.metrics import CACHE_EVENTS
+
+
+class CacheBackend(ABC):
+    """
+    Minimal async key/value interface shared by all cache backends.
+
+    Values are raw bytes; ``get_json``/``set_json`` wrap them in a small
+    envelope carrying the write time so readers can tell fresh from stale.
+    Backends never raise on connection problems - a broken cache behaves
+    like an empty one.
+    """
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[bytes]:
+        ...
+
+    @abstractmethod
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        ...
+
+    @abstractmethod
+    async def set_if_absent(self, key: str, value: bytes, ttl: float) -> bool:
+        """Store the value only if the key does not exist; True if stored."""
+
+    @abstractmethod
+    async def expire(self, key: str, ttl: float) -> bool:
+        ...
+
+    @abstractmethod
+    async def delete(self, key: str) -> None:
+        ...
+
+    @property
+    def available(self) -> bool:
+        """False while the backend is known to be unreachable."""
+        return True
+
+    async def close(self) -> None:
+        pass
+
+    async def get_json(self, key: str, name: str, max_age: Optional[float] = None) -> Optional[Any]:
+        """
+        Read a JSON value written by ``set_json``.
+
+        Records a hit, miss or stale event under ``name``. Entries older than
+        ``max_age`` seconds are treated as stale and not returned.
+        """
+        raw = await self.get(key)
+        if raw is None:
+            CACHE_EVENTS.labels(name, "miss").inc()
+            return None
+        envelope = json.loads(raw)
+        if max_age is not None and time.time() - envelope["t"] > max_age:
+            CACHE_EVENTS.labels(name, "stale").inc()
+            return None
+        CACHE_EVENTS.labels(name, "hit").inc()
+        return envelope["v"]
+
+    async def set_json(self, key: str, value: Any, ttl: float) -> None:
+        payload = json.dumps({"t": time.time(), "v": value}, separators=(",", ":"))
+        await self.set(key, payload.encode(), ttl)
+
+    async def get_bytes(self, key: str, name: str) -> Optional[bytes]:
+        """Read a raw value, recording a hit or miss under ``name``."""
+        raw = await self.get(key)
+        CACHE_EVENTS.labels(name, "miss" if raw is None else "hit").inc()
+        return raw
@@ -0,0 +1,103 @@
+import asyncio
+import os
+import socket
+import time
+from typing import Any, Awaitable, Callable, Optional
+from app.cache import get_cache
+
+WORKER_ID = f"{socket.gethostname()}:{os.getpid()}"
+
+
+async def acquire_leadership(name: str, ttl: float) -> bool:
+    """
+    Take or renew the lease ``leader:{name}`` for this worker.
+
+    The lease is a key set with NX and a TTL; the holder renews it on every
+    cycle. If the holder dies the key expires and the next worker to ask
+    becomes leader. While the cache is unreachable there is no lease to
+    share, so every worker leads its own refresh rather than none doing so.
+    """
+    cache = get_cache()
+    key = f"leader:{name}"
+    if await cache.set_if_absent(key, WORKER_ID.encode(), ttl):
+        return True
+    if await cache.get(key) == WORKER_ID.encode():
+        await cache.expire(key, ttl)
+        return True
+    return not cache.available
+
+
+async def release_leadership(name: str) -> None:
+    cache = get_cache()
+    key = f"leader:{name}"
+    if await cache.get(key) == WORKER_ID.encode():
+        await cache.delete(key)
+
+
+class SnapshotRefresher:
+    """
+    Keep a snapshot fresh in every worker while only one worker fetches it.
+
+    The elected leader calls ``fetch`` every ``interval`` seconds and
+    publishes the result to the shared cache; followers copy the published
+    value into local memory. Readers use ``value`` directly, no await needed;
+    ``listeners`` are called whenever a different value arrives.
+    """
+
+    def __init__(self, name: str, interval: float, fetch: Callable[[], Awaitable[Any]]):
+        self.name = name
+        self.interval = interval
+        self.fetch = fetch
+        self.value: Optional[Any] = None
+        self.updated_at = 0.0
+        self.is_leader = False
+        self.listeners: list[Callable[[Any], None]] = []
+
+    def _update(self, value: Any) -> None:
+        changed = value != self.value
+        self.value, self.updated_at = value, time.time()
+        if not changed:
+            return
+        for listener in self.listeners:
+            try:
+                listener(value)
+            except Exception as e:
+                print(f"Refresher '{self.name}' listener failed: {e}")
+
+    def restore(self, value: Any, updated_at: float) -> None:
+        """Seed a saved value without notifying listeners; the next refresh replaces it."""
+        self.value, self.updated_at = value, updated_at
+
+    @property
+    def key(self) -> str:
+        return f"snapshot:{self.name}"
+
+    def is_fresh(self, max_age: Optional[float] = None) -> bool:
+        max_age = max_age if max_age is not None else self.interval * 3
+        return self.value is not None and time.time() - self.updated_at <= max_age
+
+    async def refresh_once(self) -> None:
+        cache = get_cache()
+        self.is_leader = await acquire_leadership(self.name, self.interval * 3)
+        if self.is_leader:
+            value = await self.fetch()
+            if value:
+                self._update(value)
+                await cache.set_json(self.key, value, ttl=self.interval * 20)
+            return
+
+        value = await cache.get_json(self.key, self.name, max_age=self.interval * 3)
+        if value is not None:
+            self._update(value)
+
+    async def run(self) -> None:
+        while True:
+            try:
+                await self.refresh_once()
+            except Exception as e:
+                print(f"Refresher '{self.name}' failed: {e}")
+            await asyncio.sleep(self.interval)
+
+    async def stop(self) -> None:
+        if self.is_leader:
+            await release_leadership(self.name)
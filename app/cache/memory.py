@@ -0,0 +1,64 @@
+import time
+from collections import OrderedDict
+from typing import Optional
+from app.cache.base import CacheBackend
+
+
+class MemoryCache(CacheBackend):
+    """
+    In-process LRU cache with per-key TTL and a total size budget.
+
+    The default backend for a single worker. With several workers each one
+    holds its own copy; use ``RespCache`` to share.
+    """
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._size = 0
+        self._data: OrderedDict[str, tuple[float, bytes]] = OrderedDict()
+
+    def _live(self, key: str) -> Optional[bytes]:
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at <= time.monotonic():
+            self._remove(key)
+            return None
+        self._data.move_to_end(key)
+        return value
+
+    def _remove(self, key: str) -> None:
+        entry = self._data.pop(key, None)
+        if entry is not None:
+            self._size -= len(entry[1])
+
+    def _store(self, key: str, value: bytes, ttl: float) -> None:
+        self._remove(key)
+        self._data[key] = (time.monotonic() + ttl, value)
+        self._size += len(value)
+        while self._size > self.max_bytes and self._data:
+            oldest = next(iter(self._data))
+            self._remove(oldest)
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return self._live(key)
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        self._store(key, value, ttl)
+
+    async def set_if_absent(self, key: str, value: bytes, ttl: float) -> bool:
+        if self._live(key) is not None:
+            return False
+        self._store(key, value, ttl)
+        return True
+
+    async def expire(self, key: str, ttl: float) -> bool:
+        value = self._live(key)
+        if value is None:
+            return False
+        self._data[key] = (time.monotonic() + ttl, value)
+        return True
+
+    async def delete(self, key: str) -> None:
+        self._remove(key)
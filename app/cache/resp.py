@@ -0,0 +1,134 @@
+import asyncio
+import time
+from typing import Optional
+from urllib.parse import urlparse
+from app.cache.base import CacheBackend
+
+
+class RespError(Exception):
+    pass
+
+
+def encode_command(*args) -> bytes:
+    """Encode a command as a RESP array of bulk strings."""
+    out = [b"*%d\r\n" % len(args)]
+    for arg in args:
+        if isinstance(arg, str):
+            arg = arg.encode()
+        elif not isinstance(arg, bytes):
+            arg = str(arg).encode()
+        out.append(b"$%d\r\n%s\r\n" % (len(arg), arg))
+    return b"".join(out)
+
+
+async def read_reply(reader: asyncio.StreamReader):
+    line = await reader.readline()
+    if not line:
+        raise ConnectionError("connection closed")
+    kind, rest = line[:1], line[1:-2]
+    if kind == b"+":
+        return rest.decode()
+    if kind == b"-":
+        raise RespError(rest.decode())
+    if kind == b":":
+        return int(rest)
+    if kind == b"$":
+        length = int(rest)
+        if length < 0:
+            return None
+        data = await reader.readexactly(length + 2)
+        return data[:-2]
+    if kind == b"*":
+        count = int(rest)
+        if count < 0:
+            return None
+        return [await read_reply(reader) for _ in range(count)]
+    raise RespError(f"unknown reply type {kind!r}")
+
+
+class RespCache(CacheBackend):
+    """
+    Cache backend speaking the Redis protocol.
+
+    Works against a real Redis (``redis://host:6379``) or the bundled
+    stand-in server over a local socket (``unix:///run/crypto-cache.sock``,
+    see ``app.cache.server``). Uses one connection per worker; commands are
+    serialised with a lock, which is plenty for small keys on a local socket.
+    If the server is unreachable the cache reads as empty and reconnects are
+    retried at most once per ``retry_interval`` seconds.
+    """
+
+    def __init__(self, url: str, timeout: float = 1.0, retry_interval: float = 5.0):
+        self.url = urlparse(url)
+        self.timeout = timeout
+        self.retry_interval = retry_interval
+        self._reader: Optional[asyncio.StreamReader] = None
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._lock = asyncio.Lock()
+        self._down_until = 0.0
+
+    async def _connect(self) -> None:
+        if self.url.scheme == "unix":
+            self._reader, self._writer = await asyncio.open_unix_connection(self.url.path)
+        else:
+            self._reader, self._writer = await asyncio.open_connection(
+                self.url.hostname or "127.0.0.1", self.url.port or 6379
+            )
+        db = self.url.path.lstrip("/")
+        if self.url.scheme != "unix" and db:
+            await self._roundtrip("SELECT", db)
+
+    async def _roundtrip(self, *args):
+        self._writer.write(encode_command(*args))
+        await self._writer.drain()
+        return await read_reply(self._reader)
+
+    def _close(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+        self._reader = self._writer = None
+
+    def _disconnect(self) -> None:
+        self._close()
+        self._down_until = time.monotonic() + self.retry_interval
+
+    @property
+    def available(self) -> bool:
+        return time.monotonic() >= self._down_until
+
+    async def execute(self, *args):
+        """Run one command; returns None if the server is unreachable."""
+        if time.monotonic() < self._down_until:
+            return None
+        async with self._lock:
+            try:
+                if self._writer is None:
+                    await asyncio.wait_for(self._connect(), self.timeout)
+                return await asyncio.wait_for(self._roundtrip(*args), self.timeout)
+            except (OSError, ConnectionError, asyncio.TimeoutError, asyncio.IncompleteReadError):
+                self._disconnect()
+                return None
+            except BaseException:
+                # Cancelled mid round trip: the reply may still arrive and would
+                # be read as the answer to the next command, so drop the connection
+                self._close()
+                raise
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return await self.execute("GET", key)
+
+    async def set(self, key: str, value: bytes, ttl: float) -> None:
+        await self.execute("SET", key, value, "PX", int(ttl * 1000))
+
+    async def set_if_absent(self, key: str, value: bytes, ttl: float) -> bool:
+        return await self.execute("SET", key, value, "NX", "PX", int(ttl * 1000)) == "OK"
+
+    async def expire(self, key: str, ttl: float) -> bool:
+        return await self.execute("PEXPIRE", key, int(ttl * 1000)) == 1
+
+    async def delete(self, key: str) -> None:
+        await self.execute("DEL", key)
+
+    async def close(self) -> None:
+        async with self._lock:
+            self._close()
@@ -0,0 +1,111 @@
+"""
+Local stand-in for Redis, shared by all workers on one host.
+
+Implements the handful of commands ``RespCache`` uses (PING, GET, SET with
+NX/XX/PX/EX, PEXPIRE, DEL, EXISTS, SELECT) on top of ``MemoryCache``.
+
+Run:
+    python -m app.cache.server --unix /tmp/crypto-price-cache.sock
+    python -m app.cache.server --port 6380
+"""
+import argparse
+import asyncio
+from app.cache.memory import MemoryCache
+from app.cache.resp import RespError, read_reply
+
+
+def _simple(text: str) -> bytes:
+    return f"+{text}\r\n".encode()
+
+
+def _error(text: str) -> bytes:
+    return f"-ERR {text}\r\n".encode()
+
+
+def _integer(value: int) -> bytes:
+    return f":{value}\r\n".encode()
+
+
+def _bulk(value) -> bytes:
+    if value is None:
+        return b"$-1\r\n"
+    return b"$%d\r\n%s\r\n" % (len(value), value)
+
+
+class CacheServer:
+    def __init__(self, max_bytes: int):
+        self.store = MemoryCache(max_bytes=max_bytes)
+
+    async def dispatch(self, args: list[bytes]) -> bytes:
+        command = args[0].upper()
+        key = args[1].decode() if len(args) > 1 else None
+
+        if command == b"PING":
+            return _simple("PONG")
+        if command == b"SELECT":
+            return _simple("OK")
+        if command == b"GET":
+            return _bulk(await self.store.get(key))
+        if command == b"EXISTS":
+            found = [await self.store.get(k.decode()) for k in args[1:]]
+            return _integer(sum(1 for value in found if value is not None))
+        if command == b"DEL":
+            removed = 0
+            for k in args[1:]:
+                if await self.store.get(k.decode()) is not None:
+                    await self.store.delete(k.decode())
+                    removed += 1
+            return _integer(removed)
+        if command == b"PEXPIRE":
+            return _integer(int(await self.store.expire(key, int(args[2]) / 1000)))
+        if command == b"SET":
+            value, options = args[2], [a.upper() for a in args[3:]]
+            ttl = 365 * 86400.0
+            if b"PX" in options:
+                ttl = int(options[options.index(b"PX") + 1]) / 1000
+            elif b"EX" in options:
+                ttl = float(options[options.index(b"EX") + 1])
+            exists = await self.store.get(key) is not None
+            if (b"NX" in options and exists) or (b"XX" in options and not exists):
+                return _bulk(None)
+            await self.store.set(key, value, ttl)
+            return _simple("OK")
+        return _error(f"unknown command '{command.decode()}'")
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                try:
+                    args = await read_reply(reader)
+                except (ConnectionError, asyncio.IncompleteReadError):
+                    break
+                except RespError as e:
+                    writer.write(_error(str(e)))
+                    continue
+                if not isinstance(args, list) or not args:
+                    writer.write(_error("expected a command array"))
+                else:
+                    writer.write(await self.dispatch(args))
+                await writer.drain()
+        finally:
+            writer.close()
+
+
+async def serve(unix_path: str = None, host: str = "127.0.0.1", port: int = 6380, max_bytes: int = 256 * 1024 * 1024):
+    server = CacheServer(max_bytes)
+    if unix_path:
+        listener = await asyncio.start_unix_server(server.handle, path=unix_path)
+    else:
+        listener = await asyncio.start_server(server.handle, host=host, port=port)
+    async with listener:
+        await listener.serve_forever()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Run the shared cache stand-in")
+    parser.add_argument("--unix", help="Listen on this unix socket path instead of TCP")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=6380)
+    parser.add_argument("--max-mb", type=int, default=256, help="Memory budget for cached values")
+    args = parser.parse_args()
+    asyncio.run(serve(args.unix, args.host, args.port, args.max_mb * 1024 * 1024))
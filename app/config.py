@@ -1,5 +1,6 @@
 from pydantic_settings import BaseSettings
 from functools import lru_cache
+from typing import Optional
 
 
 class Settings(BaseSettings):
@@ -7,8 +8,121 @@ class Settings(BaseSettings):
     debug: bool = False
 
     # External API URLs
+    binance_base_url: str = "https://api.binance.com"
     coingecko_base_url: str = "https://api.coingecko.com/api/v3"
     fear_greed_url: str = "https://api.alternative.me/fng/"
+    blockchain_info_url: str = "https://blockchain.info"
+    blockchain_api_url: str = "https://api.blockchain.info"
+
+    # When set, every news source is fetched from "{news_feed_base_url}/{source}"
+    # instead of its public RSS URL (used by the benchmark fake upstream)
+    news_feed_base_url: Optional[str] = None
+
+    # Directory for local data files (Fear & Greed history, snapshots)
+    data_dir: str = "data"
+
+    # Cache shared between workers: "memory://" (per worker), "redis://host:6379"
+    # or "unix:///path/to.sock" (see app/cache/server.py)
+    cache_url: str = "memory://"
+
+    # Seconds between background refreshes of the Binance all-market ticker
+    ticker_refresh_interval: float = 15.0
+
+    # Full-market snapshot: pages of 250 coins from CoinGecko /coins/markets
+    market_pages: int = 8
+    market_refresh_interval: float = 120.0
+
+    # Concurrent symbol fetches for /history/bulk
+    bulk_history_concurrency: int = 4
+
+    # In-memory price history: symbols tracked in total, and how many of the
+    # most liquid Binance USDT pairs are recorded from each ticker snapshot
+    timeseries_max_symbols: int = 600
+    timeseries_snapshot_symbols: int = 300
+
+    # Alert rules allowed per client (X-Real-IP or RapidAPI user, as for
+    # admission control) and in total
+    alert_max_rules_per_client: int = 100
+    alert_max_rules: int = 100000
+
+    # Alert webhooks: queued events (new ones are dropped when full), concurrent
+    # deliveries, events per POST, retries per batch, and minimum seconds
+    # between firings of a repeating rule
+    alert_queue_size: int = 10000
+    alert_dispatch_concurrency: int = 4
+    alert_batch_size: int = 50
+    alert_retries: int = 3
+    alert_cooldown: float = 300.0
+    # Allow webhooks on loopback and private addresses (local testing only)
+    alert_allow_private_webhooks: bool = False
+
+    # Request profiler: requests are profiled when they carry an X-Profile
+    # token signed with profiler_secret, or at random at profiler_sample_rate
+    # (0-1). Disabled, with no middleware installed, without a secret;
+    # sampling needs the secret too, since profiles are read from /admin.
+    profiler_secret: Optional[str] = None
+    profiler_sample_rate: float = 0.0
+    profiler_interval_ms: float = 5.0
+    profiler_max_profiles: int = 50
+
+    # Local trending: symbols tracked by the heavy-hitter counter, and the
+    # half-life in seconds of a request's weight
+    trending_capacity: int = 256
+    trending_half_life: float = 3600.0
+
+    # Adaptive refresh of hot cache keys. A key is hot when it is expected to
+    # be requested refresh_hot_threshold times per TTL (demand measured over
+    # refresh_demand_window seconds); hot keys are refreshed about once per
+    # 1 / refresh_demand_ratio requests, within per-upstream budgets
+    # (refreshes per second, bursts of refresh_burst).
+    refresh_budgets: dict[str, float] = {"coingecko": 0.25}
+    refresh_burst: float = 10.0
+    refresh_max_keys: int = 500
+    refresh_demand_window: float = 300.0
+    refresh_hot_threshold: float = 2.0
+    refresh_demand_ratio: float = 0.05
+    # Hot keys from the last run refreshed before /health reports ready (at
+    # most refresh_burst, so warm-up fits in the budget's first burst), and
+    # the longest a worker waits for that before reporting ready anyway
+    warmup_keys: int = 10
+    warmup_timeout: float = 30.0
+    # Number of uvicorn workers (uvicorn reads the same variable); scales the
+    # leader's share of demand up to the whole service
+    web_concurrency: int = 1
+
+    # /compare: exchanges queried by default, CoinGecko exchange-ticker calls
+    # in flight at once across all requests, and seconds to wait for them
+    compare_exchanges: list[str] = ["binance", "gdax", "kraken", "okex", "bybit_spot", "kucoin", "bitstamp", "gemini"]
+    compare_concurrency: int = 4
+    compare_deadline: float = 2.0
+
+    # Response compression (gzip; brotli and zstd when installed): smallest
+    # complete body worth compressing, and bytes of compressed bodies kept
+    compression_min_size: int = 1024
+    compression_cache_bytes: int = 16 * 1024 * 1024
+
+    # Last-known-good snapshot of tickers, the market table, served prices,
+    # the symbol index and news, saved to DATA_DIR/last_known_good.bin every
+    # lkg_save_interval seconds and at shutdown. Ignored at startup when older
+    # than lkg_max_age; lkg_max_entries bounds each keyed section.
+    lkg_save_interval: float = 30.0
+    lkg_max_age: float = 86400.0
+    lkg_max_entries: int = 2000
+
+    # Admission control: each client (X-Real-IP, or the RapidAPI user when the
+    # request carries rapidapi_proxy_secret in X-RapidAPI-Proxy-Secret) may
+    # spend rate_limit_per_minute cost units per sliding minute (0 turns the
+    # limit off), with at most rate_limit_max_clients tracked at once.
+    # Route classes are capped at admission_concurrency in-flight requests
+    # per worker, waiting up to admission_queue_timeout seconds for a slot.
+    # Past shed_lag_threshold seconds of event-loop lag heavy and medium
+    # requests get 503; past twice that, all of them do (0 turns it off).
+    rate_limit_per_minute: int = 600
+    rate_limit_max_clients: int = 10000
+    admission_concurrency: dict[str, int] = {"heavy": 4, "medium": 32}
+    admission_queue_timeout: float = 2.0
+    shed_lag_threshold: float = 0.5
+    rapidapi_proxy_secret: Optional[str] = None
 
     class Config:
         env_file = ".env"
@@ -1,17 +1,78 @@
-from fastapi import FastAPI
+import asyncio
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Response
+from fastapi.responses import JSONResponse
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
 from app.config import get_settings
-from app.api.routes import price, history, top, trending, sentiment, chart, news, whales, exchanges
+from app.metrics import monitor_event_loop_lag
+from app.cache import get_cache
+from app.services.http import close_http_client
+from app.services.binance import binance_service
+from app.services.coingecko import coingecko_service
+from app.services.market import market_service
+from app.services.fear_greed import fear_greed_service
+from app.services.alerts import alert_engine
+from app.services.scheduler import refresh_scheduler
+from app.services.last_known_good import last_known_good
+from app.api.middleware.admission import AdmissionMiddleware
+from app.api.middleware.compression import CompressionMiddleware
+from app.api.middleware.metrics import MetricsMiddleware
+from app.api.middleware.profiler import ProfilerMiddleware
+from app.api.routes import price, history, top, trending, sentiment, chart, news, whales, exchanges, compare, alerts, admin
 
 settings = get_settings()
 
+refreshers = [binance_service.tickers, coingecko_service.fiat_rates, market_service.snapshot]
+for refresher in refreshers:
+    last_known_good.track(refresher)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Start background tasks and release shared clients on shutdown."""
+    last_known_good.load()
+    tasks = [
+        asyncio.create_task(monitor_event_loop_lag()),
+        asyncio.create_task(fear_greed_service.run()),
+        asyncio.create_task(alert_engine.dispatcher.run()),
+        asyncio.create_task(refresh_scheduler.run()),
+        asyncio.create_task(last_known_good.run()),
+    ]
+    tasks += [asyncio.create_task(refresher.run()) for refresher in refreshers]
+    yield
+    for task in tasks:
+        task.cancel()
+    last_known_good.save()
+    for refresher in refreshers:
+        await refresher.stop()
+    await refresh_scheduler.stop()
+    await get_cache().close()
+    await close_http_client()
+    await alert_engine.dispatcher.close()
+
+
 app = FastAPI(
     title=settings.app_name,
     description="A simple API for getting cryptocurrency prices and market data",
     version="1.0.0",
     docs_url="/docs",
     redoc_url="/redoc",
+    lifespan=lifespan,
 )
 
+# Metrics wraps admission control so refused requests are still counted;
+# compression is innermost so its time is part of the route's latency
+app.add_middleware(CompressionMiddleware)
+app.add_middleware(AdmissionMiddleware)
+app.add_middleware(MetricsMiddleware)
+
+# Profiling is opt-in; when off, the middleware is not installed at all.
+# Sampled profiles can only be read through /admin, which needs the secret.
+if settings.profiler_sample_rate and not settings.profiler_secret:
+    raise RuntimeError("PROFILER_SAMPLE_RATE is set but PROFILER_SECRET is not; /admin/profiles needs the secret")
+if settings.profiler_secret:
+    app.add_middleware(ProfilerMiddleware)
+
 # Include routers
 app.include_router(price.router, prefix="/price", tags=["Price"])
 app.include_router(history.router, prefix="/history", tags=["History"])
@@ -22,6 +83,9 @@ app.include_router(chart.router, prefix="/chart", tags=["Chart"])
 app.include_router(news.router, prefix="/news", tags=["News"])
 app.include_router(whales.router, prefix="/whales", tags=["Whale Alerts"])
 app.include_router(exchanges.router, prefix="/exchanges", tags=["Exchanges"])
+app.include_router(compare.router, prefix="/compare", tags=["Exchanges"])
+app.include_router(alerts.router, prefix="/alerts", tags=["Alerts"])
+app.include_router(admin.router, prefix="/admin", include_in_schema=False)
 
 
 @app.get("/", tags=["Health"])
@@ -36,5 +100,24 @@ async def root():
 
 @app.get("/health", tags=["Health"])
 async def health():
-    """Health check endpoint for monitoring."""
-    return {"status": "healthy"}
+    """
+    Health check endpoint for monitoring.
+
+    Returns 503 while the worker is warming up: until the previous run's hot
+    cache keys are refreshed and the ticker snapshot is loaded (at most
+    WARMUP_TIMEOUT seconds), so load balancers only route to warm workers.
+    """
+    ready = refresh_scheduler.warm
+    body = {
+        "status": "healthy" if ready else "warming",
+        "ready": ready,
+        "warm_pending": len(refresh_scheduler.pending_warm),
+        "snapshots": {refresher.name: refresher.value is not None for refresher in refreshers},
+    }
+    return JSONResponse(body, status_code=200 if ready else 503)
+
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    """Prometheus metrics."""
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
@@ -0,0 +1,80 @@
+import asyncio
+import time
+from prometheus_client import Counter, Gauge, Histogram
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+REQUEST_LATENCY = Histogram(
+    "http_request_duration_seconds",
+    "API request latency by route template",
+    ["method", "route", "status"],
+    buckets=LATENCY_BUCKETS,
+)
+
+UPSTREAM_LATENCY = Histogram(
+    "upstream_request_duration_seconds",
+    "Upstream API call latency (time to response headers)",
+    ["host", "status"],
+    buckets=LATENCY_BUCKETS,
+)
+
+UPSTREAM_IN_FLIGHT = Gauge(
+    "upstream_requests_in_flight",
+    "Upstream API calls currently in progress",
+    ["host"],
+)
+
+CACHE_EVENTS = Counter(
+    "cache_events_total",
+    "Cache lookups by cache name and result (hit, miss, stale)",
+    ["cache", "result"],
+)
+
+EVENT_LOOP_LAG = Gauge(
+    "event_loop_lag_seconds",
+    "Most recent event loop scheduling delay",
+)
+
+CHART_RENDER = Histogram(
+    "chart_render_duration_seconds",
+    "Time spent rendering chart images",
+    ["kind"],
+    buckets=(0.05, 0.1, 0.25, 0.5, 1.0, 2.0, 5.0, 10.0),
+)
+
+FALLBACKS = Counter(
+    "upstream_fallbacks_total",
+    "Requests served by a fallback source after the primary failed",
+    ["route", "from_source", "to_source"],
+)
+
+ALERT_EVENTS = Counter(
+    "alert_events_total",
+    "Price alert events by result (fired, delivered, failed, dropped)",
+    ["result"],
+)
+
+SCHEDULED_REFRESHES = Counter(
+    "scheduled_refreshes_total",
+    "Background refreshes of hot cache keys by kind and result (ok, error, throttled)",
+    ["kind", "result"],
+)
+
+ADMISSION_REJECTIONS = Counter(
+    "admission_rejections_total",
+    "Requests refused by admission control by reason (rate_limit, concurrency, overload) and route class",
+    ["reason", "route_class"],
+)
+
+# Latest measured lag, readable without going through the metrics registry
+loop_lag = 0.0
+
+
+async def monitor_event_loop_lag(interval: float = 0.5) -> None:
+    """Measure how late the event loop wakes up from a fixed sleep."""
+    global loop_lag
+    while True:
+        start = time.perf_counter()
+        await asyncio.sleep(interval)
+        loop_lag = max(0.0, time.perf_counter() - start - interval)
+        EVENT_LOOP_LAG.set(loop_lag)
@@ -1,6 +1,6 @@
 from pydantic import BaseModel
 from datetime import datetime
-from typing import Optional
+from typing import Literal, Optional
 
 
 class PriceResponse(BaseModel):
@@ -12,6 +12,27 @@ class PriceResponse(BaseModel):
     volume_24h: Optional[float] = None
     last_updated: Optional[datetime] = None
     source: str = "unknown"  # "binance" or "coingecko"
+    vs_currency: str = "usd"
+    price: Optional[float] = None  # price in vs_currency
+    conversion_path: Optional[list[str]] = None  # e.g. ["XYZ", "BTC", "EUR"]
+    stale: bool = False  # last known good price, or converted at an out-of-date rate
+
+
+class SparklineResponse(BaseModel):
+    symbol: str
+    window: str
+    resolution: int  # seconds per point before downsampling, 0 = raw ticks
+    timestamps: list[float]
+    prices: list[float]
+
+
+class PriceStatsResponse(BaseModel):
+    symbol: str
+    price: float
+    last_updated: datetime
+    changes: dict[str, Optional[float]]  # % change over 1m, 5m, 15m, 1h, 24h
+    high_24h: Optional[float] = None
+    low_24h: Optional[float] = None
 
 
 class HistoricalDataPoint(BaseModel):
@@ -31,15 +52,21 @@ class HistoryResponse(BaseModel):
 
 
 class TopCoin(BaseModel):
-    rank: int
+    rank: Optional[int] = None
     symbol: str
-    name: str
-    price_usd: float
+    name: Optional[str] = None
+    price_usd: Optional[float] = None
     market_cap: Optional[float] = None
+    volume_24h: Optional[float] = None
     price_change_24h: Optional[float] = None
+    price: Optional[float] = None  # price in vs_currency
+    sparkline: Optional[list[float]] = None  # 7d hourly prices in vs_currency
 
 
 class TopCoinsResponse(BaseModel):
+    vs_currency: str = "usd"
+    total: Optional[int] = None  # coins matching the filters, before offset/limit
+    stale: bool = False  # market snapshot or quote rate is out of date (upstream failing)
     coins: list[TopCoin]
 
 
@@ -48,9 +75,15 @@ class TrendingCoin(BaseModel):
     name: str
     market_cap_rank: Optional[int] = None
     price_btc: Optional[float] = None
+    # source=local only
+    score: Optional[float] = None  # share of recent requests x momentum
+    requests: Optional[float] = None  # decayed request count
+    requests_error: Optional[float] = None  # upper bound on overcount
+    price_change_24h: Optional[float] = None
 
 
 class TrendingResponse(BaseModel):
+    source: str = "coingecko"
     coins: list[TrendingCoin]
 
 
@@ -60,5 +93,74 @@ class FearGreedResponse(BaseModel):
     timestamp: datetime
 
 
+class FearGreedHistoryResponse(BaseModel):
+    count: int
+    data: list[FearGreedResponse]
+
+
+class FearGreedCorrelationResponse(BaseModel):
+    symbol: str
+    days: int
+    points: int  # days where both series have a value
+    correlation_price: Optional[float] = None
+    correlation_same_day_return: Optional[float] = None
+    correlation_next_day_return: Optional[float] = None
+
+
+class AlertCreate(BaseModel):
+    symbol: str
+    condition: Literal["above", "below", "change"]
+    threshold: float  # price in USD for above/below, percent for change
+    window: Optional[str] = None  # change rules only, e.g. "1h"
+    webhook_url: str
+    repeat: bool = False  # keep firing (with a cooldown) instead of once
+
+
+class AlertResponse(BaseModel):
+    id: str
+    symbol: str
+    condition: str
+    threshold: float
+    window: Optional[str] = None
+    webhook_url: str
+    repeat: bool
+    created_at: datetime
+    fired_at: Optional[datetime] = None
+    alert_key: Optional[str] = None  # only when a new key was generated on create
+
+
+class AlertListResponse(BaseModel):
+    count: int
+    alerts: list[AlertResponse]
+
+
+class VenueQuote(BaseModel):
+    exchange: str
+    pair: str  # e.g. "BTC/USDT"
+    price_usd: float
+    bid: Optional[float] = None
+    ask: Optional[float] = None
+    spread_pct: Optional[float] = None
+    volume_24h_usd: Optional[float] = None
+    source: str  # "binance" (top of book) or "coingecko" (bid/ask from reported spread)
+
+
+class CompareResponse(BaseModel):
+    symbol: str
+    coin_id: str
+    venues: list[VenueQuote]
+    best_bid: Optional[float] = None
+    best_bid_exchange: Optional[str] = None
+    best_ask: Optional[float] = None
+    best_ask_exchange: Optional[str] = None
+    spread: Optional[float] = None  # best ask - best bid, USD
+    spread_pct: Optional[float] = None
+    crossed: bool = False  # best bid above best ask: an arbitrage window
+    vwap: Optional[float] = None  # weighted by 24h USD volume
+    unavailable: list[str] = []  # exchanges that failed or do not list the coin
+    timed_out: list[str] = []  # exchanges that missed the deadline
+    elapsed_ms: float
+
+
 class ErrorResponse(BaseModel):
     detail: str
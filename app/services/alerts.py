@@ -0,0 +1,566 @@
+import asyncio
+import bisect
+import fcntl
+import hashlib
+import ipaddress
+import json
+import os
+import secrets
+import socket
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Callable, Optional
+from urllib.parse import urlsplit
+import httpcore
+import httpx
+from app.config import get_settings
+from app.metrics import ALERT_EVENTS
+from app.services.binance import binance_service
+from app.services.rates import rate_service
+from app.services.timeseries import timeseries_service
+
+# Seconds before the first webhook retry; doubled on each further attempt
+RETRY_BACKOFF = 1.0
+
+# The rule log is rewritten with only live rules once it holds at least this
+# many entries and more of them are dead (deletes, fired, removed rules) than live
+COMPACT_MIN_ENTRIES = 1000
+
+
+@dataclass
+class AlertRule:
+    id: str
+    symbol: str
+    condition: str  # "above", "below" or "change"
+    threshold: float  # price for above/below, percent for change
+    webhook_url: str
+    window: int = 0  # seconds, change rules only
+    repeat: bool = False
+    created_at: float = 0.0
+    fired_at: float = 0.0
+    owner: str = ""  # hash of the creator's alert key
+    client: str = ""  # hash of the creating client, for the per-client cap
+
+
+def owner_id(key: str) -> str:
+    """Stored form of an alert key or client; neither is written to disk as is."""
+    return hashlib.sha256(key.encode()).hexdigest()
+
+
+class AlertLimitReached(Exception):
+    """A rule was refused because its client, or the whole service, holds the most rules allowed."""
+
+    def __init__(self, detail: str, per_client: bool):
+        super().__init__(detail)
+        self.per_client = per_client
+
+
+class ThresholdIndex:
+    """Rule ids kept sorted by threshold for range lookups."""
+
+    def __init__(self):
+        self.keys: list[float] = []
+        self.ids: list[str] = []
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def add(self, key: float, rule_id: str) -> None:
+        i = bisect.bisect_right(self.keys, key)
+        self.keys.insert(i, key)
+        self.ids.insert(i, rule_id)
+
+    def remove(self, key: float, rule_id: str) -> None:
+        i = bisect.bisect_left(self.keys, key)
+        while i < len(self.keys) and self.keys[i] == key:
+            if self.ids[i] == rule_id:
+                del self.keys[i], self.ids[i]
+                return
+            i += 1
+
+    def crossed(self, low: float, high: float) -> list[str]:
+        """Ids with ``low < threshold <= high``."""
+        return self.ids[bisect.bisect_right(self.keys, low):bisect.bisect_right(self.keys, high)]
+
+
+class SymbolRules:
+    """
+    Threshold indexes for one symbol.
+
+    "below" thresholds are stored negated so a downward cross is the same
+    half-open range lookup as an upward one. Change rules are indexed per
+    window by percent and fire when the absolute move over the window rises
+    past their threshold.
+    """
+
+    def __init__(self):
+        self.above = ThresholdIndex()
+        self.below = ThresholdIndex()
+        self.changes: dict[int, ThresholdIndex] = {}
+        self.last_price: Optional[float] = None
+        self.last_change: dict[int, float] = {}
+
+    def __len__(self) -> int:
+        return len(self.above) + len(self.below) + sum(len(index) for index in self.changes.values())
+
+    def _index(self, rule: AlertRule) -> tuple[ThresholdIndex, float]:
+        if rule.condition == "above":
+            return self.above, rule.threshold
+        if rule.condition == "below":
+            return self.below, -rule.threshold
+        return self.changes.setdefault(rule.window, ThresholdIndex()), rule.threshold
+
+    def add(self, rule: AlertRule) -> None:
+        index, key = self._index(rule)
+        index.add(key, rule.id)
+
+    def remove(self, rule: AlertRule) -> None:
+        index, key = self._index(rule)
+        index.remove(key, rule.id)
+        if rule.condition == "change" and not index:
+            del self.changes[rule.window]
+            self.last_change.pop(rule.window, None)
+
+    def match(self, price: float, reference: Callable[[int], Optional[float]]) -> list[tuple[str, Optional[float]]]:
+        """
+        Rules triggered by a new price, as (rule id, % change or None).
+
+        ``reference(window)`` returns the price ``window`` seconds ago.
+        """
+        matched = []
+        previous, self.last_price = self.last_price, price
+        if previous is not None and price > previous:
+            matched += [(rule_id, None) for rule_id in self.above.crossed(previous, price)]
+        elif previous is not None and price < previous:
+            matched += [(rule_id, None) for rule_id in self.below.crossed(-previous, -price)]
+
+        for window, index in self.changes.items():
+            base = reference(window)
+            if not base:
+                continue
+            change = (price / base - 1) * 100
+            previous_change = self.last_change.get(window, 0.0)
+            self.last_change[window] = abs(change)
+            if abs(change) > previous_change:
+                matched += [(rule_id, change) for rule_id in index.crossed(previous_change, abs(change))]
+        return matched
+
+
+def public_address(address: str) -> bool:
+    ip = ipaddress.ip_address(address.split("%", 1)[0])
+    if ip.version == 6 and ip.ipv4_mapped is not None:
+        ip = ip.ipv4_mapped
+    return not (
+        ip.is_private or ip.is_loopback or ip.is_link_local
+        or ip.is_multicast or ip.is_reserved or ip.is_unspecified
+    )
+
+
+async def resolve(host: str, port: int) -> list[str]:
+    infos = await asyncio.get_running_loop().getaddrinfo(host, port, type=socket.SOCK_STREAM)
+    return [info[4][0] for info in infos]
+
+
+async def public_addresses(host: str, port: int) -> list[str]:
+    """The addresses ``host`` resolves to, or none unless every one is public."""
+    try:
+        addresses = await resolve(host, port)
+        if all(public_address(address) for address in addresses):
+            return addresses
+    except (ValueError, OSError):
+        pass
+    return []
+
+
+async def webhook_allowed(url: str) -> bool:
+    """
+    Whether a webhook URL may be called: http(s) to a host whose every
+    resolved address is public, so alerts cannot reach internal services.
+    """
+    try:
+        parts = urlsplit(url)
+        if parts.scheme not in ("http", "https") or not parts.hostname:
+            return False
+        if get_settings().alert_allow_private_webhooks:
+            return True
+        port = parts.port or (443 if parts.scheme == "https" else 80)
+    except ValueError:
+        return False
+    return bool(await public_addresses(parts.hostname, port))
+
+
+class WebhookRefused(Exception):
+    """A webhook host resolved to a non-public address when connecting."""
+
+
+class PublicOnlyBackend(httpcore.AsyncNetworkBackend):
+    """
+    Network backend that connects only to public addresses.
+
+    The host is resolved here and the socket is opened to the address that
+    passed the check, so a DNS answer that changes after the rule was
+    created (or between a check and the connect) cannot reach an internal
+    service. TLS still verifies the certificate against the host name.
+    """
+
+    def __init__(self):
+        self.backend = httpcore.AnyIOBackend()
+
+    async def connect_tcp(self, host: str, port: int, timeout: Optional[float] = None,
+                          local_address: Optional[str] = None, socket_options=None) -> httpcore.AsyncNetworkStream:
+        if not get_settings().alert_allow_private_webhooks:
+            try:
+                addresses = await asyncio.wait_for(public_addresses(host, port), timeout)
+            except asyncio.TimeoutError:
+                raise httpcore.ConnectTimeout(f"Resolving {host} timed out")
+            if not addresses:
+                raise WebhookRefused(f"{host} does not resolve to public addresses only")
+            host = addresses[0]
+        return await self.backend.connect_tcp(
+            host, port, timeout=timeout, local_address=local_address, socket_options=socket_options
+        )
+
+    async def connect_unix_socket(self, path: str, timeout: Optional[float] = None,
+                                  socket_options=None) -> httpcore.AsyncNetworkStream:
+        raise WebhookRefused("webhooks cannot use unix sockets")
+
+    async def sleep(self, seconds: float) -> None:
+        await self.backend.sleep(seconds)
+
+
+class WebhookDispatcher:
+    """
+    Deliver alert events to webhooks from a bounded queue.
+
+    Events queued for the same URL are POSTed together as one batch, and
+    failed deliveries are retried with exponential backoff. When the queue
+    is full new events are dropped and counted rather than slowing down
+    price processing. Webhooks use their own client, without redirects,
+    outside the per-host upstream metrics and connecting through
+    ``PublicOnlyBackend``.
+    """
+
+    def __init__(self):
+        self.settings = get_settings()
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=self.settings.alert_queue_size)
+        self._client: Optional[httpx.AsyncClient] = None
+
+    def client(self) -> httpx.AsyncClient:
+        if self._client is None or self._client.is_closed:
+            transport = httpx.AsyncHTTPTransport()
+            # httpx does not expose the network backend, so swap it on the pool
+            transport._pool._network_backend = PublicOnlyBackend()
+            self._client = httpx.AsyncClient(transport=transport, timeout=5.0, follow_redirects=False)
+        return self._client
+
+    async def close(self) -> None:
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    def submit(self, url: str, event: dict) -> bool:
+        try:
+            self.queue.put_nowait((url, event))
+        except asyncio.QueueFull:
+            ALERT_EVENTS.labels("dropped").inc()
+            return False
+        return True
+
+    async def deliver(self, url: str, events: list[dict]) -> bool:
+        for attempt in range(self.settings.alert_retries + 1):
+            if attempt:
+                await asyncio.sleep(RETRY_BACKOFF * 2 ** (attempt - 1))
+            try:
+                response = await self.client().post(url, json={"alerts": events})
+                if response.status_code < 300:
+                    ALERT_EVENTS.labels("delivered").inc(len(events))
+                    return True
+                # Client errors other than rate limiting will not succeed on retry
+                if response.status_code < 500 and response.status_code != 429:
+                    break
+            except WebhookRefused as e:
+                print(f"Webhook delivery to {url} refused: {e}")
+                break
+            except httpx.HTTPError as e:
+                print(f"Webhook delivery to {url} failed: {e}")
+        ALERT_EVENTS.labels("failed").inc(len(events))
+        return False
+
+    async def _worker(self) -> None:
+        while True:
+            batch = [await self.queue.get()]
+            while len(batch) < self.settings.alert_batch_size and not self.queue.empty():
+                batch.append(self.queue.get_nowait())
+
+            by_url: dict[str, list[dict]] = {}
+            for url, event in batch:
+                by_url.setdefault(url, []).append(event)
+            for url, events in by_url.items():
+                await self.deliver(url, events)
+
+    async def run(self) -> None:
+        await asyncio.gather(*(self._worker() for _ in range(self.settings.alert_dispatch_concurrency)))
+
+
+def apply_entry(entry: dict, rules: dict[str, AlertRule], symbols: dict[str, SymbolRules]) -> None:
+    """Apply one rule log entry to the rules and their per-symbol indexes."""
+    if entry["op"] == "add":
+        rule = AlertRule(**entry["rule"])
+        rules[rule.id] = rule
+        symbols.setdefault(rule.symbol, SymbolRules()).add(rule)
+        return
+
+    rule = rules.get(entry["id"])
+    if rule is None:
+        return
+    if entry["op"] == "fired":
+        rule.fired_at = entry["t"]
+        if rule.repeat:
+            return
+    # One-shot rules are removed once fired
+    del rules[rule.id]
+    symbols[rule.symbol].remove(rule)
+    if not symbols[rule.symbol]:
+        del symbols[rule.symbol]
+
+
+class AlertEngine:
+    """
+    Price alert rules matched against every Binance ticker snapshot.
+
+    Rules are kept in an append-only log under ``data_dir`` so every worker
+    sees the same set; only the worker leading the ticker refresh evaluates
+    them, so each alert fires once. Each snapshot costs one index lookup
+    per symbol that has rules. Writers hold a lock file, and when dead
+    entries dominate the log is replaced by one holding only live rules;
+    other workers notice the new file and read it from the start.
+
+    Reading, locking and writing the log run in worker threads; the event
+    loop only applies the parsed entries and matches prices.
+    """
+
+    def __init__(self):
+        self.settings = get_settings()
+        self.path = Path(self.settings.data_dir) / "alerts.jsonl"
+        self.lock_path = self.path.with_suffix(".lock")
+        self.rules: dict[str, AlertRule] = {}
+        self.symbols: dict[str, SymbolRules] = {}
+        self.dispatcher = WebhookDispatcher()
+        self._offset = 0
+        self._inode: Optional[int] = None
+        self._entries = 0
+        # Serialises log access within this worker
+        self._io = asyncio.Lock()
+        self._evaluation: Optional[asyncio.Task] = None
+        binance_service.tickers.listeners.append(self.on_tickers)
+
+    def _read(self, inode: Optional[int], offset: int) -> tuple[Optional[int], int, list[dict]]:
+        """
+        Parse entries written after ``offset``, or from the start if the log
+        is no longer the file ``inode``. Runs in a thread.
+        """
+        try:
+            f = open(self.path, "rb")
+        except FileNotFoundError:
+            return inode, offset, []
+        with f:
+            current = os.fstat(f.fileno()).st_ino
+            if current != inode:
+                offset = 0
+            f.seek(offset)
+            data = f.read()
+        end = data.rfind(b"\n") + 1
+        return current, offset + end, [json.loads(line) for line in data[:end].splitlines() if line]
+
+    @staticmethod
+    def _build(entries: list[dict]) -> tuple[dict, dict]:
+        rules: dict[str, AlertRule] = {}
+        symbols: dict[str, SymbolRules] = {}
+        for entry in entries:
+            apply_entry(entry, rules, symbols)
+        return rules, symbols
+
+    async def _sync(self) -> None:
+        """Apply entries written since the last read (caller holds ``_io``)."""
+        inode, offset, entries = await asyncio.to_thread(self._read, self._inode, self._offset)
+        if inode != self._inode:
+            # First read, or the log was compacted: rebuild from the start
+            previous = self.symbols
+            self.rules, self.symbols = await asyncio.to_thread(self._build, entries)
+            self._inode, self._entries = inode, 0
+            # Keep measuring crossings from the prices already seen
+            for symbol, rules in self.symbols.items():
+                if symbol in previous:
+                    rules.last_price = previous[symbol].last_price
+                    rules.last_change = {w: c for w, c in previous[symbol].last_change.items() if w in rules.changes}
+        else:
+            for entry in entries:
+                apply_entry(entry, self.rules, self.symbols)
+        self._offset = offset
+        self._entries += len(entries)
+
+        # Crossings for new symbols are measured from the price when the rule was added
+        tickers = binance_service.tickers.value
+        added = {entry["rule"]["symbol"] for entry in entries if entry["op"] == "add"}
+        for symbol in added if tickers else ():
+            rules = self.symbols.get(symbol)
+            if rules is not None and rules.last_price is None:
+                rules.last_price = self._price(symbol, tickers)
+
+    async def reload(self) -> None:
+        """Apply log entries written since the last read (by any worker)."""
+        async with self._io:
+            await self._sync()
+
+    def _lock(self):
+        """Open and hold the rule log's write lock (shared by all workers). Runs in a thread."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        lock = open(self.lock_path, "a")
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        return lock
+
+    def _append(self, entries: list[dict]) -> None:
+        with open(self.path, "a") as f:
+            f.write("".join(json.dumps(entry, separators=(",", ":")) + "\n" for entry in entries))
+
+    async def _write(self, make_entries: Callable[[], list[dict]]) -> list[dict]:
+        """
+        Append the entries ``make_entries`` returns while holding the lock.
+
+        It is called once the log is read up to the lock, so checks made in
+        it see every worker's writes. Returns the entries written.
+        """
+        async with self._io:
+            lock = await asyncio.to_thread(self._lock)
+            try:
+                await self._sync()
+                entries = make_entries()
+                if entries:
+                    await asyncio.to_thread(self._append, entries)
+                    await self._sync()
+                    if self._entries >= COMPACT_MIN_ENTRIES and self._entries > 2 * len(self.rules):
+                        await self._compact()
+                return entries
+            finally:
+                lock.close()
+
+    def _rewrite(self, rules: list[AlertRule]) -> None:
+        tmp = self.path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp, "w") as f:
+            f.write("".join(
+                json.dumps({"op": "add", "rule": asdict(rule)}, separators=(",", ":")) + "\n"
+                for rule in rules
+            ))
+        tmp.replace(self.path)
+
+    async def _compact(self) -> None:
+        """Replace the log with one add entry per live rule (caller holds the lock)."""
+        await asyncio.to_thread(self._rewrite, list(self.rules.values()))
+        await self._sync()
+
+    async def add(self, owner: str, client: str, symbol: str, condition: str, threshold: float, webhook_url: str, window: int = 0, repeat: bool = False) -> AlertRule:
+        """
+        Store a new rule. The per-client and total caps are checked under the
+        log lock, so concurrent creates on any worker cannot exceed them.
+        """
+        rule = AlertRule(
+            id=secrets.token_hex(8),
+            symbol=symbol.upper(),
+            condition=condition,
+            threshold=threshold,
+            webhook_url=webhook_url,
+            window=window,
+            repeat=repeat,
+            created_at=time.time(),
+            owner=owner,
+            client=client,
+        )
+
+        def entries() -> list[dict]:
+            per_client = self.settings.alert_max_rules_per_client
+            if sum(1 for existing in self.rules.values() if existing.client == client) >= per_client:
+                raise AlertLimitReached(f"At most {per_client} alerts per client", per_client=True)
+            if len(self.rules) >= self.settings.alert_max_rules:
+                raise AlertLimitReached("Alert capacity reached, retry later", per_client=False)
+            return [{"op": "add", "rule": asdict(rule)}]
+
+        await self._write(entries)
+        return self.rules[rule.id]
+
+    def _owned(self, owner: str, rule_id: str) -> Optional[AlertRule]:
+        rule = self.rules.get(rule_id)
+        return rule if rule is not None and rule.owner == owner else None
+
+    async def remove(self, owner: str, rule_id: str) -> bool:
+        written = await self._write(lambda: [{"op": "delete", "id": rule_id}] if self._owned(owner, rule_id) else [])
+        return bool(written)
+
+    async def get(self, owner: str, rule_id: str) -> Optional[AlertRule]:
+        await self.reload()
+        return self._owned(owner, rule_id)
+
+    async def list_rules(self, owner: str, symbol: Optional[str] = None) -> list[AlertRule]:
+        await self.reload()
+        rules = [rule for rule in self.rules.values() if rule.owner == owner]
+        if symbol:
+            rules = [rule for rule in rules if rule.symbol == symbol.upper()]
+        return sorted(rules, key=lambda rule: rule.created_at)
+
+    def _price(self, symbol: str, tickers: dict) -> Optional[float]:
+        ticker = tickers.get(f"{symbol}USDT")
+        if ticker is not None:
+            return ticker[0]
+        conversion = rate_service.convert(symbol, "USDT")
+        return conversion.rate if conversion is not None else None
+
+    def on_tickers(self, tickers: dict) -> None:
+        if not binance_service.tickers.is_leader:
+            return
+        # Skipping a snapshot while the last one is evaluated misses nothing:
+        # crossings are measured from the last price each symbol was matched at
+        if self._evaluation is not None and not self._evaluation.done():
+            return
+        self._evaluation = asyncio.get_running_loop().create_task(
+            self.evaluate(tickers, binance_service.tickers.updated_at)
+        )
+
+    async def evaluate(self, tickers: dict, now: float) -> None:
+        """Match a ticker snapshot against the rules and queue the webhooks."""
+        try:
+            await self.reload()
+            fired = []
+            for symbol, rules in self.symbols.items():
+                price = self._price(symbol, tickers)
+                if price is None:
+                    continue
+                # Change rules need history even for symbols outside the recorded top pairs
+                timeseries_service.record(symbol, price, now)
+                series = timeseries_service.get(symbol)
+
+                def reference(window: int) -> Optional[float]:
+                    return series.price_at(now - window) if series is not None else None
+
+                for rule_id, change in rules.match(price, reference):
+                    rule = self.rules[rule_id]
+                    if rule.repeat and now - rule.fired_at < self.settings.alert_cooldown:
+                        continue
+                    ALERT_EVENTS.labels("fired").inc()
+                    self.dispatcher.submit(rule.webhook_url, {
+                        "alert_id": rule.id,
+                        "symbol": rule.symbol,
+                        "condition": rule.condition,
+                        "threshold": rule.threshold,
+                        "window": rule.window or None,
+                        "price": price,
+                        "change_pct": change,
+                        "triggered_at": now,
+                    })
+                    fired.append({"op": "fired", "id": rule.id, "t": now})
+            if fired:
+                await self._write(lambda: fired)
+        except Exception as e:
+            print(f"Alert evaluation failed: {e}")
+
+
+alert_engine = AlertEngine()
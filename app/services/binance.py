@@ -1,11 +1,20 @@
-import httpx
 from typing import Optional
 from datetime import datetime, timezone
+from app.config import get_settings
+from app.services.http import upstream_client
+from app.cache.leader import SnapshotRefresher
 
 
 class BinanceService:
     def __init__(self):
-        self.base_url = "https://api.binance.com"
+        self.settings = get_settings()
+        self.base_url = self.settings.binance_base_url
+        # All-market 24h ticker, refreshed in the background by one worker
+        self.tickers = SnapshotRefresher(
+            "binance_tickers",
+            self.settings.ticker_refresh_interval,
+            self.fetch_ticker_snapshot,
+        )
 
     def _format_symbol(self, symbol: str) -> str:
         """Convert symbol to Binance format (e.g., btc -> BTCUSDT)."""
@@ -14,10 +23,51 @@ class BinanceService:
             symbol = f"{symbol}USDT"
         return symbol
 
+    def _price_dict(self, symbol: str, last: float, change: float, volume: float, updated: datetime) -> dict:
+        return {
+            "symbol": symbol.upper(),
+            "name": None,  # Binance doesn't provide coin name
+            "price_usd": last,
+            "price_change_24h": change,
+            "market_cap": None,  # Binance doesn't provide market cap
+            "volume_24h": volume,
+            "last_updated": updated.isoformat(),
+            "source": "binance",
+        }
+
+    async def fetch_ticker_snapshot(self) -> dict:
+        """
+        Get 24h stats for every trading pair in a single call.
+
+        Returns:
+            Dict of pair symbol -> [last, change %, quote volume, bid, ask]
+        """
+        async with upstream_client() as client:
+            response = await client.get(
+                f"{self.base_url}/api/v3/ticker/24hr",
+                timeout=10.0,
+            )
+
+            if response.status_code == 200:
+                return {
+                    item["symbol"]: [
+                        float(item.get("lastPrice", 0)),
+                        float(item.get("priceChangePercent", 0)),
+                        float(item.get("quoteVolume", 0)),
+                        float(item.get("bidPrice", 0)),
+                        float(item.get("askPrice", 0)),
+                    ]
+                    for item in response.json()
+                }
+            return {}
+
     async def get_price(self, symbol: str) -> Optional[dict]:
         """
         Get current price and 24h stats for a trading pair.
 
+        Served from the all-market ticker snapshot when it is fresh, which
+        also answers "not listed" without a round trip.
+
         Args:
             symbol: Coin symbol (e.g., "BTC", "ETH", "SOL")
 
@@ -26,7 +76,14 @@ class BinanceService:
         """
         binance_symbol = self._format_symbol(symbol)
 
-        async with httpx.AsyncClient() as client:
+        if self.tickers.is_fresh():
+            ticker = self.tickers.value.get(binance_symbol)
+            if ticker is None:
+                return None
+            updated = datetime.fromtimestamp(self.tickers.updated_at, timezone.utc)
+            return self._price_dict(symbol, ticker[0], ticker[1], ticker[2], updated)
+
+        async with upstream_client() as client:
             response = await client.get(
                 f"{self.base_url}/api/v3/ticker/24hr",
                 params={"symbol": binance_symbol},
@@ -35,21 +92,18 @@ class BinanceService:
 
             if response.status_code == 200:
                 data = response.json()
-                return {
-                    "symbol": symbol.upper(),
-                    "name": None,  # Binance doesn't provide coin name
-                    "price_usd": float(data.get("lastPrice", 0)),
-                    "price_change_24h": float(data.get("priceChangePercent", 0)),
-                    "market_cap": None,  # Binance doesn't provide market cap
-                    "volume_24h": float(data.get("quoteVolume", 0)),
-                    "last_updated": datetime.now(timezone.utc).isoformat(),
-                    "source": "binance",
-                }
+                return self._price_dict(
+                    symbol,
+                    float(data.get("lastPrice", 0)),
+                    float(data.get("priceChangePercent", 0)),
+                    float(data.get("quoteVolume", 0)),
+                    datetime.now(timezone.utc),
+                )
             return None
 
     async def get_all_prices(self) -> list[dict]:
         """Get prices for all USDT trading pairs."""
-        async with httpx.AsyncClient() as client:
+        async with upstream_client() as client:
             response = await client.get(
                 f"{self.base_url}/api/v3/ticker/price",
                 timeout=10.0,
@@ -1,16 +1,71 @@
+import asyncio
+import time
 import httpx
 from typing import Optional
 from app.config import get_settings
+from app.services.http import upstream_client
+from app.cache import get_cache
+from app.cache.leader import SnapshotRefresher
+from app.services.scheduler import refresh_scheduler
+from app.services.last_known_good import last_known_good
+
+# Cache lifetimes (seconds)
+SEARCH_TTL = 24 * 3600  # symbol -> id mapping almost never changes
+SEARCH_MISS_TTL = 3600
+COIN_TTL = 60
+OHLC_TTL = 300
+EXCHANGE_TICKERS_TTL = 60
+# Cached in place of tickers for exchanges CoinGecko does not know
+UNKNOWN_EXCHANGE = {"unknown_exchange": True}
+
+OHLC_COLUMNS = ("date", "open", "high", "low", "close", "volume", "market_cap")
 
 
 class CoinGeckoService:
     def __init__(self):
         self.settings = get_settings()
         self.base_url = self.settings.coingecko_base_url
+        # BTC -> fiat rates, refreshed in the background by one worker
+        self.fiat_rates = SnapshotRefresher("fiat_rates", 600, self.get_exchange_rates)
+        # Hot coins and OHLC windows are refreshed ahead of expiry
+        refresh_scheduler.register(
+            "coin",
+            lambda coin_id: self.get_price(coin_id, refresh=True),
+            ttl=COIN_TTL,
+            min_interval=15,
+            budget="coingecko",
+        )
+        refresh_scheduler.register(
+            "ohlc",
+            self._refresh_ohlc,
+            ttl=OHLC_TTL,
+            min_interval=60,
+            budget="coingecko",
+        )
+        refresh_scheduler.register(
+            "exchange_tickers",
+            self._refresh_exchange_tickers,
+            ttl=EXCHANGE_TICKERS_TTL,
+            min_interval=20,
+            budget="coingecko",
+        )
+
+    async def get_price(self, coin_id: str, refresh: bool = False) -> Optional[dict]:
+        """
+        Get current price for a coin by its CoinGecko ID.
+
+        ``refresh`` bypasses the cache (used by the refresh scheduler).
+        """
+        cache = get_cache()
+        cache_key = f"cg:coin:{coin_id}"
+        if not refresh:
+            cached = await cache.get_json(cache_key, "coingecko_coin")
+            if cached:
+                refresh_scheduler.touch("coin", coin_id)
+            if cached is not None:
+                return cached or None
 
-    async def get_price(self, coin_id: str) -> Optional[dict]:
-        """Get current price for a coin by its CoinGecko ID."""
-        async with httpx.AsyncClient() as client:
+        async with upstream_client() as client:
             response = await client.get(
                 f"{self.base_url}/coins/{coin_id}",
                 params={
@@ -23,7 +78,7 @@ class CoinGeckoService:
             )
             if response.status_code == 200:
                 data = response.json()
-                return {
+                result = {
                     "symbol": data.get("symbol", "").upper(),
                     "name": data.get("name"),
                     "price_usd": data.get("market_data", {}).get("current_price", {}).get("usd"),
@@ -32,18 +87,28 @@ class CoinGeckoService:
                     "volume_24h": data.get("market_data", {}).get("total_volume", {}).get("usd"),
                     "last_updated": data.get("last_updated"),
                 }
+                await cache.set_json(cache_key, result, ttl=COIN_TTL)
+                if not refresh:
+                    refresh_scheduler.touch("coin", coin_id, fetched=True)
+                return result
+            if response.status_code == 404:
+                await cache.set_json(cache_key, {}, ttl=COIN_TTL)
             return None
 
-    async def get_top_coins(self, limit: int = 100) -> list[dict]:
-        """Get top coins by market cap."""
-        async with httpx.AsyncClient() as client:
+    async def get_markets_page(self, page: int = 1, per_page: int = 100) -> list[dict]:
+        """Get one page of coins ordered by market cap."""
+        return await self._fetch_markets_page(page, per_page) or []
+
+    async def _fetch_markets_page(self, page: int, per_page: int) -> Optional[list[dict]]:
+        """One page of the market list, or None if CoinGecko did not answer 200."""
+        async with upstream_client() as client:
             response = await client.get(
                 f"{self.base_url}/coins/markets",
                 params={
                     "vs_currency": "usd",
                     "order": "market_cap_desc",
-                    "per_page": limit,
-                    "page": 1,
+                    "per_page": per_page,
+                    "page": page,
                     "sparkline": "false",
                 },
                 timeout=30.0,
@@ -52,20 +117,42 @@ class CoinGeckoService:
                 data = response.json()
                 return [
                     {
+                        "id": coin.get("id"),
                         "rank": coin.get("market_cap_rank"),
-                        "symbol": coin.get("symbol", "").upper(),
+                        "symbol": (coin.get("symbol") or "").upper(),
                         "name": coin.get("name"),
                         "price_usd": coin.get("current_price"),
                         "market_cap": coin.get("market_cap"),
+                        "volume_24h": coin.get("total_volume"),
                         "price_change_24h": coin.get("price_change_percentage_24h"),
                     }
                     for coin in data
                 ]
-            return []
+            return None
+
+    async def get_top_coins(self, limit: int = 100) -> list[dict]:
+        """Get top coins by market cap."""
+        return await self.get_markets_page(page=1, per_page=limit)
+
+    async def get_all_markets(self, pages: int, concurrency: int = 4) -> list[dict]:
+        """Page through the market list concurrently, 250 coins per page; raises if any page fails."""
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def fetch(page: int) -> Optional[list[dict]]:
+            async with semaphore:
+                return await self._fetch_markets_page(page, 250)
+
+        results = await asyncio.gather(*(fetch(page) for page in range(1, pages + 1)))
+        # A snapshot with a missing page would silently drop those coins; fail
+        # the refresh instead so the previous snapshot stays in place
+        failed = [page for page, result in enumerate(results, 1) if result is None]
+        if failed:
+            raise httpx.HTTPError(f"CoinGecko markets pages {failed} unavailable")
+        return [coin for page in results for coin in page]
 
     async def get_trending(self) -> list[dict]:
         """Get trending coins."""
-        async with httpx.AsyncClient() as client:
+        async with upstream_client() as client:
             response = await client.get(
                 f"{self.base_url}/search/trending",
                 timeout=30.0,
@@ -84,21 +171,122 @@ class CoinGeckoService:
                 ]
             return []
 
-    async def search_coin(self, query: str) -> Optional[str]:
-        """Search for a coin and return its CoinGecko ID."""
-        async with httpx.AsyncClient() as client:
+    async def get_exchange_rates(self) -> dict:
+        """Get the value of 1 BTC in every fiat currency CoinGecko tracks."""
+        async with upstream_client() as client:
             response = await client.get(
-                f"{self.base_url}/search",
-                params={"query": query},
+                f"{self.base_url}/exchange_rates",
                 timeout=30.0,
             )
             if response.status_code == 200:
-                data = response.json()
-                coins = data.get("coins", [])
-                if coins:
-                    # Return the first match's ID
-                    return coins[0].get("id")
+                rates = response.json().get("rates", {})
+                return {
+                    code.upper(): float(rate["value"])
+                    for code, rate in rates.items()
+                    if rate.get("type") == "fiat" and rate.get("value")
+                }
+            return {}
+
+    async def search_coin(self, query: str) -> Optional[str]:
+        """
+        Search for a coin and return its CoinGecko ID.
+
+        IDs found before a restart are reused from the last-known-good
+        snapshot while younger than SEARCH_TTL, and whatever their age if
+        CoinGecko cannot be reached.
+        """
+        cache = get_cache()
+        query = query.lower().strip()
+        cache_key = f"cg:search:{query}"
+        cached = await cache.get_json(cache_key, "symbol_index")
+        if cached is not None:
+            return cached or None
+
+        known = last_known_good.lookup("symbols", query)
+        if known is not None:
+            coin_id, recorded_at = known
+            remaining = SEARCH_TTL - (time.time() - recorded_at)
+            if remaining > 0:
+                await cache.set_json(cache_key, coin_id, ttl=remaining)
+                return coin_id
+
+        try:
+            async with upstream_client() as client:
+                response = await client.get(
+                    f"{self.base_url}/search",
+                    params={"query": query},
+                    timeout=30.0,
+                )
+        except httpx.HTTPError as e:
+            print(f"CoinGecko search for '{query}' failed: {e}")
+            response = None
+
+        if response is not None and response.status_code == 200:
+            data = response.json()
+            coins = data.get("coins", [])
+            # Return the first match's ID
+            coin_id = coins[0].get("id") if coins else None
+            await cache.set_json(cache_key, coin_id or "", ttl=SEARCH_TTL if coin_id else SEARCH_MISS_TTL)
+            if coin_id:
+                last_known_good.record("symbols", query, coin_id)
+            return coin_id
+        return known[0] if known is not None else None
+
+    async def _refresh_exchange_tickers(self, key: str) -> Optional[list[dict]]:
+        exchange_id, _, coin_id = key.partition(":")
+        return await self.get_exchange_tickers(exchange_id, coin_id or None, refresh=True)
+
+    async def get_exchange_tickers(self, exchange_id: str, coin_id: Optional[str] = None, refresh: bool = False) -> Optional[list[dict]]:
+        """
+        Get the first page of an exchange's tickers, optionally for one coin only.
+
+        Returns None if the exchange is unknown; other upstream failures
+        raise ``httpx.HTTPError``. ``refresh`` bypasses the cache.
+        """
+        cache = get_cache()
+        key = f"{exchange_id}:{coin_id or ''}"
+        cache_key = f"cg:exchange_tickers:{key}"
+        if not refresh:
+            cached = await cache.get_json(cache_key, "exchange_tickers")
+            if cached == UNKNOWN_EXCHANGE:
+                return None
+            if cached is not None:
+                refresh_scheduler.touch("exchange_tickers", key)
+                return cached
+
+        params = {"page": 1}
+        if coin_id:
+            params["coin_ids"] = coin_id
+        async with upstream_client() as client:
+            response = await client.get(
+                f"{self.base_url}/exchanges/{exchange_id}/tickers",
+                params=params,
+                timeout=15.0,
+            )
+        if response.status_code == 404:
+            await cache.set_json(cache_key, UNKNOWN_EXCHANGE, ttl=EXCHANGE_TICKERS_TTL)
             return None
+        response.raise_for_status()
+
+        tickers = [
+            {
+                "base": t.get("base"),
+                "target": t.get("target"),
+                "coin_id": t.get("coin_id"),
+                "last": t.get("last"),
+                "volume": t.get("volume"),
+                "last_usd": (t.get("converted_last") or {}).get("usd"),
+                "volume_usd": (t.get("converted_volume") or {}).get("usd"),
+                "spread": t.get("bid_ask_spread_percentage"),
+                "trade_url": t.get("trade_url"),
+                "trust_score": t.get("trust_score"),
+            }
+            for t in response.json().get("tickers", [])
+        ]
+        await cache.set_json(cache_key, tickers, ttl=EXCHANGE_TICKERS_TTL)
+        if not refresh:
+            refresh_scheduler.touch("exchange_tickers", key, fetched=True)
+        return tickers
 
     def _get_valid_ohlc_days(self, days: int) -> int:
         """Map requested days to valid CoinGecko OHLC API values."""
@@ -108,50 +296,78 @@ class CoinGeckoService:
                 return valid
         return 365
 
-    async def get_historical_data(self, coin_id: str, days: int = 30) -> list[dict]:
-        """Get historical OHLC data for a coin."""
+    async def _refresh_ohlc(self, key: str) -> Optional[dict]:
+        coin_id, _, api_days = key.rpartition(":")
+        return await self.get_historical_columns(coin_id, int(api_days), refresh=True)
+
+    async def get_historical_columns(self, coin_id: str, days: int = 30, refresh: bool = False) -> Optional[dict]:
+        """
+        Get historical OHLC data for a coin as columns.
+
+        Returns a dict of equal-length lists keyed by ``OHLC_COLUMNS``, or None
+        if CoinGecko has no data. ``refresh`` bypasses the cache.
+        """
         # CoinGecko OHLC API only accepts specific day values
         api_days = self._get_valid_ohlc_days(days)
 
-        async with httpx.AsyncClient() as client:
-            response = await client.get(
-                f"{self.base_url}/coins/{coin_id}/ohlc",
-                params={
-                    "vs_currency": "usd",
-                    "days": api_days,
-                },
-                timeout=30.0,
-            )
-            if response.status_code == 200:
-                data = response.json()
-                if isinstance(data, dict) and "error" in data:
-                    return []
-
-                from datetime import datetime
-                result = []
-                seen_dates = set()
-
-                for item in data:
-                    # item format: [timestamp, open, high, low, close]
-                    timestamp = item[0] / 1000  # Convert ms to seconds
-                    date_str = datetime.fromtimestamp(timestamp).strftime("%Y-%m-%d")
-
-                    # Only keep one entry per day (latest)
-                    if date_str not in seen_dates:
-                        seen_dates.add(date_str)
-                        result.append({
-                            "date": date_str,
-                            "open": float(item[1]) if item[1] else 0.0,
-                            "high": float(item[2]) if item[2] else 0.0,
-                            "low": float(item[3]) if item[3] else 0.0,
-                            "close": float(item[4]) if item[4] else 0.0,
-                            "volume": None,
-                            "market_cap": None,
-                        })
-
-                # Return only the requested number of days (most recent)
-                return result[-days:] if len(result) > days else result
+        cache = get_cache()
+        cache_key = f"cg:ohlc:{coin_id}:{api_days}"
+        columns = None
+        if not refresh:
+            columns = await cache.get_json(cache_key, "ohlc")
+        fetched = columns is None
+
+        if columns is None:
+            async with upstream_client() as client:
+                response = await client.get(
+                    f"{self.base_url}/coins/{coin_id}/ohlc",
+                    params={
+                        "vs_currency": "usd",
+                        "days": api_days,
+                    },
+                    timeout=30.0,
+                )
+            if response.status_code != 200:
+                return None
+            data = response.json()
+            if isinstance(data, dict) and "error" in data:
+                return None
+
+            from datetime import datetime
+            columns = {name: [] for name in OHLC_COLUMNS}
+            seen_dates = set()
+
+            for item in data:
+                # item format: [timestamp, open, high, low, close]
+                timestamp = item[0] / 1000  # Convert ms to seconds
+                date_str = datetime.fromtimestamp(timestamp).strftime("%Y-%m-%d")
+
+                # Only keep one entry per day (the first candle of the day)
+                if date_str not in seen_dates:
+                    seen_dates.add(date_str)
+                    columns["date"].append(date_str)
+                    columns["open"].append(float(item[1]) if item[1] else 0.0)
+                    columns["high"].append(float(item[2]) if item[2] else 0.0)
+                    columns["low"].append(float(item[3]) if item[3] else 0.0)
+                    columns["close"].append(float(item[4]) if item[4] else 0.0)
+                    columns["volume"].append(None)
+                    columns["market_cap"].append(None)
+
+            await cache.set_json(cache_key, columns, ttl=OHLC_TTL)
+
+        if not columns["date"]:
+            return None
+        if not refresh:
+            refresh_scheduler.touch("ohlc", f"{coin_id}:{api_days}", fetched=fetched)
+        # Return only the requested number of days (most recent)
+        return {name: values[-days:] for name, values in columns.items()}
+
+    async def get_historical_data(self, coin_id: str, days: int = 30) -> list[dict]:
+        """Get historical OHLC data for a coin."""
+        columns = await self.get_historical_columns(coin_id, days)
+        if columns is None:
             return []
+        return [dict(zip(OHLC_COLUMNS, row)) for row in zip(*(columns[name] for name in OHLC_COLUMNS))]
 
 
 coingecko_service = CoinGeckoService()
@@ -0,0 +1,155 @@
+import asyncio
+import time
+from typing import Optional
+from app.config import get_settings
+from app.services.binance import binance_service
+from app.services.coingecko import coingecko_service
+from app.services.market import market_service
+
+# Quote currencies treated as USD when picking an exchange's pair
+USD_QUOTES = ("USDT", "USD", "USDC", "FDUSD")
+
+
+def binance_quote(symbol: str) -> Optional[dict]:
+    """Top of book from the Binance all-market ticker snapshot."""
+    if not binance_service.tickers.is_fresh():
+        return None
+    ticker = binance_service.tickers.value.get(f"{symbol}USDT")
+    if ticker is None:
+        return None
+    last, _, quote_volume, bid, ask = ticker
+    return {
+        "exchange": "binance",
+        "pair": f"{symbol}/USDT",
+        "price_usd": last,
+        "bid": bid or None,
+        "ask": ask or None,
+        "spread_pct": (ask - bid) / ((ask + bid) / 2) * 100 if bid and ask else None,
+        "volume_24h_usd": quote_volume,
+        "source": "binance",
+    }
+
+
+def exchange_quote(exchange_id: str, tickers: list[dict]) -> Optional[dict]:
+    """
+    The exchange's most liquid USD-quoted pair for the coin.
+
+    CoinGecko reports the bid/ask spread rather than the book, so bid and
+    ask are placed symmetrically around the last price.
+    """
+    priced = [t for t in tickers if t["last_usd"]]
+    usd = [t for t in priced if t["target"] in USD_QUOTES]
+    if not usd and not priced:
+        return None
+    ticker = max(usd or priced, key=lambda t: t["volume_usd"] or 0)
+    price, spread = ticker["last_usd"], ticker["spread"]
+    half = spread / 200 if spread is not None else None
+    return {
+        "exchange": exchange_id,
+        "pair": f"{ticker['base']}/{ticker['target']}",
+        "price_usd": price,
+        "bid": price * (1 - half) if half is not None else None,
+        "ask": price * (1 + half) if half is not None else None,
+        "spread_pct": spread,
+        "volume_24h_usd": ticker["volume_usd"],
+        "source": "coingecko",
+    }
+
+
+def summarize(venues: list[dict]) -> dict:
+    """Best bid and ask across venues, the spread between them and the VWAP."""
+    bids = [v for v in venues if v["bid"] is not None]
+    asks = [v for v in venues if v["ask"] is not None]
+    best_bid = max(bids, key=lambda v: v["bid"]) if bids else None
+    best_ask = min(asks, key=lambda v: v["ask"]) if asks else None
+
+    summary = {
+        "best_bid": best_bid["bid"] if best_bid else None,
+        "best_bid_exchange": best_bid["exchange"] if best_bid else None,
+        "best_ask": best_ask["ask"] if best_ask else None,
+        "best_ask_exchange": best_ask["exchange"] if best_ask else None,
+        "spread": None,
+        "spread_pct": None,
+        "crossed": False,
+        "vwap": None,
+    }
+    if best_bid and best_ask:
+        spread = best_ask["ask"] - best_bid["bid"]
+        summary["spread"] = spread
+        summary["spread_pct"] = spread / ((best_ask["ask"] + best_bid["bid"]) / 2) * 100
+        # A bid above another venue's ask: buy there, sell here
+        summary["crossed"] = spread < 0
+
+    weighted = [(v["price_usd"], v["volume_24h_usd"]) for v in venues if v["volume_24h_usd"]]
+    volume = sum(w for _, w in weighted)
+    if volume:
+        summary["vwap"] = sum(p * w for p, w in weighted) / volume
+    return summary
+
+
+class CompareService:
+    """
+    One coin's price across exchanges.
+
+    Binance comes from the all-market ticker snapshot (real top of book);
+    every other exchange is a CoinGecko exchange-tickers call filtered to the
+    coin. Calls fan out with at most ``compare_concurrency`` in flight across
+    all requests, and whatever has not answered by ``compare_deadline`` is
+    cancelled and reported as missing.
+    """
+
+    def __init__(self):
+        self.settings = get_settings()
+        self.semaphore = asyncio.Semaphore(self.settings.compare_concurrency)
+
+    async def resolve(self, symbol: str) -> Optional[tuple[str, str]]:
+        """(CoinGecko id, ticker symbol) for a symbol or id, from the market table when possible."""
+        table = market_service.table()
+        row = table.find(symbol) if table is not None else None
+        if row is not None:
+            return table.text["id"][row], table.text["symbol"][row].upper()
+        coin_id = await coingecko_service.search_coin(symbol)
+        return (coin_id, symbol.upper()) if coin_id else None
+
+    async def _fetch(self, exchange_id: str, coin_id: str) -> Optional[dict]:
+        async with self.semaphore:
+            tickers = await coingecko_service.get_exchange_tickers(exchange_id, coin_id)
+        return exchange_quote(exchange_id, tickers) if tickers else None
+
+    async def compare(self, symbol: str, coin_id: str, exchanges: list[str]) -> dict:
+        venues = []
+        if "binance" in exchanges:
+            quote = binance_quote(symbol)
+            if quote is not None:
+                venues.append(quote)
+                exchanges = [e for e in exchanges if e != "binance"]
+
+        tasks = {asyncio.create_task(self._fetch(e, coin_id)): e for e in exchanges}
+        start = time.perf_counter()
+        done, pending = await asyncio.wait(tasks, timeout=self.settings.compare_deadline) if tasks else (set(), set())
+        for task in pending:
+            task.cancel()
+
+        unavailable, timed_out = [], sorted(tasks[t] for t in pending)
+        for task in done:
+            if task.exception() is not None:
+                print(f"Compare: {tasks[task]} tickers for '{coin_id}' failed: {task.exception()}")
+                unavailable.append(tasks[task])
+            elif task.result() is not None:
+                venues.append(task.result())
+            else:
+                unavailable.append(tasks[task])
+
+        venues.sort(key=lambda v: v["volume_24h_usd"] or 0, reverse=True)
+        return {
+            "symbol": symbol,
+            "coin_id": coin_id,
+            "venues": venues,
+            **summarize(venues),
+            "unavailable": sorted(unavailable),
+            "timed_out": timed_out,
+            "elapsed_ms": round((time.perf_counter() - start) * 1000, 1),
+        }
+
+
+compare_service = CompareService()
@@ -1,32 +1,199 @@
-import httpx
-from datetime import datetime
+import asyncio
+import time
+import numpy as np
+from datetime import datetime, timezone
+from pathlib import Path
 from typing import Optional
 from app.config import get_settings
+from app.services.http import upstream_client
+from app.cache import get_cache
+from app.cache.leader import acquire_leadership
+
+CLASSIFICATIONS = ["Extreme Fear", "Fear", "Neutral", "Greed", "Extreme Greed"]
+
+# One fixed-width record per day: UTC timestamp, index value, classification
+RECORD = np.dtype([("timestamp", "<i8"), ("value", "u1"), ("classification", "u1")])
+
+# alternative.me publishes one value per day. Workers check the history file
+# every RELOAD_INTERVAL seconds; once a new day is due the leader asks
+# upstream at most every SYNC_RETRY_INTERVAL seconds until it appears.
+RELOAD_INTERVAL = 60
+SYNC_RETRY_INTERVAL = 300
+LEASE_TTL = 3600
+
+# Seconds the latest value fetched on demand (while the history is behind)
+# is shared between workers
+LATEST_TTL = 300
+
+
+def classification_code(label: Optional[str], value: int) -> int:
+    if label in CLASSIFICATIONS:
+        return CLASSIFICATIONS.index(label)
+    # alternative.me bands
+    for code, upper in enumerate((24, 46, 54, 75)):
+        if value <= upper:
+            return code
+    return 4
+
+
+class FearGreedHistory:
+    """
+    Daily index values in a compact append-only file.
+
+    Records are 10 bytes each, sorted by timestamp, and loaded into a NumPy
+    structured array so range queries are binary searches.
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.records = np.empty(0, dtype=RECORD)
+        self._loaded_size = -1
+
+    def reload(self) -> None:
+        """Re-read the file if another worker has appended to it."""
+        size = self.path.stat().st_size if self.path.exists() else 0
+        if size != self._loaded_size:
+            count = size // RECORD.itemsize
+            self.records = np.fromfile(self.path, dtype=RECORD, count=count) if count else np.empty(0, dtype=RECORD)
+            self._loaded_size = count * RECORD.itemsize
+
+    @property
+    def last_timestamp(self) -> int:
+        return int(self.records["timestamp"][-1]) if len(self.records) else 0
+
+    def append(self, records: np.ndarray) -> None:
+        """Append records newer than the last stored day."""
+        records = np.sort(records[records["timestamp"] > self.last_timestamp], order="timestamp")
+        if not len(records):
+            return
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "ab") as f:
+            f.write(records.tobytes())
+        self.records = np.concatenate([self.records, records])
+        self._loaded_size = len(self.records) * RECORD.itemsize
+
+    def range(self, start: Optional[int] = None, end: Optional[int] = None) -> np.ndarray:
+        """Records with ``start <= timestamp <= end`` (unix seconds)."""
+        timestamps = self.records["timestamp"]
+        lo = np.searchsorted(timestamps, start, side="left") if start is not None else 0
+        hi = np.searchsorted(timestamps, end, side="right") if end is not None else len(timestamps)
+        return self.records[lo:hi]
 
 
 class FearGreedService:
     def __init__(self):
         self.settings = get_settings()
         self.url = self.settings.fear_greed_url
+        self.history = FearGreedHistory(Path(self.settings.data_dir) / "fear_greed.bin")
+        self._synced_at = 0.0
 
-    async def get_index(self) -> Optional[dict]:
-        """Get the current Fear & Greed Index."""
-        async with httpx.AsyncClient() as client:
+    def _to_dict(self, record) -> dict:
+        return {
+            "value": int(record["value"]),
+            "classification": CLASSIFICATIONS[record["classification"]],
+            "timestamp": datetime.fromtimestamp(int(record["timestamp"]), timezone.utc),
+        }
+
+    async def fetch(self, limit: int) -> Optional[np.ndarray]:
+        """Fetch the last ``limit`` days from alternative.me (0 = full history)."""
+        async with upstream_client() as client:
             response = await client.get(
                 self.url,
-                params={"limit": 1},
+                params={"limit": limit},
                 timeout=30.0,
             )
             if response.status_code == 200:
-                data = response.json()
-                if data.get("data"):
-                    item = data["data"][0]
-                    return {
-                        "value": int(item.get("value", 0)),
-                        "classification": item.get("value_classification", "Unknown"),
-                        "timestamp": datetime.fromtimestamp(int(item.get("timestamp", 0))),
-                    }
+                data = response.json().get("data") or []
+                records = np.empty(len(data), dtype=RECORD)
+                for i, item in enumerate(data):
+                    value = int(item.get("value", 0))
+                    records[i] = (
+                        int(item.get("timestamp", 0)),
+                        value,
+                        classification_code(item.get("value_classification"), value),
+                    )
+                return records
             return None
 
+    async def sync(self) -> None:
+        """Backfill the full history once, then fetch only the missing days."""
+        self.history.reload()
+        last = self.history.last_timestamp
+        if last:
+            missing_days = int((datetime.now(timezone.utc).timestamp() - last) // 86400)
+            if missing_days < 1 or time.time() - self._synced_at < SYNC_RETRY_INTERVAL:
+                return
+            self._synced_at = time.time()
+            records = await self.fetch(limit=missing_days + 1)
+        else:
+            self._synced_at = time.time()
+            records = await self.fetch(limit=0)
+        if records is not None:
+            self.history.append(records)
+
+    async def run(self) -> None:
+        """Keep the local history current; only the leader worker writes."""
+        while True:
+            try:
+                if await acquire_leadership("fear_greed_history", LEASE_TTL):
+                    await self.sync()
+                else:
+                    self.history.reload()
+            except Exception as e:
+                print(f"Fear & Greed sync failed: {e}")
+            await asyncio.sleep(RELOAD_INTERVAL)
+
+    async def get_index(self) -> Optional[dict]:
+        """
+        Get the current Fear & Greed Index.
+
+        Served from the history; between the UTC day rollover and the next
+        sync the latest value is fetched once and shared through the cache.
+        """
+        now = datetime.now(timezone.utc).timestamp()
+        if now - self.history.last_timestamp < 86400:
+            return self._to_dict(self.history.records[-1])
+
+        cache = get_cache()
+        latest = await cache.get_json("fear_greed:latest", "fear_greed", max_age=LATEST_TTL)
+        if latest is None:
+            records = await self.fetch(limit=1)
+            if records is None or not len(records):
+                return None
+            latest = [int(records[0]["timestamp"]), int(records[0]["value"]), int(records[0]["classification"])]
+            await cache.set_json("fear_greed:latest", latest, ttl=LATEST_TTL)
+        return self._to_dict(np.array(tuple(latest), dtype=RECORD))
+
+    def correlate(self, dates: list[str], closes: list[float]) -> dict:
+        """
+        Correlate the index with daily closes on the days both exist.
+
+        Returns Pearson correlations of the index with the close, with the
+        log return into the same day, and with the return into the next
+        aligned day (does sentiment lead price?).
+        """
+        price_days = np.array(dates, dtype="datetime64[D]").astype(np.int64)
+        index_days = self.history.records["timestamp"] // 86400
+        _, price_idx, index_idx = np.intersect1d(price_days, index_days, return_indices=True)
+
+        values = self.history.records["value"][index_idx].astype(np.float64)
+        prices = np.asarray(closes, dtype=np.float64)[price_idx]
+        returns = np.diff(np.log(prices)) if len(prices) > 1 else np.empty(0)
+
+        def pearson(a: np.ndarray, b: np.ndarray) -> Optional[float]:
+            if len(a) < 3 or a.std() == 0 or b.std() == 0:
+                return None
+            return round(float(np.corrcoef(a, b)[0, 1]), 4)
+
+        return {
+            "points": int(len(values)),
+            "correlation_price": pearson(values, prices),
+            "correlation_same_day_return": pearson(values[1:], returns),
+            "correlation_next_day_return": pearson(values[:-1], returns),
+        }
+
+    def get_history(self, start: Optional[int] = None, end: Optional[int] = None) -> list[dict]:
+        return [self._to_dict(record) for record in self.history.range(start, end)]
+
 
 fear_greed_service = FearGreedService()
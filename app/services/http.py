@@ -0,0 +1,74 @@
+import httpx
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Callable, Optional
+from app.metrics import UPSTREAM_IN_FLIGHT, UPSTREAM_LATENCY
+
+# Called as hook(request, status, seconds) after every upstream call
+UpstreamHook = Callable[[httpx.Request, str, float], None]
+
+_hooks: list[UpstreamHook] = []
+_client: Optional[httpx.AsyncClient] = None
+
+
+def add_upstream_hook(hook: UpstreamHook) -> None:
+    """Register a callback that observes every upstream call."""
+    _hooks.append(hook)
+
+
+class InstrumentedTransport(httpx.AsyncBaseTransport):
+    """
+    Transport wrapper that times every upstream call in one place.
+
+    Latency is measured up to the response headers, labelled by upstream host
+    and status ("error" for connection failures and timeouts).
+    """
+
+    def __init__(self):
+        self._transport = httpx.AsyncHTTPTransport()
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        host = request.url.host
+        in_flight = UPSTREAM_IN_FLIGHT.labels(host)
+        in_flight.inc()
+        status = "error"
+        start = time.perf_counter()
+        try:
+            response = await self._transport.handle_async_request(request)
+            status = str(response.status_code)
+            return response
+        finally:
+            elapsed = time.perf_counter() - start
+            in_flight.dec()
+            UPSTREAM_LATENCY.labels(host, status).observe(elapsed)
+            for hook in _hooks:
+                hook(request, status, elapsed)
+
+    async def aclose(self) -> None:
+        await self._transport.aclose()
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """Return the process-wide upstream client, creating it on first use."""
+    global _client
+    if _client is None or _client.is_closed:
+        _client = httpx.AsyncClient(transport=InstrumentedTransport(), timeout=30.0)
+    return _client
+
+
+@asynccontextmanager
+async def upstream_client() -> AsyncIterator[httpx.AsyncClient]:
+    """
+    Borrow the shared upstream client.
+
+    Keeps the ``async with`` call style while reusing pooled keep-alive
+    connections instead of opening a new client per call.
+    """
+    yield get_http_client()
+
+
+async def close_http_client() -> None:
+    global _client
+    if _client is not None:
+        await _client.aclose()
+        _client = None
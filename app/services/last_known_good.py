@@ -0,0 +1,161 @@
+import asyncio
+import json
+import mmap
+import os
+import struct
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Optional
+from app.config import get_settings
+from app.cache.leader import SnapshotRefresher
+
+# File layout: MAGIC, little-endian u32 header length, JSON header
+# {"saved_at", "sections": {name: [offset, length]}}, then one compact JSON
+# payload per section; offsets are relative to the end of the header.
+MAGIC = b"CPAPI-LKG1"
+HEADER_LENGTH = struct.Struct("<I")
+
+# Keyed sections recorded by routes and services
+SECTIONS = ("prices", "symbols", "news")
+
+
+class LastKnownGood:
+    """
+    Last good value of in-memory state, persisted for restarts and outages.
+
+    Background snapshots (Binance tickers, fiat rates, the market table) and
+    keyed values recorded by routes (served prices, the symbol -> CoinGecko
+    id index, news per source) are written to ``DATA_DIR/last_known_good.bin``
+    every ``lkg_save_interval`` seconds and at shutdown. At startup the file
+    is memory-mapped: snapshots are restored straight away so the first
+    requests need no upstream call, and keyed sections are decoded on first
+    use. Routes fall back to ``lookup`` when every upstream source fails.
+    """
+
+    def __init__(self):
+        self.settings = get_settings()
+        self.path = Path(self.settings.data_dir) / "last_known_good.bin"
+        self.refreshers: dict[str, SnapshotRefresher] = {}
+        self.tables: dict[str, OrderedDict[str, list]] = {}
+        self._map: Optional[mmap.mmap] = None
+        self._index: dict[str, list[int]] = {}
+        self._data_start = 0
+
+    def track(self, refresher: SnapshotRefresher) -> None:
+        self.refreshers[refresher.name] = refresher
+
+    def _saved(self, name: str) -> Optional[Any]:
+        """Decode one section of the mapped file, or None if it has none."""
+        entry = self._index.get(name)
+        if self._map is None or entry is None:
+            return None
+        offset, length = entry
+        start = self._data_start + offset
+        return json.loads(self._map[start:start + length])
+
+    def _table(self, section: str) -> OrderedDict[str, list]:
+        table = self.tables.get(section)
+        if table is None:
+            table = self.tables[section] = OrderedDict(self._saved(section) or {})
+        return table
+
+    def record(self, section: str, key: str, value: Any) -> None:
+        """Remember ``value`` as the last good one for ``key``."""
+        table = self._table(section)
+        table[key] = [time.time(), value]
+        table.move_to_end(key)
+        while len(table) > self.settings.lkg_max_entries:
+            table.popitem(last=False)
+
+    def lookup(self, section: str, key: str) -> Optional[tuple[Any, float]]:
+        """The last good value for ``key`` and when it was recorded."""
+        entry = self._table(section).get(key)
+        if entry is None:
+            return None
+        recorded_at, value = entry
+        return value, recorded_at
+
+    def load(self) -> None:
+        """Map the saved file and restore background snapshots that are still empty."""
+        if not self.path.exists():
+            return
+        try:
+            with open(self.path, "rb") as f:
+                self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            if self._map[:len(MAGIC)] != MAGIC:
+                raise ValueError("bad magic")
+            (length,) = HEADER_LENGTH.unpack_from(self._map, len(MAGIC))
+            header_start = len(MAGIC) + HEADER_LENGTH.size
+            header = json.loads(self._map[header_start:header_start + length])
+        except (OSError, ValueError, struct.error) as e:
+            print(f"Ignoring unreadable last-known-good snapshot: {e}")
+            self._close()
+            return
+
+        if time.time() - header["saved_at"] > self.settings.lkg_max_age:
+            self._close()
+            return
+        self._index = header["sections"]
+        self._data_start = header_start + length
+
+        for name, refresher in self.refreshers.items():
+            saved = self._saved(f"refresher:{name}")
+            if saved is not None and refresher.value is None:
+                refresher.restore(saved["v"], saved["t"])
+
+    def _close(self) -> None:
+        if self._map is not None:
+            self._map.close()
+        self._map = None
+        self._index = {}
+
+    def _sections(self) -> dict[str, Any]:
+        """Everything to save; keyed sections not used yet are carried over from the file."""
+        sections = {
+            f"refresher:{name}": {"t": refresher.updated_at, "v": refresher.value}
+            for name, refresher in self.refreshers.items()
+            if refresher.value is not None
+        }
+        for section in SECTIONS:
+            sections[section] = dict(self._table(section))
+        return sections
+
+    def _write(self, sections: dict[str, Any]) -> None:
+        index, payloads, offset = {}, [], 0
+        for name, value in sections.items():
+            payload = json.dumps(value, separators=(",", ":")).encode()
+            index[name] = [offset, len(payload)]
+            payloads.append(payload)
+            offset += len(payload)
+        header = json.dumps({"saved_at": time.time(), "sections": index}, separators=(",", ":")).encode()
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # Workers share the file; each writes its own temporary copy
+        tmp = self.path.with_suffix(f".{os.getpid()}.tmp")
+        with open(tmp, "wb") as f:
+            f.write(MAGIC + HEADER_LENGTH.pack(len(header)) + header)
+            for payload in payloads:
+                f.write(payload)
+        tmp.replace(self.path)
+
+    def save(self) -> None:
+        try:
+            self._write(self._sections())
+        except OSError as e:
+            print(f"Saving last-known-good snapshot failed: {e}")
+        # Every saved section now lives in memory
+        self._close()
+
+    async def run(self) -> None:
+        while True:
+            await asyncio.sleep(self.settings.lkg_save_interval)
+            try:
+                sections = self._sections()
+                self._close()
+                await asyncio.to_thread(self._write, sections)
+            except Exception as e:
+                print(f"Saving last-known-good snapshot failed: {e}")
+
+
+last_known_good = LastKnownGood()
@@ -0,0 +1,131 @@
+import numpy as np
+from typing import Iterable, Optional
+from app.config import get_settings
+from app.cache.leader import SnapshotRefresher
+from app.services.coingecko import coingecko_service
+
+TEXT_COLUMNS = ("id", "symbol", "name")
+NUMERIC_COLUMNS = ("rank", "price_usd", "market_cap", "volume_24h", "price_change_24h")
+SORT_COLUMNS = {
+    "market_cap": "market_cap",
+    "volume": "volume_24h",
+    "change_24h": "price_change_24h",
+}
+
+
+class MarketTable:
+    """
+    Column-oriented snapshot of the whole market.
+
+    Numeric columns are float64 arrays (missing values are NaN) so filters
+    and orderings run as vectorised NumPy operations; rows are only turned
+    into dicts for the page being returned.
+    """
+
+    def __init__(self, columns: dict):
+        self.text = {name: np.asarray(columns[name], dtype=object) for name in TEXT_COLUMNS}
+        self.numeric = {
+            name: np.array([np.nan if v is None else v for v in columns[name]], dtype=np.float64)
+            for name in NUMERIC_COLUMNS
+        }
+        self.size = len(self.text["id"])
+        self._lookup: Optional[dict[str, int]] = None
+
+    @staticmethod
+    def to_columns(rows: list[dict]) -> dict:
+        """Pivot market rows into the column lists ``MarketTable`` is built from."""
+        return {name: [row.get(name) for row in rows] for name in TEXT_COLUMNS + NUMERIC_COLUMNS}
+
+    @classmethod
+    def from_rows(cls, rows: list[dict]) -> "MarketTable":
+        return cls(cls.to_columns(rows))
+
+    def query(
+        self,
+        sort: str = "market_cap",
+        descending: bool = True,
+        min_market_cap: Optional[float] = None,
+        offset: int = 0,
+        limit: int = 100,
+    ) -> tuple[np.ndarray, int]:
+        """
+        Filter, order and paginate.
+
+        Returns the selected row indices and the number of rows that matched
+        the filter. Only the first ``offset + limit`` rows are fully sorted.
+        """
+        keys = self.numeric[SORT_COLUMNS[sort]]
+        candidates = np.flatnonzero(~np.isnan(keys))
+        if min_market_cap is not None:
+            market_cap = self.numeric["market_cap"][candidates]
+            candidates = candidates[market_cap >= min_market_cap]
+
+        total = len(candidates)
+        wanted = min(offset + limit, total)
+        if wanted == 0:
+            return candidates[:0], total
+
+        ordered_keys = -keys[candidates] if descending else keys[candidates]
+        if wanted < total:
+            top = np.argpartition(ordered_keys, wanted - 1)[:wanted]
+            top = top[np.argsort(ordered_keys[top], kind="stable")]
+        else:
+            top = np.argsort(ordered_keys, kind="stable")
+        return candidates[top[offset:wanted]], total
+
+    def find(self, key: str) -> Optional[int]:
+        """Row index of a coin by CoinGecko id or symbol; the first (highest ranked) match wins."""
+        if self._lookup is None:
+            self._lookup = {}
+            for column in ("id", "symbol"):
+                for i, value in enumerate(self.text[column].tolist()):
+                    if value:
+                        self._lookup.setdefault(value.lower(), i)
+        return self._lookup.get(key.lower())
+
+    def rows(self, indices: np.ndarray, names: Optional[Iterable[str]] = None) -> list[dict]:
+        """Rows as dicts; with ``names``, only those columns are read."""
+        names = set(names) if names is not None else set(TEXT_COLUMNS + NUMERIC_COLUMNS)
+        columns = {name: col[indices].tolist() for name, col in self.text.items() if name in names}
+        for name, col in self.numeric.items():
+            if name in names:
+                values = col[indices]
+                columns[name] = [None if v != v else v for v in values.tolist()]
+        rows = [dict(zip(columns, values)) for values in zip(*columns.values())]
+        if not columns:
+            rows = [{} for _ in range(len(indices))]
+        if "rank" in columns:
+            for row in rows:
+                if row["rank"] is not None:
+                    row["rank"] = int(row["rank"])
+        return rows
+
+
+class MarketService:
+    """Full-market snapshot refreshed in the background by one worker."""
+
+    def __init__(self):
+        self.settings = get_settings()
+        self.snapshot = SnapshotRefresher(
+            "markets",
+            self.settings.market_refresh_interval,
+            self.fetch_columns,
+        )
+        self._table: Optional[MarketTable] = None
+        self._built_from = 0.0
+
+    async def fetch_columns(self) -> dict:
+        rows = await coingecko_service.get_all_markets(self.settings.market_pages)
+        return MarketTable.to_columns(rows) if rows else {}
+
+    def table(self) -> Optional[MarketTable]:
+        """The current table, rebuilt only when a new snapshot arrives."""
+        if self.snapshot.value is None:
+            return None
+        if self._table is None or self.snapshot.updated_at != self._built_from:
+            self._table = MarketTable(self.snapshot.value)
+            self._built_from = self.snapshot.updated_at
+        return self._table
+
+
+market_service = MarketService()
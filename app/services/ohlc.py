@@ -0,0 +1,55 @@
+from typing import Optional, Sequence
+from starlette.concurrency import run_in_threadpool
+from app.metrics import FALLBACKS
+from app.services.coingecko import OHLC_COLUMNS, coingecko_service
+from app.services.coinmarketcap import coinmarketcap_service
+
+
+def rows_to_columns(rows: list[dict]) -> dict:
+    return {name: [row.get(name) for row in rows] for name in OHLC_COLUMNS}
+
+
+def columns_to_rows(columns: dict, names: Sequence[str] = OHLC_COLUMNS) -> list[dict]:
+    return [dict(zip(names, row)) for row in zip(*(columns[name] for name in names))]
+
+
+class OhlcService:
+    """Daily OHLC history for a symbol: CoinGecko first, cryptoCMD as fallback."""
+
+    async def resolve_coin_id(self, symbol: str) -> str:
+        coin_id = symbol.lower()
+        # If symbol is short (like BTC), search for the full ID
+        if len(symbol) <= 5:
+            found_id = await coingecko_service.search_coin(symbol)
+            if found_id:
+                coin_id = found_id
+        return coin_id
+
+    async def get_columns(
+        self,
+        symbol: str,
+        days: int,
+        coin_name: Optional[str] = None,
+        route: str = "history",
+    ) -> Optional[dict]:
+        """
+        Get history as columns keyed by ``OHLC_COLUMNS``, or None if no source has it.
+
+        The cryptoCMD scraper is blocking, so it runs in the thread pool.
+        """
+        coin_id = await self.resolve_coin_id(symbol)
+        columns = await coingecko_service.get_historical_columns(coin_id=coin_id, days=days)
+        if columns is not None:
+            return columns
+
+        FALLBACKS.labels(route, "coingecko", "cryptocmd").inc()
+        rows = await run_in_threadpool(
+            coinmarketcap_service.get_historical_data,
+            coin_code=symbol,
+            days=days,
+            coin_name=coin_name,
+        )
+        return rows_to_columns(rows) if rows else None
+
+
+ohlc_service = OhlcService()
@@ -0,0 +1,240 @@
+import asyncio
+import contextvars
+import hashlib
+import hmac
+import os
+import secrets
+import sys
+import threading
+import time
+from collections import Counter, deque
+from typing import Optional
+import httpx
+from app.config import get_settings
+
+# Frames kept per sample, innermost first
+MAX_DEPTH = 128
+
+# Pseudo-frames for wall time not spent running the request's own code
+WAITING = ("(waiting)", "", 0)
+THREADPOOL = ("(threadpool)", "", 0)
+
+# The profile of the request running in the current context, if any
+current_profile: contextvars.ContextVar[Optional["Profile"]] = contextvars.ContextVar("current_profile", default=None)
+
+
+def _sign(expires: int, secret: str) -> str:
+    return hmac.new(secret.encode(), str(expires).encode(), hashlib.sha256).hexdigest()
+
+
+def make_token(ttl: float = 600, secret: Optional[str] = None) -> str:
+    """Create a profiling token valid for ``ttl`` seconds: "{expires}.{signature}"."""
+    expires = int(time.time() + ttl)
+    return f"{expires}.{_sign(expires, secret or get_settings().profiler_secret)}"
+
+
+def verify_token(token: Optional[str]) -> bool:
+    secret = get_settings().profiler_secret
+    if not secret or not token or "." not in token:
+        return False
+    expires, _, signature = token.partition(".")
+    if not expires.isdigit() or int(expires) < time.time():
+        return False
+    return hmac.compare_digest(signature, _sign(int(expires), secret))
+
+
+def _stack(frame) -> tuple:
+    """(function, file, line) from the outermost frame to ``frame``."""
+    stack = []
+    while frame is not None and len(stack) < MAX_DEPTH:
+        code = frame.f_code
+        stack.append((code.co_name, code.co_filename, frame.f_lineno))
+        frame = frame.f_back
+    return tuple(reversed(stack))
+
+
+class Profile:
+    """Samples and upstream call timings captured for one request."""
+
+    def __init__(self, method: str, path: str, trigger: str):
+        self.id = secrets.token_hex(6)
+        self.method = method
+        self.path = path
+        self.trigger = trigger
+        self.route: Optional[str] = None
+        self.status: Optional[int] = None
+        self.started_at = time.time()
+        self.start = time.perf_counter()
+        self.duration = 0.0
+        self.interval = get_settings().profiler_interval_ms / 1000
+        self.stacks: Counter = Counter()
+        self.upstream: list[dict] = []
+        self.loop = asyncio.get_running_loop()
+        self.loop_thread = threading.get_ident()
+        self.tasks = {asyncio.current_task()}
+
+    @property
+    def samples(self) -> int:
+        return sum(self.stacks.values())
+
+    def sample(self, frames: dict, workers: set[int]) -> None:
+        """Add one sample; ``workers`` are threadpool threads attributed to this request."""
+        task = asyncio.current_task(self.loop)
+        loop_frame = frames.get(self.loop_thread)
+        if task in self.tasks and loop_frame is not None:
+            self.stacks[_stack(loop_frame)] += 1
+        else:
+            self.stacks[(WAITING,)] += 1
+        for thread_id in workers:
+            if thread_id in frames:
+                self.stacks[(THREADPOOL,) + _stack(frames[thread_id])] += 1
+
+    def finish(self, status: Optional[int], route: str) -> None:
+        self.duration = time.perf_counter() - self.start
+        self.status = status
+        self.route = route
+        self.tasks.clear()
+
+    def summary(self) -> dict:
+        return {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "route": self.route,
+            "status": self.status,
+            "trigger": self.trigger,
+            "started_at": self.started_at,
+            "duration_ms": round(self.duration * 1000, 3),
+            "samples": self.samples,
+            "interval_ms": self.interval * 1000,
+            "upstream": self.upstream,
+        }
+
+    def collapsed(self) -> str:
+        """Brendan Gregg's collapsed stack format, for flamegraph.pl or speedscope."""
+        lines = []
+        for stack, count in self.stacks.most_common():
+            names = [name if not file else f"{name} ({os.path.basename(file)}:{line})" for name, file, line in stack]
+            lines.append(f"{';'.join(names)} {count}")
+        return "\n".join(lines) + "\n"
+
+    def speedscope(self) -> dict:
+        """A speedscope "sampled" profile; weights are milliseconds."""
+        frames: list[dict] = []
+        index: dict[tuple, int] = {}
+        samples, weights = [], []
+        for stack, count in self.stacks.most_common():
+            sample = []
+            for frame in stack:
+                if frame not in index:
+                    index[frame] = len(frames)
+                    name, file, line = frame
+                    frames.append({"name": name, "file": file, "line": line} if file else {"name": name})
+                sample.append(index[frame])
+            samples.append(sample)
+            weights.append(count * self.interval * 1000)
+        name = f"{self.method} {self.path}"
+        return {
+            "$schema": "https://www.speedscope.app/file-format-schema.json",
+            "name": name,
+            "exporter": "crypto-price-api",
+            "shared": {"frames": frames},
+            "profiles": [{
+                "type": "sampled",
+                "name": name,
+                "unit": "milliseconds",
+                "startValue": 0,
+                "endValue": sum(weights),
+                "samples": samples,
+                "weights": weights,
+            }],
+        }
+
+
+def record_upstream(request: httpx.Request, status: str, seconds: float) -> None:
+    """Upstream hook: add the call to the profile of the request making it."""
+    profile = current_profile.get()
+    if profile is not None:
+        end = time.perf_counter() - profile.start
+        profile.upstream.append({
+            "host": request.url.host,
+            "path": request.url.path,
+            "status": status,
+            "start_ms": round((end - seconds) * 1000, 3),
+            "duration_ms": round(seconds * 1000, 3),
+        })
+
+
+class ProfilerService:
+    """
+    Wall-clock sampling profiler for selected requests.
+
+    While at least one request is being profiled, a background thread
+    samples the event loop thread every ``profiler_interval_ms``. Samples
+    are attributed to a request when the task running at that instant is
+    the request's task or one it created (tracked with a task factory that
+    is only installed while profiling); other samples count as waiting.
+    Threadpool work is attributed only when a single request is being
+    profiled. Finished profiles are kept in a bounded ring.
+    """
+
+    def __init__(self):
+        self.settings = get_settings()
+        self.profiles: deque[Profile] = deque(maxlen=self.settings.profiler_max_profiles)
+        self.active: set[Profile] = set()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._previous_factory = None
+
+    def _task_factory(self, loop, coro, **kwargs):
+        if self._previous_factory is not None:
+            task = self._previous_factory(loop, coro, **kwargs)
+        else:
+            task = asyncio.Task(coro, loop=loop, **kwargs)
+        profile = current_profile.get()
+        if profile is not None:
+            profile.tasks.add(task)
+        return task
+
+    def _sample_loop(self) -> None:
+        while True:
+            with self._lock:
+                if not self.active:
+                    self._thread = None
+                    return
+                active = list(self.active)
+            workers = set()
+            if len(active) == 1:
+                workers = {t.ident for t in threading.enumerate() if t.name.startswith("AnyIO worker thread")}
+            frames = sys._current_frames()
+            for profile in active:
+                profile.sample(frames, workers)
+            time.sleep(active[0].interval)
+
+    def start(self, method: str, path: str, trigger: str) -> Profile:
+        profile = Profile(method, path, trigger)
+        loop = profile.loop
+        with self._lock:
+            if not self.active:
+                self._previous_factory = loop.get_task_factory()
+                loop.set_task_factory(self._task_factory)
+            self.active.add(profile)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._sample_loop, name="profiler", daemon=True)
+                self._thread.start()
+        return profile
+
+    def stop(self, profile: Profile, status: Optional[int], route: str) -> None:
+        profile.finish(status, route)
+        with self._lock:
+            self.active.discard(profile)
+            if not self.active:
+                profile.loop.set_task_factory(self._previous_factory)
+                self._previous_factory = None
+        self.profiles.append(profile)
+
+    def get(self, profile_id: str) -> Optional[Profile]:
+        return next((p for p in self.profiles if p.id == profile_id), None)
+
+
+profiler_service = ProfilerService()
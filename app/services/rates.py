@@ -0,0 +1,162 @@
+from dataclasses import dataclass
+from typing import Optional
+from app.services.binance import binance_service
+from app.services.coingecko import coingecko_service
+
+# Quote assets recognised when splitting Binance pair symbols, longest first
+# so "FDUSD" wins over "USD"-suffixed matches.
+QUOTE_ASSETS = sorted(
+    ["USDT", "FDUSD", "USDC", "TUSD", "BUSD", "DAI", "BTC", "ETH", "BNB",
+     "EUR", "GBP", "TRY", "BRL", "ZAR", "JPY", "AUD", "UAH", "PLN", "RON", "ARS", "MXN"],
+    key=len,
+    reverse=True,
+)
+
+# Assets a conversion may pass through
+HUBS = ("USDT", "BTC", "ETH", "FDUSD", "USDC", "BNB")
+
+MAX_HOPS = 3
+
+# Liquidity given to CoinGecko fiat edges so Binance markets win when both exist
+FIAT_EDGE_LIQUIDITY = 1.0
+
+
+@dataclass
+class Conversion:
+    rate: float
+    change_24h: Optional[float]
+    path: list[str]
+    stale: bool = False  # built from a ticker snapshot that is out of date
+
+
+def split_pair(symbol: str) -> Optional[tuple[str, str]]:
+    """Split a Binance pair symbol into (base, quote), e.g. ETHBTC -> (ETH, BTC)."""
+    for quote in QUOTE_ASSETS:
+        if symbol.endswith(quote) and len(symbol) > len(quote):
+            return symbol[:-len(quote)], quote
+    return None
+
+
+class RateGraph:
+    """
+    Directed graph of exchange rates between assets.
+
+    Each edge holds (rate, 24h change as a ratio, liquidity). The best
+    conversion is the path of at most ``MAX_HOPS`` edges through ``HUBS``
+    whose least liquid edge is the most liquid; ties go to fewer hops, so a
+    direct market wins unless a triangulated route is strictly deeper.
+    """
+
+    def __init__(self):
+        self.edges: dict[str, dict[str, tuple[float, float, float]]] = {}
+
+    def add_edge(self, base: str, quote: str, rate: float, change: float, liquidity: float) -> None:
+        if rate <= 0:
+            return
+        self.edges.setdefault(base, {})[quote] = (rate, change, liquidity)
+        self.edges.setdefault(quote, {})[base] = (1 / rate, 1 / change if change else 0.0, liquidity)
+
+    @classmethod
+    def build(cls, tickers: dict, fiat_rates: Optional[dict] = None) -> "RateGraph":
+        """
+        Build the graph from a Binance ticker snapshot and CoinGecko BTC fiat rates.
+
+        Ticker liquidity is quote volume converted to USDT where a direct
+        USDT market for the quote asset exists.
+        """
+        graph = cls()
+        pairs = []
+        quote_usdt = {"USDT": 1.0}
+        for symbol, (last, change_pct, quote_volume, _, _) in tickers.items():
+            split = split_pair(symbol)
+            if split is None or last <= 0:
+                continue
+            pairs.append((split[0], split[1], last, change_pct, quote_volume))
+            if split[1] == "USDT":
+                quote_usdt[split[0]] = last
+
+        for base, quote, last, change_pct, quote_volume in pairs:
+            liquidity = quote_volume * quote_usdt.get(quote, 0.0)
+            graph.add_edge(base, quote, last, 1 + change_pct / 100, liquidity)
+
+        for currency, rate in (fiat_rates or {}).items():
+            if currency not in graph.edges.get("BTC", {}):
+                graph.add_edge("BTC", currency, rate, 0.0, FIAT_EDGE_LIQUIDITY)
+        return graph
+
+    def convert(self, base: str, quote: str) -> Optional[Conversion]:
+        base, quote = base.upper(), quote.upper()
+        if base == quote:
+            return Conversion(1.0, 0.0, [base])
+        if base not in self.edges or quote not in self.edges:
+            return None
+
+        # Best bottleneck path per hop count: node -> (liquidity, path)
+        best: Optional[tuple[float, list[str]]] = None
+        frontier = {base: (float("inf"), [base])}
+        for _ in range(MAX_HOPS):
+            next_frontier = {}
+            for node, (liquidity, path) in frontier.items():
+                for neighbour, (_, _, edge_liquidity) in self.edges[node].items():
+                    if neighbour in path:
+                        continue
+                    candidate = (min(liquidity, edge_liquidity), path + [neighbour])
+                    if neighbour == quote:
+                        if best is None or candidate[0] > best[0]:
+                            best = candidate
+                    elif neighbour in HUBS:
+                        current = next_frontier.get(neighbour)
+                        if current is None or candidate[0] > current[0]:
+                            next_frontier[neighbour] = candidate
+            frontier = next_frontier
+            if not frontier:
+                break
+
+        if best is None:
+            return None
+
+        rate, change = 1.0, 1.0
+        for a, b in zip(best[1], best[1][1:]):
+            edge_rate, edge_change, _ = self.edges[a][b]
+            rate *= edge_rate
+            change = change * edge_change if change and edge_change else 0.0
+        return Conversion(rate, (change - 1) * 100 if change else None, best[1])
+
+
+class RateService:
+    """Serve conversions from an in-memory graph rebuilt when the snapshots change."""
+
+    def __init__(self):
+        self.fiat = coingecko_service.fiat_rates
+        self._graph: Optional[RateGraph] = None
+        self._built_from = (0.0, 0.0)
+
+    def graph(self) -> Optional[RateGraph]:
+        tickers = binance_service.tickers
+        if tickers.value is None:
+            return None
+        version = (tickers.updated_at, self.fiat.updated_at)
+        if self._graph is None or version != self._built_from:
+            self._graph = RateGraph.build(tickers.value, self.fiat.value)
+            self._built_from = version
+        return self._graph
+
+    def convert(self, base: str, quote: str) -> Optional[Conversion]:
+        """
+        Convert one unit of ``base`` into ``quote``; USD is treated as USDT.
+
+        The conversion is marked ``stale`` when the ticker snapshot could not
+        be refreshed (e.g. a last-known-good snapshot restored at startup).
+        """
+        graph = self.graph()
+        if graph is None:
+            return None
+        base = "USDT" if base.upper() == "USD" else base
+        quote = "USDT" if quote.upper() == "USD" else quote
+        conversion = graph.convert(base, quote)
+        if conversion is not None and not binance_service.tickers.is_fresh():
+            conversion.stale = True
+        return conversion
+
+
+rate_service = RateService()
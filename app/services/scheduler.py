@@ -0,0 +1,260 @@
+import asyncio
+import json
+import math
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Optional
+from app.config import get_settings
+from app.metrics import SCHEDULED_REFRESHES
+from app.cache.leader import acquire_leadership, release_leadership
+from app.services.binance import binance_service
+
+# Seconds between scheduling passes
+TICK = 1.0
+
+# Seconds between saves of the hot set
+SAVE_INTERVAL = 60.0
+
+# Refresh a hot key at most this far into its TTL
+MAX_TTL_FRACTION = 0.8
+
+# Keys whose expected requests per TTL fall below this are forgotten
+FORGET_THRESHOLD = 0.01
+
+
+@dataclass
+class KeyKind:
+    refresh: Callable[[str], Awaitable[Any]]  # returns None when nothing was fetched
+    ttl: float
+    min_interval: float
+    budget: str
+
+
+class TokenBucket:
+    """Allow ``rate`` operations per second with bursts of up to ``burst``."""
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def take(self) -> bool:
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return True
+        return False
+
+
+class HotKey:
+    """Exponentially decayed request rate (per second) of one cached key."""
+
+    __slots__ = ("rate", "updated", "refreshed_at")
+
+    def __init__(self, rate: float = 0.0, now: float = 0.0):
+        self.rate = rate
+        self.updated = now
+        self.refreshed_at = 0.0
+
+    def current(self, now: float, window: float) -> float:
+        return self.rate * math.exp(-(now - self.updated) / window)
+
+    def hit(self, now: float, window: float) -> None:
+        self.rate = self.current(now, window) + 1 / window
+        self.updated = now
+
+
+class RefreshScheduler:
+    """
+    Refresh cached upstream data ahead of expiry, in proportion to demand.
+
+    Services register each kind of cached key (its refresh coroutine, TTL
+    and upstream budget) and call ``touch`` on every lookup. A key is hot
+    when it is expected to be requested at least ``refresh_hot_threshold``
+    times per TTL; hot keys are refreshed every ``1 / (ratio x rate)``
+    seconds, clamped between the kind's minimum interval and 80% of its
+    TTL, most requested first, while the upstream's token bucket allows.
+    Cold keys are simply left to expire.
+
+    Only the leader worker refreshes. The hot set is saved under
+    ``data_dir`` and refreshed first on the next start; the worker reports
+    warm once that is done and the ticker snapshot is loaded.
+    """
+
+    def __init__(self):
+        self.settings = get_settings()
+        self.kinds: dict[str, KeyKind] = {}
+        self.keys: dict[tuple[str, str], HotKey] = {}
+        self.buckets = {
+            name: TokenBucket(rate, self.settings.refresh_burst)
+            for name, rate in self.settings.refresh_budgets.items()
+        }
+        self.path = Path(self.settings.data_dir) / "hot_keys.json"
+        self.pending_warm: set[tuple[str, str]] = set()
+        self.started_at = time.time()
+        self.is_leader = False
+        self._in_flight: set[tuple[str, str]] = set()
+        self._saved_at = 0.0
+
+    def register(self, kind: str, refresh: Callable[[str], Awaitable[Any]], ttl: float, min_interval: float, budget: str) -> None:
+        self.kinds[kind] = KeyKind(refresh, ttl, min_interval, budget)
+
+    def touch(self, kind: str, arg: str, fetched: bool = False) -> None:
+        """Count a lookup; ``fetched`` means the caller just loaded it from upstream."""
+        now = time.time()
+        key = (kind, arg)
+        hot = self.keys.get(key)
+        if hot is None:
+            if len(self.keys) >= self.settings.refresh_max_keys:
+                window = self.settings.refresh_demand_window
+                coldest = min(self.keys, key=lambda k: self.keys[k].current(now, window))
+                del self.keys[coldest]
+            hot = self.keys[key] = HotKey(now=now)
+        hot.hit(now, self.settings.refresh_demand_window)
+        if fetched:
+            hot.refreshed_at = now
+
+    def demand(self, hot: HotKey, now: float) -> float:
+        """
+        Estimated requests per second for a key across all workers.
+
+        Each worker only sees its share of the traffic, so the leader's own
+        rate is scaled by the number of workers.
+        """
+        return hot.current(now, self.settings.refresh_demand_window) * self.settings.web_concurrency
+
+    @property
+    def warm(self) -> bool:
+        if time.time() - self.started_at > self.settings.warmup_timeout:
+            return True
+        return not self.pending_warm and binance_service.tickers.value is not None
+
+    def interval(self, kind: KeyKind, rate: float) -> Optional[float]:
+        """Seconds between refreshes of a key, or None if it is cold."""
+        if rate * kind.ttl < self.settings.refresh_hot_threshold:
+            return None
+        proportional = 1 / (self.settings.refresh_demand_ratio * rate)
+        return max(kind.min_interval, min(kind.ttl * MAX_TTL_FRACTION, proportional))
+
+    def due(self, now: float) -> list[tuple[str, str]]:
+        """Hot keys whose refresh interval has passed, warm-up keys then most requested first."""
+        due = []
+        for key, hot in self.keys.items():
+            kind = self.kinds.get(key[0])
+            if kind is None or key in self._in_flight:
+                continue
+            rate = self.demand(hot, now)
+            interval = self.interval(kind, rate)
+            warming = key in self.pending_warm
+            if warming or (interval is not None and now - hot.refreshed_at >= interval):
+                due.append((warming, rate, key))
+        due.sort(reverse=True)
+        return [key for _, _, key in due]
+
+    async def refresh(self, key: tuple[str, str]) -> None:
+        kind, arg = key
+        self._in_flight.add(key)
+        try:
+            if await self.kinds[kind].refresh(arg) is not None:
+                SCHEDULED_REFRESHES.labels(kind, "ok").inc()
+            else:
+                # Kinds return None when the upstream answered without data
+                SCHEDULED_REFRESHES.labels(kind, "error").inc()
+                print(f"Scheduled refresh of {kind} '{arg}' returned no data")
+        except Exception as e:
+            SCHEDULED_REFRESHES.labels(kind, "error").inc()
+            print(f"Scheduled refresh of {kind} '{arg}' failed: {e}")
+        finally:
+            self._in_flight.discard(key)
+            self.pending_warm.discard(key)
+            if key in self.keys:
+                self.keys[key].refreshed_at = time.time()
+
+    def schedule(self, now: float) -> list[tuple[str, str]]:
+        """Pick the due keys the upstream budgets allow right now."""
+        picked = []
+        exhausted = set()
+        for key in self.due(now):
+            budget = self.kinds[key[0]].budget
+            if budget in exhausted:
+                continue
+            bucket = self.buckets.get(budget)
+            if bucket is not None and not bucket.take():
+                exhausted.add(budget)
+                SCHEDULED_REFRESHES.labels(key[0], "throttled").inc()
+                continue
+            picked.append(key)
+        return picked
+
+    def load(self) -> None:
+        """Seed demand from the hot set saved by the previous run."""
+        if not self.path.exists():
+            return
+        try:
+            saved = json.loads(self.path.read_text())
+        except ValueError as e:
+            print(f"Ignoring unreadable hot set: {e}")
+            return
+        now = time.time()
+        # Warm-up is spent from the budgets' initial burst, so it can finish at once
+        warm_limit = min(self.settings.warmup_keys, int(self.settings.refresh_burst))
+        for entry in saved[:self.settings.refresh_max_keys]:
+            key = (entry["kind"], entry["arg"])
+            if key[0] not in self.kinds:
+                continue
+            self.keys[key] = HotKey(entry["rate"], now)
+            if len(self.pending_warm) < warm_limit:
+                self.pending_warm.add(key)
+
+    def save(self) -> None:
+        now = time.time()
+        window = self.settings.refresh_demand_window
+        for key in [k for k, hot in self.keys.items() if hot.current(now, window) * window < FORGET_THRESHOLD]:
+            del self.keys[key]
+
+        hot_set = []
+        for (kind, arg), hot in self.keys.items():
+            registered = self.kinds.get(kind)
+            if registered is not None and self.interval(registered, self.demand(hot, now)) is not None:
+                hot_set.append({"kind": kind, "arg": arg, "rate": hot.current(now, window)})
+        hot_set.sort(key=lambda entry: entry["rate"], reverse=True)
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".tmp")
+        tmp.write_text(json.dumps(hot_set))
+        tmp.replace(self.path)
+        self._saved_at = now
+
+    async def run(self) -> None:
+        self.load()
+        tasks: set[asyncio.Task] = set()
+        while True:
+            try:
+                self.is_leader = await acquire_leadership("refresh_scheduler", TICK * 10)
+                if self.is_leader:
+                    now = time.time()
+                    for key in self.schedule(now):
+                        task = asyncio.create_task(self.refresh(key))
+                        tasks.add(task)
+                        task.add_done_callback(tasks.discard)
+                    if now - self._saved_at > SAVE_INTERVAL:
+                        self.save()
+                else:
+                    # The leader warms the shared cache
+                    self.pending_warm.clear()
+            except Exception as e:
+                print(f"Refresh scheduler failed: {e}")
+            await asyncio.sleep(TICK)
+
+    async def stop(self) -> None:
+        """Save the hot set for the next start and hand over leadership."""
+        if self.is_leader:
+            self.save()
+            await release_leadership("refresh_scheduler")
+
+
+refresh_scheduler = RefreshScheduler()
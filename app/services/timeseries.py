@@ -0,0 +1,240 @@
+import time
+import numpy as np
+from collections import OrderedDict
+from datetime import datetime
+from typing import Optional
+from app.config import get_settings
+from app.services.binance import binance_service
+
+# Raw observations kept per symbol (~1h at the default ticker refresh)
+RAW_CAPACITY = 256
+
+# Rollup tiers as (bucket seconds, buckets kept): 24h of minutes, 30d of hours
+TIERS = ((60, 1440), (3600, 720))
+
+# Windows reported by SymbolSeries.stats, in seconds
+STAT_WINDOWS = {"1m": 60, "5m": 300, "15m": 900, "1h": 3600, "24h": 86400}
+
+WINDOW_UNITS = {"m": 60, "h": 3600, "d": 86400}
+
+
+def window_seconds(window: str) -> int:
+    """Parse a window like "15m", "24h" or "7d" into seconds (ValueError if invalid)."""
+    if len(window) < 2 or window[-1] not in WINDOW_UNITS:
+        raise ValueError(f"Invalid window '{window}'")
+    return int(window[:-1]) * WINDOW_UNITS[window[-1]]
+
+
+class TickRing:
+    """The last ``capacity`` raw observations; the oldest is overwritten first."""
+
+    def __init__(self, capacity: int = RAW_CAPACITY):
+        self.timestamps = np.zeros(capacity, dtype=np.float64)
+        self.prices = np.zeros(capacity, dtype=np.float32)
+        self.count = 0
+
+    @property
+    def last_timestamp(self) -> float:
+        return float(self.timestamps[(self.count - 1) % len(self.timestamps)]) if self.count else 0.0
+
+    def append(self, timestamp: float, price: float) -> None:
+        slot = self.count % len(self.timestamps)
+        self.timestamps[slot] = timestamp
+        self.prices[slot] = price
+        self.count += 1
+
+    def view(self) -> tuple[np.ndarray, np.ndarray]:
+        """Timestamps and prices in chronological order."""
+        capacity = len(self.timestamps)
+        if self.count <= capacity:
+            return self.timestamps[:self.count], self.prices[:self.count]
+        start = self.count % capacity
+        return (
+            np.concatenate((self.timestamps[start:], self.timestamps[:start])),
+            np.concatenate((self.prices[start:], self.prices[:start])),
+        )
+
+
+class RollupTier:
+    """
+    Close, high and low per fixed-size time bucket.
+
+    Buckets are direct-mapped (slot = bucket number % capacity) and tagged
+    with their bucket number, so expired buckets are overwritten in place
+    and gaps read as missing rather than as stale values.
+    """
+
+    def __init__(self, resolution: int, capacity: int):
+        self.resolution = resolution
+        self.buckets = np.full(capacity, -1, dtype=np.int32)
+        self.close = np.zeros(capacity, dtype=np.float32)
+        self.high = np.zeros(capacity, dtype=np.float32)
+        self.low = np.zeros(capacity, dtype=np.float32)
+
+    @property
+    def span(self) -> int:
+        return self.resolution * len(self.buckets)
+
+    def add(self, timestamp: float, price: float) -> None:
+        bucket = int(timestamp // self.resolution)
+        slot = bucket % len(self.buckets)
+        if self.buckets[slot] != bucket:
+            self.buckets[slot] = bucket
+            self.close[slot] = self.high[slot] = self.low[slot] = price
+        else:
+            self.close[slot] = price
+            self.high[slot] = max(self.high[slot], price)
+            self.low[slot] = min(self.low[slot], price)
+
+    def series(self, start: float, end: float) -> tuple[np.ndarray, np.ndarray]:
+        """Bucket start times and slots of the buckets present in [start, end]."""
+        last = int(end // self.resolution)
+        first = max(int(start // self.resolution), last - len(self.buckets) + 1)
+        buckets = np.arange(first, last + 1)
+        slots = buckets % len(self.buckets)
+        present = self.buckets[slots] == buckets
+        return buckets[present] * float(self.resolution), slots[present]
+
+
+class SymbolSeries:
+    """Raw ticks plus minute and hour rollups for one symbol."""
+
+    def __init__(self):
+        self.ticks = TickRing()
+        self.tiers = [RollupTier(resolution, capacity) for resolution, capacity in TIERS]
+        self.first_timestamp = 0.0
+
+    def record(self, timestamp: float, price: float) -> bool:
+        """Add an observation; out-of-order or invalid prices are ignored."""
+        if not price > 0 or timestamp <= self.ticks.last_timestamp:
+            return False
+        self.first_timestamp = self.first_timestamp or timestamp
+        self.ticks.append(timestamp, price)
+        for tier in self.tiers:
+            tier.add(timestamp, price)
+        return True
+
+    @property
+    def last(self) -> tuple[float, float]:
+        slot = (self.ticks.count - 1) % len(self.ticks.timestamps)
+        return float(self.ticks.timestamps[slot]), float(self.ticks.prices[slot])
+
+    def window(self, seconds: float, now: float) -> tuple[np.ndarray, np.ndarray, int]:
+        """
+        Timestamps and prices over the last ``seconds``, with the resolution used.
+
+        Raw ticks are used when they reach back far enough, otherwise the
+        finest tier whose span covers the window (resolution 0 means raw).
+        """
+        start = now - seconds
+        timestamps, prices = self.ticks.view()
+        if len(timestamps) and timestamps[0] <= start:
+            i = np.searchsorted(timestamps, start, side="left")
+            return timestamps[i:], prices[i:], 0
+        tier = next((t for t in self.tiers if seconds <= t.span), self.tiers[-1])
+        times, slots = tier.series(start, now)
+        return times, tier.close[slots], tier.resolution
+
+    def price_at(self, timestamp: float) -> Optional[float]:
+        """The last known price at ``timestamp``, to within a tier's resolution."""
+        if timestamp < self.first_timestamp:
+            return None
+        timestamps, prices = self.ticks.view()
+        i = np.searchsorted(timestamps, timestamp, side="right") - 1
+        if i >= 0 and timestamp - timestamps[i] <= TIERS[0][0]:
+            return float(prices[i])
+        for tier in self.tiers:
+            _, slots = tier.series(timestamp - tier.resolution, timestamp)
+            if len(slots):
+                return float(tier.close[slots[-1]])
+        return None
+
+    def stats(self, now: float) -> dict:
+        """Change over each of ``STAT_WINDOWS`` plus the 24h high and low."""
+        _, price = self.last
+        changes = {}
+        for label, seconds in STAT_WINDOWS.items():
+            reference = self.price_at(now - seconds)
+            changes[label] = (price / reference - 1) * 100 if reference else None
+
+        minutes = self.tiers[0]
+        _, slots = minutes.series(now - 86400, now)
+        return {
+            "price": price,
+            "changes": changes,
+            "high_24h": float(minutes.high[slots].max()) if len(slots) else None,
+            "low_24h": float(minutes.low[slots].min()) if len(slots) else None,
+        }
+
+
+def downsample(timestamps: np.ndarray, prices: np.ndarray, start: float, end: float, points: int) -> tuple[np.ndarray, np.ndarray]:
+    """Keep the last observation in each of ``points`` equal time slots."""
+    if len(timestamps) <= points:
+        return timestamps, prices
+    slots = ((timestamps - start) * (points / max(end - start, 1e-9))).astype(np.int64).clip(0, points - 1)
+    last = np.append(np.flatnonzero(np.diff(slots)), len(slots) - 1)
+    return timestamps[last], prices[last]
+
+
+class TimeSeriesRecorder:
+    """
+    In-process price history for recently seen symbols.
+
+    Fed by every Binance ticker snapshot (the most liquid USDT pairs) and by
+    prices served from other sources. Memory is bounded: each series has a
+    fixed size and the least recently used symbols are evicted.
+    """
+
+    def __init__(self):
+        self.settings = get_settings()
+        self.series: OrderedDict[str, SymbolSeries] = OrderedDict()
+        binance_service.tickers.listeners.append(self.record_tickers)
+
+    def record(self, symbol: str, price: Optional[float], timestamp: Optional[float] = None) -> None:
+        if price is None:
+            return
+        symbol = symbol.upper()
+        series = self.series.get(symbol)
+        if series is None:
+            if len(self.series) >= self.settings.timeseries_max_symbols:
+                self.series.popitem(last=False)
+            series = self.series[symbol] = SymbolSeries()
+        else:
+            self.series.move_to_end(symbol)
+        series.record(timestamp or time.time(), price)
+
+    def record_price(self, price_data: dict) -> None:
+        """Record a served price at the time its source last updated it."""
+        try:
+            timestamp = datetime.fromisoformat(price_data["last_updated"].replace("Z", "+00:00")).timestamp()
+        except (KeyError, AttributeError, ValueError):
+            timestamp = None
+        self.record(price_data["symbol"], price_data.get("price_usd"), timestamp)
+
+    def record_tickers(self, tickers: dict) -> None:
+        """Record the last price of the most liquid USDT pairs in a ticker snapshot."""
+        now = binance_service.tickers.updated_at
+        pairs = [
+            (quote_volume, symbol[:-4], last)
+            for symbol, (last, _, quote_volume, _, _) in tickers.items()
+            if symbol.endswith("USDT")
+        ]
+        pairs.sort(reverse=True)
+        for _, symbol, last in pairs[:self.settings.timeseries_snapshot_symbols]:
+            self.record(symbol, last, now)
+
+    def get(self, symbol: str) -> Optional[SymbolSeries]:
+        series = self.series.get(symbol.upper())
+        return series if series is not None and series.ticks.count else None
+
+    def sparkline(self, symbol: str, seconds: float, points: int) -> Optional[tuple[np.ndarray, np.ndarray, int]]:
+        series = self.get(symbol)
+        if series is None:
+            return None
+        now = time.time()
+        timestamps, prices, resolution = series.window(seconds, now)
+        timestamps, prices = downsample(timestamps, prices, now - seconds, now, points)
+        return timestamps, prices, resolution
+
+
+timeseries_service = TimeSeriesRecorder()
@@ -0,0 +1,149 @@
+import math
+import time
+from typing import Optional
+from app.config import get_settings
+from app.services.binance import binance_service
+from app.services.market import market_service
+
+# Rescale decayed counts after this many half-lives so weights stay finite
+RESCALE_HALF_LIVES = 64
+
+# Seconds a computed ranking is reused before it is rebuilt
+RANKING_TTL = 5.0
+
+# How much 24h price change and relative quote volume lift a symbol's demand
+PRICE_MOMENTUM_WEIGHT = 0.5
+VOLUME_MOMENTUM_WEIGHT = 0.5
+
+
+class DecayedSpaceSaving:
+    """
+    Space-Saving heavy-hitter counter with exponential time decay.
+
+    Keeps at most ``capacity`` counters however many distinct keys are seen;
+    a new key replaces the smallest counter and inherits its count as error.
+    Decay uses forward weighting: a hit at time t adds 2^((t - landmark) /
+    half_life), so stored counts never need to be aged in place, only
+    rescaled occasionally.
+    """
+
+    def __init__(self, capacity: int, half_life: float):
+        self.capacity = capacity
+        self.half_life = half_life
+        self.landmark = time.time()
+        self.counts: dict[str, float] = {}
+        self.errors: dict[str, float] = {}
+
+    def _weight(self, now: float) -> float:
+        return 2.0 ** ((now - self.landmark) / self.half_life)
+
+    def _rescale(self, now: float) -> None:
+        factor = self._weight(now)
+        for key in self.counts:
+            self.counts[key] /= factor
+            self.errors[key] /= factor
+        self.landmark = now
+
+    def add(self, key: str, now: Optional[float] = None) -> None:
+        now = now or time.time()
+        if now - self.landmark > RESCALE_HALF_LIVES * self.half_life:
+            self._rescale(now)
+        weight = self._weight(now)
+
+        if key in self.counts:
+            self.counts[key] += weight
+        elif len(self.counts) < self.capacity:
+            self.counts[key] = weight
+            self.errors[key] = 0.0
+        else:
+            smallest = min(self.counts, key=self.counts.__getitem__)
+            floor = self.counts.pop(smallest)
+            del self.errors[smallest]
+            self.counts[key] = floor + weight
+            self.errors[key] = floor
+
+    def estimates(self, now: Optional[float] = None) -> dict[str, tuple[float, float]]:
+        """Current decayed (count, error) per tracked key."""
+        scale = 1 / self._weight(now or time.time())
+        return {key: (count * scale, self.errors[key] * scale) for key, count in self.counts.items()}
+
+
+class TrendingService:
+    """
+    Rank coins by this API's own request traffic.
+
+    Symbols requested on /price, /history and /chart feed a decayed
+    Space-Saving counter; the ranking multiplies each symbol's share of
+    recent requests by price and volume momentum from the Binance ticker
+    snapshot. Each worker ranks the traffic it serves.
+    """
+
+    def __init__(self):
+        self.settings = get_settings()
+        self.sketch = DecayedSpaceSaving(
+            self.settings.trending_capacity,
+            self.settings.trending_half_life,
+        )
+        self._ranking: list[dict] = []
+        self._ranked_at = 0.0
+
+    def record(self, symbol: str) -> None:
+        """Count one successful request for a coin symbol or CoinGecko id."""
+        key = symbol.lower()
+        table = market_service.table()
+        row = table.find(key) if table is not None else None
+        if row is not None:
+            # Market rows without a symbol keep the requested key
+            key = table.text["symbol"][row] or key
+        self.sketch.add(key.upper())
+
+    def _momentum(self, symbol: str, tickers: dict, median_volume: float) -> tuple[float, Optional[float]]:
+        ticker = tickers.get(f"{symbol}USDT")
+        if ticker is None:
+            return 1.0, None
+        _, change, quote_volume, _, _ = ticker
+        price = min(abs(change) / 10, 1.0)
+        volume = min(max(math.log10(quote_volume / median_volume), 0.0), 1.0) if median_volume and quote_volume > 0 else 0.0
+        return 1 + PRICE_MOMENTUM_WEIGHT * price + VOLUME_MOMENTUM_WEIGHT * volume, change
+
+    def _rank(self) -> list[dict]:
+        estimates = self.sketch.estimates()
+        total = sum(count for count, _ in estimates.values())
+        if not total:
+            return []
+
+        tickers = binance_service.tickers.value or {}
+        volumes = sorted(t[2] for pair, t in tickers.items() if pair.endswith("USDT"))
+        median_volume = volumes[len(volumes) // 2] if volumes else 0.0
+        btc = tickers.get("BTCUSDT")
+        table = market_service.table()
+
+        ranking = []
+        for symbol, (count, error) in estimates.items():
+            momentum, change = self._momentum(symbol, tickers, median_volume)
+            ticker = tickers.get(f"{symbol}USDT")
+            row = table.find(symbol) if table is not None else None
+            rank = table.numeric["rank"][row] if row is not None else math.nan
+            ranking.append({
+                "symbol": symbol,
+                "name": (table.text["name"][row] if row is not None else None) or symbol,
+                "market_cap_rank": None if math.isnan(rank) else int(rank),
+                "price_btc": ticker[0] / btc[0] if ticker and btc and btc[0] else None,
+                "score": round(count / total * momentum, 6),
+                "requests": round(count, 3),
+                "requests_error": round(error, 3),
+                "price_change_24h": change,
+            })
+        ranking.sort(key=lambda coin: coin["score"], reverse=True)
+        return ranking
+
+    def top(self, limit: int) -> list[dict]:
+        """The top ``limit`` coins; the full ranking is rebuilt at most every RANKING_TTL seconds."""
+        now = time.time()
+        if now - self._ranked_at > RANKING_TTL:
+            self._ranking = self._rank()
+            self._ranked_at = now
+        return self._ranking[:limit]
+
+
+trending_service = TrendingService()
@@ -0,0 +1,491 @@
+"""
+Local stand-in for every upstream API the service talks to.
+
+Serves recorded payloads from ``bench/payloads`` when present (see
+``bench/record.py``) and deterministic synthetic payloads otherwise, with
+injectable latency and error rates.
+
+Run:
+    python -m bench.fake_upstream --port 9100 --latency-ms 40 --jitter-ms 20 --error-rate 0.01
+
+Then point the API at it:
+    BINANCE_BASE_URL=http://127.0.0.1:9100 \\
+    COINGECKO_BASE_URL=http://127.0.0.1:9100 \\
+    FEAR_GREED_URL=http://127.0.0.1:9100/fng/ \\
+    BLOCKCHAIN_INFO_URL=http://127.0.0.1:9100 \\
+    BLOCKCHAIN_API_URL=http://127.0.0.1:9100 \\
+    NEWS_FEED_BASE_URL=http://127.0.0.1:9100/rss \\
+    uvicorn app.main:app --port 8000
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+from pathlib import Path
+from typing import Optional
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, Response
+
+PAYLOAD_DIR = Path(__file__).parent / "payloads"
+
+# (coingecko id, symbol, name, price usd), ordered by market cap
+COINS = [
+    ("bitcoin", "BTC", "Bitcoin", 65000.0),
+    ("ethereum", "ETH", "Ethereum", 3200.0),
+    ("tether", "USDT", "Tether", 1.0),
+    ("binancecoin", "BNB", "BNB", 580.0),
+    ("solana", "SOL", "Solana", 145.0),
+    ("ripple", "XRP", "XRP", 0.52),
+    ("usd-coin", "USDC", "USDC", 1.0),
+    ("cardano", "ADA", "Cardano", 0.45),
+    ("dogecoin", "DOGE", "Dogecoin", 0.15),
+    ("tron", "TRX", "TRON", 0.12),
+    ("avalanche-2", "AVAX", "Avalanche", 35.0),
+    ("polkadot", "DOT", "Polkadot", 7.0),
+    ("chainlink", "LINK", "Chainlink", 14.0),
+    ("litecoin", "LTC", "Litecoin", 80.0),
+    ("uniswap", "UNI", "Uniswap", 9.0),
+]
+
+# Synthetic long tail so market pagination has something to page through
+COINS += [(f"coin-{i}", f"C{i}", f"Coin {i}", round(10.0 / i, 6)) for i in range(1, 986)]
+
+config = {
+    "latency_ms": 0.0,
+    "jitter_ms": 0.0,
+    "error_rate": 0.0,
+}
+
+# Alert webhook deliveries received on /_fake/webhook
+webhooks: list[dict] = []
+
+app = FastAPI(title="Fake Upstream")
+
+
+def load_recorded(name: str) -> Optional[object]:
+    """Return a recorded JSON payload from ``bench/payloads`` if one exists."""
+    path = PAYLOAD_DIR / f"{name}.json"
+    if path.exists():
+        return json.loads(path.read_text())
+    return None
+
+
+def _coin_by_id(coin_id: str) -> Optional[tuple]:
+    for coin in COINS:
+        if coin[0] == coin_id:
+            return coin
+    return None
+
+
+def _coin_by_symbol(symbol: str) -> Optional[tuple]:
+    symbol = symbol.upper()
+    for coin in COINS:
+        if coin[1] == symbol:
+            return coin
+    return None
+
+
+def _market_cap(price: float, rank: int) -> float:
+    return round(price * 10_000_000_000 / rank, 2)
+
+
+def _ticker_24hr(symbol: str, price: float) -> dict:
+    rng = random.Random(symbol)
+    change = round(rng.uniform(-8, 8), 3)
+    volume = round(rng.uniform(1e5, 1e7), 2)
+    return {
+        "symbol": symbol,
+        "priceChange": str(round(price * change / 100, 8)),
+        "priceChangePercent": str(change),
+        "lastPrice": str(price),
+        "bidPrice": str(round(price * 0.9999, 8)),
+        "askPrice": str(round(price * 1.0001, 8)),
+        "openPrice": str(round(price / (1 + change / 100), 8)),
+        "highPrice": str(round(price * 1.03, 8)),
+        "lowPrice": str(round(price * 0.97, 8)),
+        "volume": str(round(volume / max(price, 1e-9), 8)),
+        "quoteVolume": str(volume),
+        "count": rng.randint(1000, 100000),
+    }
+
+
+def _binance_tickers() -> list[dict]:
+    tickers = []
+    btc_price = COINS[0][3]
+    for _, symbol, _, price in COINS[:200]:
+        if symbol == "USDT":
+            continue
+        tickers.append(_ticker_24hr(f"{symbol}USDT", price))
+        if symbol != "BTC":
+            tickers.append(_ticker_24hr(f"{symbol}BTC", round(price / btc_price, 10)))
+    # A few fiat pairs
+    tickers.append(_ticker_24hr("EURUSDT", 1.08))
+    tickers.append(_ticker_24hr("GBPUSDT", 1.27))
+    tickers.append(_ticker_24hr("BTCEUR", round(btc_price / 1.08, 2)))
+    return tickers
+
+
+@app.middleware("http")
+async def inject_faults(request: Request, call_next):
+    """Apply the configured latency, jitter and error rate to every request."""
+    if request.url.path.startswith("/_fake"):
+        return await call_next(request)
+
+    delay = config["latency_ms"] + random.uniform(0, config["jitter_ms"])
+    if delay > 0:
+        await asyncio.sleep(delay / 1000)
+    if config["error_rate"] and random.random() < config["error_rate"]:
+        return JSONResponse({"error": "injected failure"}, status_code=503)
+    return await call_next(request)
+
+
+@app.get("/_fake/config")
+async def get_config():
+    return config
+
+
+@app.post("/_fake/config")
+async def set_config(request: Request):
+    """Change latency/error injection at runtime, e.g. mid-benchmark."""
+    body = await request.json()
+    for key in config:
+        if key in body:
+            config[key] = float(body[key])
+    return config
+
+
+@app.post("/_fake/prices")
+async def set_prices(request: Request):
+    """Override synthetic prices by symbol, e.g. {"BTC": 70000}."""
+    body = await request.json()
+    for i, (coin_id, symbol, name, _) in enumerate(COINS):
+        if symbol in body:
+            COINS[i] = (coin_id, symbol, name, float(body[symbol]))
+    return {symbol: price for _, symbol, _, price in COINS if symbol in body}
+
+
+@app.post("/_fake/webhook")
+async def receive_webhook(request: Request):
+    """Local receiver for alert webhooks; answers with the configured error rate."""
+    if config["error_rate"] and random.random() < config["error_rate"]:
+        return JSONResponse({"error": "injected failure"}, status_code=503)
+    webhooks.append(await request.json())
+    return {"received": len(webhooks)}
+
+
+@app.get("/_fake/webhook")
+async def list_webhooks():
+    return webhooks
+
+
+# --- Binance ---
+
+@app.get("/api/v3/ticker/24hr")
+async def binance_ticker_24hr(symbol: Optional[str] = None):
+    recorded = load_recorded("binance_ticker_24hr")
+    tickers = recorded if recorded is not None else _binance_tickers()
+    if symbol is None:
+        return tickers
+    for ticker in tickers:
+        if ticker["symbol"] == symbol:
+            return ticker
+    return JSONResponse({"code": -1121, "msg": "Invalid symbol."}, status_code=400)
+
+
+@app.get("/api/v3/ticker/price")
+async def binance_ticker_price():
+    tickers = load_recorded("binance_ticker_24hr") or _binance_tickers()
+    return [{"symbol": t["symbol"], "price": t["lastPrice"]} for t in tickers]
+
+
+# --- CoinGecko ---
+
+@app.get("/search")
+async def coingecko_search(query: str):
+    recorded = load_recorded(f"search_{query.lower()}")
+    if recorded is not None:
+        return recorded
+    coin = _coin_by_symbol(query) or _coin_by_id(query.lower())
+    coins = []
+    if coin:
+        coins.append({"id": coin[0], "name": coin[2], "symbol": coin[1]})
+    return {"coins": coins, "exchanges": [], "categories": []}
+
+
+@app.get("/search/trending")
+async def coingecko_trending():
+    recorded = load_recorded("search_trending")
+    if recorded is not None:
+        return recorded
+    btc_price = COINS[0][3]
+    return {
+        "coins": [
+            {"item": {"id": c[0], "symbol": c[1], "name": c[2], "market_cap_rank": rank,
+                      "price_btc": c[3] / btc_price}}
+            for rank, c in enumerate(COINS[4:11], start=5)
+        ]
+    }
+
+
+@app.get("/coins/markets")
+async def coingecko_markets(vs_currency: str = "usd", per_page: int = 100, page: int = 1):
+    recorded = load_recorded(f"coins_markets_{page}")
+    if recorded is not None:
+        return recorded[:per_page]
+    start = (page - 1) * per_page
+    result = []
+    for rank, (coin_id, symbol, name, price) in enumerate(COINS[start:start + per_page], start=start + 1):
+        rng = random.Random(coin_id)
+        result.append({
+            "id": coin_id,
+            "symbol": symbol.lower(),
+            "name": name,
+            "current_price": price,
+            "market_cap": _market_cap(price, rank),
+            "market_cap_rank": rank,
+            "total_volume": round(_market_cap(price, rank) * rng.uniform(0.01, 0.2), 2),
+            "price_change_percentage_24h": round(rng.uniform(-12, 12), 3),
+            "last_updated": "2024-01-15T10:30:00.000Z",
+        })
+    return result
+
+
+@app.get("/coins/{coin_id}/ohlc")
+async def coingecko_ohlc(coin_id: str, vs_currency: str = "usd", days: int = 30):
+    recorded = load_recorded(f"ohlc_{coin_id}_{days}")
+    if recorded is not None:
+        return recorded
+    coin = _coin_by_id(coin_id)
+    if not coin:
+        return JSONResponse({"error": "coin not found"}, status_code=404)
+
+    # CoinGecko returns 4-day candles beyond 30 days, 4-hour candles below
+    step_hours = 96 if days > 30 else (4 if days > 2 else 0.5)
+    points = int(days * 24 / step_hours)
+    now_ms = int(time.time() // 3600 * 3600 * 1000)
+    rng = random.Random(f"{coin_id}:{days}")
+    price = coin[3]
+    rows = []
+    for i in range(points, 0, -1):
+        open_ = price
+        close = max(open_ * (1 + rng.gauss(0, 0.02)), 1e-9)
+        rows.append([
+            now_ms - int(i * step_hours * 3600 * 1000),
+            round(open_, 8),
+            round(max(open_, close) * 1.01, 8),
+            round(min(open_, close) * 0.99, 8),
+            round(close, 8),
+        ])
+        price = close
+    return rows
+
+
+@app.get("/coins/{coin_id}")
+async def coingecko_coin(coin_id: str):
+    recorded = load_recorded(f"coin_{coin_id}")
+    if recorded is not None:
+        return recorded
+    coin = _coin_by_id(coin_id)
+    if not coin:
+        return JSONResponse({"error": "coin not found"}, status_code=404)
+    rank = COINS.index(coin) + 1
+    return {
+        "id": coin[0],
+        "symbol": coin[1].lower(),
+        "name": coin[2],
+        "market_data": {
+            "current_price": {"usd": coin[3]},
+            "price_change_percentage_24h": 1.5,
+            "market_cap": {"usd": _market_cap(coin[3], rank)},
+            "total_volume": {"usd": _market_cap(coin[3], rank) * 0.05},
+        },
+        "last_updated": "2024-01-15T10:30:00.000Z",
+    }
+
+
+@app.get("/simple/price")
+async def coingecko_simple_price(ids: str, vs_currencies: str = "usd"):
+    result = {}
+    for coin_id in ids.split(","):
+        coin = _coin_by_id(coin_id)
+        if coin:
+            result[coin_id] = {"usd": coin[3]}
+    return result
+
+
+@app.get("/exchange_rates")
+async def coingecko_exchange_rates():
+    recorded = load_recorded("exchange_rates")
+    if recorded is not None:
+        return recorded
+    btc_price = COINS[0][3]
+    usd_rates = {"usd": 1.0, "eur": 0.926, "gbp": 0.787, "zar": 18.6, "jpy": 150.2, "aud": 1.52}
+    rates = {"btc": {"name": "Bitcoin", "unit": "BTC", "value": 1.0, "type": "crypto"}}
+    for code, per_usd in usd_rates.items():
+        rates[code] = {"name": code.upper(), "unit": code.upper(), "value": btc_price * per_usd, "type": "fiat"}
+    return {"rates": rates}
+
+
+@app.get("/exchanges")
+async def coingecko_exchanges(per_page: int = 100):
+    recorded = load_recorded("exchanges")
+    if recorded is not None:
+        return recorded[:per_page]
+    names = ["binance", "gdax", "kraken", "okex", "bybit_spot", "kucoin", "bitstamp", "gemini"]
+    return [
+        {"id": name, "name": name.title(), "country": None, "trust_score": 10 - i // 2,
+         "trust_score_rank": i + 1, "trade_volume_24h_btc": 100000.0 / (i + 1),
+         "year_established": 2012 + i, "url": f"https://{name}.example", "image": None}
+        for i, name in enumerate(names[:per_page])
+    ]
+
+
+def _exchange_tickers(exchange_id: str) -> list[dict]:
+    rng = random.Random(exchange_id)
+    tickers = []
+    for coin_id, symbol, _, price in COINS[:50]:
+        if symbol == "USDT":
+            continue
+        last = price * (1 + rng.uniform(-0.002, 0.002))
+        tickers.append({
+            "base": symbol,
+            "target": "USDT",
+            "coin_id": coin_id,
+            "last": last,
+            "volume": rng.uniform(1e2, 1e6),
+            "converted_last": {"usd": last},
+            "converted_volume": {"usd": rng.uniform(1e5, 1e8)},
+            "bid_ask_spread_percentage": round(rng.uniform(0.01, 0.3), 4),
+            "trade_url": None,
+            "trust_score": "green",
+        })
+    return tickers
+
+
+@app.get("/exchanges/{exchange_id}/tickers")
+async def coingecko_exchange_tickers(exchange_id: str, page: int = 1, coin_ids: Optional[str] = None):
+    recorded = load_recorded(f"exchange_tickers_{exchange_id}")
+    tickers = recorded["tickers"] if recorded is not None else _exchange_tickers(exchange_id)
+    if coin_ids:
+        wanted = set(coin_ids.split(","))
+        tickers = [t for t in tickers if t.get("coin_id") in wanted]
+    return {"name": exchange_id.title(), "tickers": tickers}
+
+
+@app.get("/exchanges/{exchange_id}")
+async def coingecko_exchange(exchange_id: str):
+    recorded = load_recorded(f"exchange_{exchange_id}")
+    if recorded is not None:
+        return recorded
+    return {
+        "id": exchange_id,
+        "name": exchange_id.title(),
+        "country": None,
+        "description": "",
+        "trust_score": 9,
+        "trust_score_rank": 1,
+        "trade_volume_24h_btc": 50000.0,
+        "year_established": 2017,
+        "url": f"https://{exchange_id}.example",
+        "image": None,
+        "has_trading_incentive": False,
+        "tickers": _exchange_tickers(exchange_id)[:100],
+    }
+
+
+# --- Alternative.me ---
+
+@app.get("/fng/")
+async def fear_greed(limit: int = 1):
+    recorded = load_recorded("fng")
+    if recorded is not None:
+        data = recorded["data"]
+    else:
+        today = int(time.time() // 86400 * 86400)
+        rng = random.Random("fng")
+        data = []
+        for i in range(2000):
+            value = rng.randint(5, 95)
+            label = ("Extreme Fear" if value < 25 else "Fear" if value < 50
+                     else "Greed" if value < 75 else "Extreme Greed")
+            data.append({"value": str(value), "value_classification": label,
+                         "timestamp": str(today - i * 86400)})
+    return {"name": "Fear and Greed Index", "data": data if limit == 0 else data[:limit]}
+
+
+# --- RSS ---
+
+@app.get("/rss/{source}")
+async def rss_feed(source: str):
+    path = PAYLOAD_DIR / f"rss_{source}.xml"
+    if path.exists():
+        return Response(path.read_bytes(), media_type="application/rss+xml")
+    items = "".join(
+        f"<item><title>{source} headline {i}</title>"
+        f"<link>https://{source}.example/article/{i}</link>"
+        f"<pubDate>Mon, 15 Jan 2024 {10 + i % 10:02d}:00:00 +0000</pubDate>"
+        f"<description>Synthetic article {i} from {source} for benchmarking.</description></item>"
+        for i in range(50)
+    )
+    body = f'<?xml version="1.0"?><rss version="2.0"><channel><title>{source}</title>{items}</channel></rss>'
+    return Response(body, media_type="application/rss+xml")
+
+
+# --- blockchain.info ---
+
+@app.get("/unconfirmed-transactions")
+async def unconfirmed_transactions(format: str = "json"):
+    recorded = load_recorded("unconfirmed_transactions")
+    if recorded is not None:
+        return recorded
+    rng = random.Random("txs")
+    txs = []
+    for i in range(100):
+        value = int(rng.expovariate(1 / 5) * 100_000_000)
+        txs.append({
+            "hash": f"{i:064x}",
+            "time": 1705312800 + i,
+            "inputs": [{"prev_out": {"addr": f"bc1qsender{i}"}}],
+            "out": [{"value": value, "addr": f"bc1qreceiver{i}"}],
+        })
+    return {"txs": txs}
+
+
+@app.get("/stats")
+async def blockchain_stats():
+    recorded = load_recorded("stats")
+    if recorded is not None:
+        return recorded
+    return {
+        "total_btc_sent": 60_000_000_000_000,
+        "n_tx": 450000,
+        "n_blocks_mined": 144,
+        "minutes_between_blocks": 9.8,
+        "hash_rate": 6.0e11,
+        "difficulty": 8.0e13,
+        "market_price_usd": COINS[0][3],
+    }
+
+
+def main():
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description="Run the local fake upstream server")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Base latency added to every response")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="Uniform random extra latency")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with 503")
+    args = parser.parse_args()
+
+    config["latency_ms"] = args.latency_ms
+    config["jitter_ms"] = args.jitter_ms
+    config["error_rate"] = args.error_rate
+
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
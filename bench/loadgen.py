@@ -0,0 +1,202 @@
+"""
+Load driver for the Crypto Price API.
+
+Drives every route in ``app/api/routes/`` with a fixed number of concurrent
+workers and reports throughput and p50/p95/p99 latency per route.
+
+Run against an API that is pointed at ``bench.fake_upstream``:
+    python -m bench.loadgen --url http://127.0.0.1:8000 --duration 30 --concurrency 20 --save results.json
+    python -m bench.loadgen --url http://127.0.0.1:8000 --baseline results.json
+
+The ``admin_profiles`` route only runs when ``--profiler-secret`` is given (the
+API's ``PROFILER_SECRET``), and alert webhooks point at the fake upstream, so
+start the API with ``ALERT_ALLOW_PRIVATE_WEBHOOKS=true``.
+"""
+import argparse
+import asyncio
+import json
+import random
+import sys
+import time
+from pathlib import Path
+
+import httpx
+
+from app.services.profiler import make_token
+
+# Alert rules are created under this key; webhooks go to the fake upstream
+ALERT_KEY = "loadgen"
+ALERT_WEBHOOK = "http://127.0.0.1:9100/_fake/webhook"
+
+# route name -> (weight, requests picked at random); a request is a path to GET
+# or a (method, path, json body) tuple
+SCENARIOS = {
+    "price": (20, ["/price/btc", "/price/eth", "/price/sol", "/price/ada", "/price/doge"]),
+    "history": (8, ["/history/btc?days=30", "/history/eth?days=7", "/history/sol?days=365"]),
+    "top": (6, ["/prices/top100?limit=100", "/prices/top100?limit=250"]),
+    "trending": (4, ["/trending"]),
+    "sentiment": (4, ["/fear-greed"]),
+    "chart": (1, ["/chart/btc?days=30", "/chart/eth?days=90&width=1920&height=1080"]),
+    "news": (3, ["/news?limit=20", "/news?source=coindesk"]),
+    "news_sources": (1, ["/news/sources"]),
+    "whales_transactions": (2, ["/whales/transactions?limit=10"]),
+    "whales_stats": (2, ["/whales/stats"]),
+    "exchanges_list": (2, ["/exchanges/list?limit=20"]),
+    "exchange_details": (2, ["/exchanges/binance"]),
+    "exchange_tickers": (2, ["/exchanges/binance/tickers?limit=50"]),
+    "compare": (2, ["/compare/btc", "/compare/eth?exchanges=binance,gdax,kraken"]),
+    "price_sparkline": (3, ["/price/btc/sparkline", "/price/eth/sparkline?window=1h&points=60"]),
+    "price_stats": (2, ["/price/btc/stats", "/price/sol/stats"]),
+    "history_bulk": (1, ["/history/bulk?symbols=btc,eth,sol&days=30", "/history/bulk?symbols=btc,eth&days=365"]),
+    "sparklines": (1, ["/chart/sparklines?symbols=btc,eth,sol,ada,doge"]),
+    "sentiment_history": (2, ["/fear-greed/history", "/fear-greed/history?from=2024-01-01&to=2024-12-31"]),
+    "sentiment_correlation": (1, ["/fear-greed/correlation/btc", "/fear-greed/correlation/eth?days=90"]),
+    "alerts_create": (1, [
+        ("POST", "/alerts", {"symbol": "btc", "condition": "above", "threshold": 1e9, "webhook_url": ALERT_WEBHOOK}),
+        ("POST", "/alerts", {"symbol": "eth", "condition": "change", "threshold": 5, "window": "1h",
+                             "webhook_url": ALERT_WEBHOOK}),
+    ]),
+    "alerts_list": (1, ["/alerts", "/alerts?symbol=btc"]),
+    "admin_profiles": (1, ["/admin/profiles"]),
+}
+
+
+def percentile(sorted_values: list[float], pct: float) -> float:
+    """Nearest-rank percentile of an already sorted list."""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, int(round(pct / 100 * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+async def worker(client: httpx.AsyncClient, deadline: float, samples: dict, errors: dict, routes: list[str],
+                 profile_token: str = None):
+    weights = [SCENARIOS[name][0] for name in routes]
+    while time.perf_counter() < deadline:
+        name = random.choices(routes, weights=weights)[0]
+        request = random.choice(SCENARIOS[name][1])
+        method, path, body = ("GET", request, None) if isinstance(request, str) else request
+        headers = {"X-Profile": profile_token} if path.startswith("/admin/") else None
+        created = None
+        start = time.perf_counter()
+        try:
+            response = await client.request(method, path, json=body, headers=headers)
+            await response.aread()
+            ok = response.status_code < 500
+            if method == "POST" and response.status_code == 201:
+                created = response.json()["id"]
+        except httpx.HTTPError:
+            ok = False
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        samples[name].append(elapsed_ms)
+        if not ok:
+            errors[name] += 1
+        # Delete what was created (untimed) so long runs stay under the alert cap
+        if created:
+            try:
+                await client.delete(f"{path}/{created}")
+            except httpx.HTTPError:
+                pass
+
+
+async def run(url: str, duration: float, concurrency: int, routes: list[str], profile_token: str = None) -> dict:
+    samples = {name: [] for name in routes}
+    errors = {name: 0 for name in routes}
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    headers = {"X-Alert-Key": ALERT_KEY}
+
+    async with httpx.AsyncClient(base_url=url, timeout=60.0, limits=limits, headers=headers) as client:
+        started = time.perf_counter()
+        deadline = started + duration
+        await asyncio.gather(*(worker(client, deadline, samples, errors, routes, profile_token)
+                               for _ in range(concurrency)))
+        wall = time.perf_counter() - started
+
+    results = {}
+    for name in routes:
+        values = sorted(samples[name])
+        results[name] = {
+            "requests": len(values),
+            "errors": errors[name],
+            "rps": round(len(values) / wall, 2),
+            "p50_ms": round(percentile(values, 50), 2),
+            "p95_ms": round(percentile(values, 95), 2),
+            "p99_ms": round(percentile(values, 99), 2),
+        }
+    total = sum(r["requests"] for r in results.values())
+    return {
+        "duration_s": round(wall, 2),
+        "concurrency": concurrency,
+        "total_rps": round(total / wall, 2),
+        "routes": results,
+    }
+
+
+def print_report(report: dict, baseline: dict = None):
+    header = f"{'route':<22}{'reqs':>8}{'err':>6}{'rps':>9}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"
+    if baseline:
+        header += f"{'Δp50':>9}{'Δp95':>9}{'Δp99':>9}"
+    print(header)
+    print("-" * len(header))
+    for name, r in report["routes"].items():
+        line = f"{name:<22}{r['requests']:>8}{r['errors']:>6}{r['rps']:>9}{r['p50_ms']:>10}{r['p95_ms']:>10}{r['p99_ms']:>10}"
+        base = (baseline or {}).get("routes", {}).get(name)
+        if base:
+            for key in ("p50_ms", "p95_ms", "p99_ms"):
+                line += f"{delta_pct(base[key], r[key]):>+8.1f}%"
+        print(line)
+    print(f"\ntotal: {report['total_rps']} req/s over {report['duration_s']}s at concurrency {report['concurrency']}")
+
+
+def delta_pct(before: float, after: float) -> float:
+    if not before:
+        return 0.0
+    return (after - before) / before * 100
+
+
+def regressions(report: dict, baseline: dict, threshold_pct: float) -> list[str]:
+    """Routes whose p95 got worse than the baseline by more than ``threshold_pct``."""
+    failed = []
+    for name, r in report["routes"].items():
+        base = baseline.get("routes", {}).get(name)
+        if base and r["requests"] and delta_pct(base["p95_ms"], r["p95_ms"]) > threshold_pct:
+            failed.append(name)
+    return failed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the Crypto Price API")
+    parser.add_argument("--url", default="http://127.0.0.1:8000")
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds to run")
+    parser.add_argument("--concurrency", type=int, default=20, help="Concurrent workers")
+    parser.add_argument("--routes", nargs="+", choices=sorted(SCENARIOS),
+                        help="Routes to drive (default: all; admin_profiles needs --profiler-secret)")
+    parser.add_argument("--save", help="Write the results as JSON to this file")
+    parser.add_argument("--baseline", help="Compare against a previously saved results file")
+    parser.add_argument("--max-regression", type=float, default=10.0,
+                        help="Fail if any route's p95 is this many percent slower than the baseline")
+    parser.add_argument("--profiler-secret", help="The API's PROFILER_SECRET, to sign tokens for /admin routes")
+    args = parser.parse_args()
+
+    routes = args.routes or [name for name in SCENARIOS if name != "admin_profiles" or args.profiler_secret]
+    if "admin_profiles" in routes and not args.profiler_secret:
+        parser.error("admin_profiles needs --profiler-secret")
+    token = make_token(args.duration + 600, secret=args.profiler_secret) if args.profiler_secret else None
+
+    report = asyncio.run(run(args.url, args.duration, args.concurrency, routes, token))
+    baseline = json.loads(Path(args.baseline).read_text()) if args.baseline else None
+    print_report(report, baseline)
+
+    if args.save:
+        Path(args.save).write_text(json.dumps(report, indent=2))
+
+    if baseline:
+        failed = regressions(report, baseline, args.max_regression)
+        if failed:
+            print(f"\np95 regression over {args.max_regression}%: {', '.join(failed)}")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Record real upstream payloads into ``bench/payloads`` for the fake upstream.
+
+Run once against the live APIs (mind the CoinGecko rate limit):
+    python -m bench.record --coins bitcoin ethereum solana
+"""
+import argparse
+import asyncio
+import json
+
+import httpx
+
+from app.api.routes.news import RSS_FEEDS
+from app.config import get_settings
+from bench.fake_upstream import PAYLOAD_DIR
+
+OHLC_DAYS = [7, 30, 365]
+
+
+async def record_json(client: httpx.AsyncClient, name: str, url: str, params: dict = None):
+    response = await client.get(url, params=params)
+    if response.status_code != 200:
+        print(f"skip {name}: HTTP {response.status_code}")
+        return
+    (PAYLOAD_DIR / f"{name}.json").write_text(json.dumps(response.json()))
+    print(f"recorded {name}")
+
+
+async def main(coins: list[str]):
+    settings = get_settings()
+    cg = settings.coingecko_base_url
+    PAYLOAD_DIR.mkdir(exist_ok=True)
+
+    async with httpx.AsyncClient(timeout=30.0, follow_redirects=True) as client:
+        await record_json(client, "binance_ticker_24hr", f"{settings.binance_base_url}/api/v3/ticker/24hr")
+        await record_json(client, "search_trending", f"{cg}/search/trending")
+        await record_json(client, "exchange_rates", f"{cg}/exchange_rates")
+        await record_json(client, "exchanges", f"{cg}/exchanges", {"per_page": 100})
+        await record_json(client, "exchange_binance", f"{cg}/exchanges/binance")
+        await record_json(client, "exchange_tickers_binance", f"{cg}/exchanges/binance/tickers")
+        await record_json(client, "fng", settings.fear_greed_url, {"limit": 0})
+        await record_json(client, "unconfirmed_transactions", f"{settings.blockchain_info_url}/unconfirmed-transactions", {"format": "json"})
+        await record_json(client, "stats", f"{settings.blockchain_api_url}/stats")
+
+        for page in range(1, 5):
+            await record_json(client, f"coins_markets_{page}", f"{cg}/coins/markets", {
+                "vs_currency": "usd", "order": "market_cap_desc", "per_page": 250, "page": page,
+            })
+
+        for coin_id in coins:
+            await record_json(client, f"coin_{coin_id}", f"{cg}/coins/{coin_id}", {
+                "localization": "false", "tickers": "false",
+                "community_data": "false", "developer_data": "false",
+            })
+            for days in OHLC_DAYS:
+                await record_json(client, f"ohlc_{coin_id}_{days}", f"{cg}/coins/{coin_id}/ohlc", {
+                    "vs_currency": "usd", "days": days,
+                })
+
+        for source, url in RSS_FEEDS.items():
+            response = await client.get(url)
+            if response.status_code == 200:
+                (PAYLOAD_DIR / f"rss_{source}.xml").write_bytes(response.content)
+                print(f"recorded rss_{source}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Record upstream payloads for benchmarking")
+    parser.add_argument("--coins", nargs="+", default=["bitcoin", "ethereum", "solana"])
+    args = parser.parse_args()
+    asyncio.run(main(args.coins))
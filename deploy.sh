@@ -24,9 +24,9 @@ source venv/bin/activate
 echo "[3/4] Installing dependencies..."
 pip install -r requirements.txt --quiet
 
-# Restart PM2 process
-echo "[4/4] Restarting PM2 process..."
-pm2 restart crypto-price-api || pm2 start ecosystem.config.js
+# Start or restart every app in the ecosystem file
+echo "[4/4] Restarting PM2 processes..."
+pm2 startOrRestart ecosystem.config.js --update-env
 
 # Verify
 sleep 3
@@ -0,0 +1,74 @@
+import pytest
+from app.api.middleware.admission import RateLimiter, SlidingWindow, route_class
+
+
+def test_route_class_uses_longest_prefix():
+    assert route_class("/history/bulk") == ("heavy", 20)
+    assert route_class("/history/btc") == ("medium", 5)
+    assert route_class("/price/btc") == ("light", 1)
+
+
+def test_window_counts_current_window():
+    window = SlidingWindow(0.0)
+    window.current = 10
+    assert window.used(30.0, 60.0) == 10
+
+
+def test_window_weights_previous_window_by_overlap():
+    window = SlidingWindow(0.0)
+    window.current = 10
+    # 15s into the next window, three quarters of the previous one still overlap
+    assert window.used(75.0, 60.0) == pytest.approx(7.5)
+    assert window.start == 60.0
+    assert window.current == 0
+
+
+def test_window_clears_after_idle_windows():
+    window = SlidingWindow(0.0)
+    window.current = 10
+    assert window.used(130.0, 60.0) == 0
+    assert window.start == 120.0
+
+
+def test_limiter_admits_within_budget():
+    limiter = RateLimiter(limit=10, window=60.0, max_clients=10)
+    assert limiter.admit("a", 4, 0.0) == (True, 6, 0.0)
+    assert limiter.admit("a", 6, 1.0) == (True, 0, 0.0)
+
+
+def test_limiter_rejects_over_budget_until_window_ends():
+    limiter = RateLimiter(limit=10, window=60.0, max_clients=10)
+    limiter.admit("a", 10, 0.0)
+    admitted, remaining, retry_after = limiter.admit("a", 1, 20.0)
+    assert not admitted
+    assert remaining == 0
+    assert retry_after == pytest.approx(40.0)
+    # Rejected requests are not charged
+    assert limiter.clients["a"].current == 10
+
+
+def test_limiter_retry_after_drains_previous_window():
+    limiter = RateLimiter(limit=10, window=60.0, max_clients=10)
+    limiter.admit("a", 10, 0.0)
+    # At t=60 the previous window still counts in full
+    admitted, _, retry_after = limiter.admit("a", 5, 60.0)
+    assert not admitted
+    # Half of the previous window has to drain: 30s
+    assert retry_after == pytest.approx(30.0)
+    assert limiter.admit("a", 5, 60.0 + retry_after)[0]
+
+
+def test_limiter_tracks_clients_separately():
+    limiter = RateLimiter(limit=5, window=60.0, max_clients=10)
+    limiter.admit("a", 5, 0.0)
+    assert not limiter.admit("a", 1, 1.0)[0]
+    assert limiter.admit("b", 1, 1.0)[0]
+
+
+def test_limiter_evicts_least_recently_seen_client():
+    limiter = RateLimiter(limit=5, window=60.0, max_clients=2)
+    limiter.admit("a", 5, 0.0)
+    limiter.admit("b", 1, 0.0)
+    limiter.admit("a", 0, 1.0)
+    limiter.admit("c", 1, 2.0)
+    assert list(limiter.clients) == ["a", "c"]
@@ -0,0 +1,153 @@
+import asyncio
+import pytest
+from app.config import get_settings
+from app.services import alerts
+from app.services.alerts import AlertRule, SymbolRules, ThresholdIndex, WebhookDispatcher, public_address, webhook_allowed
+
+
+def rule(rule_id: str, condition: str, threshold: float, window: int = 0) -> AlertRule:
+    return AlertRule(id=rule_id, symbol="BTC", condition=condition, threshold=threshold, webhook_url="", window=window)
+
+
+def no_history(window: int):
+    return None
+
+
+def test_threshold_index_crossed_is_half_open():
+    index = ThresholdIndex()
+    for key, rule_id in ((100.0, "a"), (200.0, "b"), (300.0, "c")):
+        index.add(key, rule_id)
+    assert index.crossed(100.0, 200.0) == ["b"]
+    assert index.crossed(99.0, 300.0) == ["a", "b", "c"]
+    assert index.crossed(300.0, 400.0) == []
+
+
+def test_threshold_index_remove_with_duplicate_keys():
+    index = ThresholdIndex()
+    index.add(100.0, "a")
+    index.add(100.0, "b")
+    index.remove(100.0, "a")
+    assert index.ids == ["b"]
+    index.remove(100.0, "missing")
+    assert len(index) == 1
+
+
+def test_first_price_does_not_fire():
+    rules = SymbolRules()
+    rules.add(rule("a", "above", 100.0))
+    assert rules.match(150.0, no_history) == []
+
+
+def test_above_fires_on_upward_cross_only():
+    rules = SymbolRules()
+    rules.add(rule("a", "above", 100.0))
+    rules.add(rule("b", "above", 200.0))
+    rules.match(90.0, no_history)
+    assert rules.match(150.0, no_history) == [("a", None)]
+    # Falling back below the threshold does not fire an above rule
+    assert rules.match(90.0, no_history) == []
+    assert rules.match(250.0, no_history) == [("a", None), ("b", None)]
+
+
+def test_below_fires_on_downward_cross():
+    rules = SymbolRules()
+    rules.add(rule("a", "below", 100.0))
+    rules.add(rule("b", "below", 50.0))
+    rules.match(120.0, no_history)
+    assert rules.match(100.0, no_history) == [("a", None)]
+    assert rules.match(110.0, no_history) == []
+    assert rules.match(40.0, no_history) == [("a", None), ("b", None)]
+
+
+def test_change_rule_fires_when_move_rises_past_threshold():
+    rules = SymbolRules()
+    rules.add(rule("a", "change", 5.0, window=3600))
+    reference = {3600: 100.0}.get
+    assert rules.match(103.0, reference) == []
+    matched = rules.match(94.0, reference)
+    assert [rule_id for rule_id, _ in matched] == ["a"]
+    assert matched[0][1] == pytest.approx(-6.0)
+    # Still past the threshold: only a new crossing fires
+    assert rules.match(93.0, reference) == []
+
+
+def test_removed_rules_do_not_match():
+    rules = SymbolRules()
+    above, change = rule("a", "above", 100.0), rule("b", "change", 1.0, window=60)
+    rules.add(above)
+    rules.add(change)
+    rules.remove(above)
+    rules.remove(change)
+    assert len(rules) == 0
+    assert rules.changes == {}
+    rules.match(90.0, {60: 90.0}.get)
+    assert rules.match(150.0, {60: 90.0}.get) == []
+
+
+@pytest.mark.parametrize("address, public", [
+    ("8.8.8.8", True),
+    ("2001:4860:4860::8888", True),
+    ("127.0.0.1", False),
+    ("10.1.2.3", False),
+    ("192.168.0.1", False),
+    ("169.254.169.254", False),
+    ("::1", False),
+    ("fe80::1%eth0", False),
+    ("::ffff:127.0.0.1", False),
+])
+def test_public_address(address, public):
+    assert public_address(address) is public
+
+
+async def deliver_to_local_server() -> tuple[bool, bool, list[bytes]]:
+    """
+    Check a webhook on hooks.example as at creation, then deliver to it; a
+    local server stands in for whatever address is connected to. Returns
+    (allowed, delivered, request heads the server received).
+    """
+    received = []
+
+    async def handle(reader, writer):
+        received.append(await reader.readuntil(b"\r\n\r\n"))
+        writer.write(b"HTTP/1.1 204 No Content\r\nContent-Length: 0\r\n\r\n")
+        await writer.drain()
+        writer.close()
+
+    server = await asyncio.start_server(handle, "127.0.0.1", 0)
+    url = f"http://hooks.example:{server.sockets[0].getsockname()[1]}/hook"
+    dispatcher = WebhookDispatcher()
+    try:
+        allowed = await webhook_allowed(url)
+        delivered = await dispatcher.deliver(url, [{"alert_id": "a"}])
+    finally:
+        await dispatcher.close()
+        server.close()
+        await server.wait_closed()
+    return allowed, delivered, received
+
+
+def fake_dns(monkeypatch, answers: list[list[str]]):
+    async def resolve(host, port):
+        return answers.pop(0)
+
+    monkeypatch.setattr(alerts, "resolve", resolve)
+    monkeypatch.setattr(get_settings(), "alert_allow_private_webhooks", False)
+
+
+def test_delivery_refuses_host_rebound_to_private_address(monkeypatch):
+    # Public when the rule is checked, loopback when the webhook is called
+    fake_dns(monkeypatch, [["93.184.216.34"], ["127.0.0.1"]])
+    allowed, delivered, received = asyncio.run(deliver_to_local_server())
+    assert allowed
+    assert not delivered
+    assert received == []
+
+
+def test_delivery_connects_to_the_checked_address(monkeypatch):
+    # Treat loopback as public so the local server can stand in for the host
+    monkeypatch.setattr(alerts, "public_address", lambda address: True)
+    fake_dns(monkeypatch, [["127.0.0.1"], ["127.0.0.1"]])
+    allowed, delivered, received = asyncio.run(deliver_to_local_server())
+    assert allowed and delivered
+    assert len(received) == 1
+    assert b"host: hooks.example:" in received[0].lower()
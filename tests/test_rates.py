@@ -0,0 +1,96 @@
+import time
+import pytest
+from app.services.binance import binance_service
+from app.services.rates import RateGraph, RateService, split_pair
+
+
+def tickers(**pairs):
+    """Ticker snapshot entries as the Binance service stores them."""
+    return {symbol: (last, change, volume, 0.0, 0.0) for symbol, (last, change, volume) in pairs.items()}
+
+
+def test_split_pair_prefers_longest_quote():
+    assert split_pair("ETHBTC") == ("ETH", "BTC")
+    assert split_pair("BTCFDUSD") == ("BTC", "FDUSD")
+    assert split_pair("USDT") is None
+
+
+def test_convert_same_asset():
+    conversion = RateGraph().convert("btc", "BTC")
+    assert conversion.rate == 1.0
+    assert conversion.path == ["BTC"]
+
+
+def test_convert_direct_and_inverse():
+    graph = RateGraph.build(tickers(BTCUSDT=(50000.0, 10.0, 1e9)))
+    assert graph.convert("btc", "usdt").rate == pytest.approx(50000.0)
+    inverse = graph.convert("USDT", "BTC")
+    assert inverse.rate == pytest.approx(1 / 50000.0)
+    assert inverse.path == ["USDT", "BTC"]
+
+
+def test_convert_change_compounds_along_path():
+    graph = RateGraph.build(tickers(BTCUSDT=(50000.0, 10.0, 1e9)))
+    assert graph.convert("BTC", "USDT").change_24h == pytest.approx(10.0)
+    assert graph.convert("USDT", "BTC").change_24h == pytest.approx((1 / 1.1 - 1) * 100)
+
+
+def test_convert_triangulates_through_hub():
+    graph = RateGraph.build(tickers(
+        SOLBTC=(0.002, 0.0, 1e3),
+        BTCEUR=(46000.0, 0.0, 1e4),
+        BTCUSDT=(50000.0, 0.0, 1e9),
+    ))
+    conversion = graph.convert("SOL", "EUR")
+    assert conversion.path == ["SOL", "BTC", "EUR"]
+    assert conversion.rate == pytest.approx(0.002 * 46000.0)
+
+
+def test_convert_does_not_route_through_non_hubs():
+    graph = RateGraph()
+    graph.add_edge("AAA", "XYZ", 2.0, 1.0, 1.0)
+    graph.add_edge("XYZ", "BBB", 3.0, 1.0, 1.0)
+    assert graph.convert("AAA", "BBB") is None
+
+
+def test_convert_prefers_direct_market_on_equal_liquidity():
+    graph = RateGraph()
+    graph.add_edge("ETH", "USDT", 3000.0, 1.0, 100.0)
+    graph.add_edge("ETH", "BTC", 0.06, 1.0, 100.0)
+    graph.add_edge("BTC", "USDT", 50000.0, 1.0, 100.0)
+    assert graph.convert("ETH", "USDT").path == ["ETH", "USDT"]
+
+
+def test_convert_prefers_deeper_triangulated_route():
+    graph = RateGraph()
+    graph.add_edge("ETH", "EUR", 2800.0, 1.0, 10.0)
+    graph.add_edge("ETH", "BTC", 0.06, 1.0, 1000.0)
+    graph.add_edge("BTC", "EUR", 46000.0, 1.0, 1000.0)
+    conversion = graph.convert("ETH", "EUR")
+    assert conversion.path == ["ETH", "BTC", "EUR"]
+    assert conversion.rate == pytest.approx(0.06 * 46000.0)
+
+
+def test_convert_unknown_asset():
+    graph = RateGraph.build(tickers(BTCUSDT=(50000.0, 0.0, 1e9)))
+    assert graph.convert("BTC", "XYZ") is None
+
+
+def test_fiat_rates_fill_missing_btc_markets():
+    graph = RateGraph.build(tickers(BTCUSDT=(50000.0, 0.0, 1e9)), {"ZAR": 900000.0})
+    conversion = graph.convert("USDT", "ZAR")
+    assert conversion.path == ["USDT", "BTC", "ZAR"]
+    assert conversion.rate == pytest.approx(900000.0 / 50000.0)
+    # Fiat edges carry no 24h change
+    assert conversion.change_24h is None
+
+
+def test_service_marks_conversions_from_old_tickers_stale(monkeypatch):
+    snapshot = binance_service.tickers
+    monkeypatch.setattr(snapshot, "value", tickers(BTCUSDT=(50000.0, 0.0, 1e9)))
+    monkeypatch.setattr(snapshot, "updated_at", time.time())
+    service = RateService()
+    assert not service.convert("BTC", "USD").stale
+
+    monkeypatch.setattr(snapshot, "updated_at", time.time() - 86400)
+    assert service.convert("BTC", "USD").stale
@@ -0,0 +1,70 @@
+import numpy as np
+from app.services.timeseries import RollupTier, TickRing, window_seconds
+
+
+def test_window_seconds():
+    assert window_seconds("15m") == 900
+    assert window_seconds("24h") == 86400
+    assert window_seconds("7d") == 604800
+
+
+def test_tick_ring_before_wrapping():
+    ring = TickRing(capacity=4)
+    assert ring.last_timestamp == 0.0
+    ring.append(1.0, 10.0)
+    ring.append(2.0, 20.0)
+    timestamps, prices = ring.view()
+    assert timestamps.tolist() == [1.0, 2.0]
+    assert prices.tolist() == [10.0, 20.0]
+    assert ring.last_timestamp == 2.0
+
+
+def test_tick_ring_overwrites_oldest():
+    ring = TickRing(capacity=3)
+    for t in range(1, 6):
+        ring.append(float(t), t * 10.0)
+    timestamps, prices = ring.view()
+    assert timestamps.tolist() == [3.0, 4.0, 5.0]
+    assert prices.tolist() == [30.0, 40.0, 50.0]
+    assert ring.last_timestamp == 5.0
+
+
+def test_rollup_tracks_close_high_low_per_bucket():
+    tier = RollupTier(resolution=60, capacity=10)
+    for t, price in ((0, 10.0), (10, 15.0), (20, 5.0), (30, 12.0), (60, 20.0)):
+        tier.add(t, price)
+    times, slots = tier.series(0, 119)
+    assert times.tolist() == [0.0, 60.0]
+    assert tier.close[slots].tolist() == [12.0, 20.0]
+    assert tier.high[slots].tolist() == [15.0, 20.0]
+    assert tier.low[slots].tolist() == [5.0, 20.0]
+
+
+def test_rollup_skips_empty_buckets():
+    tier = RollupTier(resolution=60, capacity=10)
+    tier.add(0, 1.0)
+    tier.add(180, 2.0)
+    times, slots = tier.series(0, 239)
+    assert times.tolist() == [0.0, 180.0]
+    assert tier.close[slots].tolist() == [1.0, 2.0]
+
+
+def test_rollup_overwrites_expired_bucket():
+    tier = RollupTier(resolution=60, capacity=4)
+    tier.add(0, 1.0)
+    # Bucket 4 maps to the same slot as bucket 0
+    tier.add(240, 2.0)
+    assert tier.span == 240
+    times, slots = tier.series(0, 299)
+    assert times.tolist() == [240.0]
+    assert tier.close[slots].tolist() == [2.0]
+    assert tier.high[slots].tolist() == [2.0]
+
+
+def test_rollup_series_limited_to_capacity():
+    tier = RollupTier(resolution=60, capacity=4)
+    for bucket in range(8):
+        tier.add(bucket * 60, float(bucket))
+    times, slots = tier.series(0, 8 * 60 - 1)
+    assert times.tolist() == [240.0, 300.0, 360.0, 420.0]
+    assert np.array_equal(tier.close[slots], np.array([4, 5, 6, 7], dtype=np.float32))
@@ -0,0 +1,81 @@
+import pytest
+from app.services import trending
+from app.services.market import MarketTable
+from app.services.trending import DecayedSpaceSaving, TrendingService
+
+
+# Fixed landmark so tests control the clock
+T0 = 1000.0
+
+
+def sketch(capacity: int = 3, half_life: float = 60.0) -> DecayedSpaceSaving:
+    counter = DecayedSpaceSaving(capacity, half_life)
+    counter.landmark = T0
+    return counter
+
+
+def test_counts_are_exact_below_capacity():
+    counter = sketch()
+    for key in ("BTC", "BTC", "ETH"):
+        counter.add(key, now=T0)
+    estimates = counter.estimates(now=T0)
+    assert estimates["BTC"][0] == pytest.approx(2.0)
+    assert estimates["ETH"] == (pytest.approx(1.0), 0.0)
+
+
+def test_new_key_replaces_smallest_and_inherits_its_count():
+    counter = sketch(capacity=2)
+    for key in ("BTC", "BTC", "BTC", "ETH"):
+        counter.add(key, now=T0)
+    counter.add("SOL", now=T0)
+    estimates = counter.estimates(now=T0)
+    assert set(estimates) == {"BTC", "SOL"}
+    count, error = estimates["SOL"]
+    assert count == pytest.approx(2.0)
+    assert error == pytest.approx(1.0)
+    # The true count is within [count - error, count]
+    assert count - error == pytest.approx(1.0)
+
+
+def test_counts_halve_every_half_life():
+    counter = sketch(half_life=60.0)
+    counter.add("BTC", now=T0)
+    assert counter.estimates(now=T0 + 60.0)["BTC"][0] == pytest.approx(0.5)
+    assert counter.estimates(now=T0 + 120.0)["BTC"][0] == pytest.approx(0.25)
+
+
+def test_recent_hits_outweigh_old_ones():
+    counter = sketch(half_life=60.0)
+    for _ in range(3):
+        counter.add("OLD", now=T0)
+    counter.add("NEW", now=T0 + 240.0)
+    counter.add("NEW", now=T0 + 240.0)
+    estimates = counter.estimates(now=T0 + 240.0)
+    assert estimates["NEW"][0] > estimates["OLD"][0]
+
+
+def test_rescale_keeps_estimates():
+    counter = sketch(half_life=1.0)
+    counter.add("BTC", now=T0)
+    counter.add("ETH", now=T0 + 10.0)
+    before = counter.estimates(now=T0 + 70.0)
+    later = T0 + trending.RESCALE_HALF_LIVES + 10.0
+    counter.add("ETH", now=later)
+    assert counter.landmark == later
+    after = counter.estimates(now=later)
+    assert after["BTC"][0] == pytest.approx(before["BTC"][0] * 2 ** -(later - T0 - 70.0))
+    assert after["ETH"][0] == pytest.approx(2 ** -(later - T0 - 10.0) + 1.0)
+
+
+def test_ranking_survives_market_rows_without_name_or_symbol(monkeypatch):
+    table = MarketTable.from_rows([
+        {"id": "nameless", "symbol": "nml", "name": None, "market_cap_rank": 1},
+        {"id": "symbolless", "symbol": None, "name": "Symbolless", "market_cap_rank": 2},
+    ])
+    monkeypatch.setattr(trending.market_service, "table", lambda: table)
+    service = TrendingService()
+    service.record("nameless")
+    service.record("symbolless")
+    coins = {coin["symbol"]: coin for coin in service.top(10)}
+    assert coins["NML"]["name"] == "NML"
+    assert coins["SYMBOLLESS"]["name"] == "Symbolless"